@@ -0,0 +1,338 @@
+# Бенчмарк времени компиляции: каждая программа из examples/ (или переданная явно)
+# проходит фазы компилятора в этом же процессе по нескольку раз, результаты
+# сохраняются в JSON и сравниваются с базовой линией.
+#
+#   python benchmarks/compile_bench.py                      # все примеры, сравнение с baselines/compile.json
+#   python benchmarks/compile_bench.py --save-baseline      # записать новую базовую линию
+#   python benchmarks/compile_bench.py -r 10 --threshold 5 --json out.json path/to/prog.cbl
+#   python benchmarks/compile_bench.py --synthetic 1,4,16        # плюс синтетические программы (benchmarks/synthetic.py)
+#
+# Примеры под Windows компилируются в объектный файл, если это получается; иначе для
+# них меряется только кодогенерация (без Си компилятора). Код возврата 1 - есть регрессии:
+# рост больше --threshold и --sigma разбросов, повторившийся при перепроверке (--confirm).
+import gc
+import os
+import re
+import sys
+import json
+import math
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'build'))
+
+import build_standalone as bs  # noqa: E402
+
+from core.lexer import tokenize  # noqa: E402
+from core.flux_parser import parse  # noqa: E402
+from core.module_loader import inline_imports  # noqa: E402
+from core.constant_folder import fold_constants  # noqa: E402
+from core.type_checker import TypeChecker  # noqa: E402
+from core.monomorphizer import monomorphize  # noqa: E402
+from core.timing import PHASE_NAMES, count_ast_nodes  # noqa: E402
+from core.debugger import GameDebugger, DebugLevel  # noqa: E402
+from synthetic import SyntheticConfig, write_program  # noqa: E402
+
+# Ошибки проверки типов попадают в notes, а не в консоль и debug.log на каждом замере
+_QUIET = GameDebugger(debug_level=DebugLevel.NONE)
+
+DEFAULT_BASELINE = ROOT / 'benchmarks' / 'baselines' / 'compile.json'
+IMPORT_RE = re.compile(r'^\s*(?:import|from)\s+"([^"]+)"', re.M)
+
+
+def discover_programs() -> List[Path]:
+    # Файлы, которые импортируются другими примерами, отдельно не собираются
+    files = sorted((ROOT / 'examples').glob('*/*.cbl'))
+    imported = set()
+    for f in files:
+        for name in IMPORT_RE.findall(f.read_text(encoding='utf-8')):
+            target = (f.parent / name).resolve()
+            imported.add(target if target.suffix else target.with_suffix('.cbl'))
+    return [f for f in files if f.resolve() not in imported]
+
+
+def relative_paths(text: str, work_dir: Optional[Path] = None) -> str:
+    # Заметки попадают в базовую линию: пути внутри репозитория и временного каталога
+    # записываются относительно, чтобы файл не зависел от машины
+    for base in ([work_dir] if work_dir else []) + [ROOT]:
+        text = text.replace(str(base) + os.sep, '')
+    return text
+
+
+def program_id(path: Path) -> str:
+    try:
+        return str(path.resolve().relative_to(ROOT))
+    except ValueError:
+        return str(path)
+
+
+class Toolchain:
+    def __init__(self, cc: str):
+        self.cc = cc
+        self.path = shutil.which(cc)
+        self.version = ''
+        self.family = 'clang' if 'clang' in cc else 'gcc'
+        if self.path:
+            result = subprocess.run([cc, '--version'], capture_output=True, text=True)
+            self.version = result.stdout.splitlines()[0] if result.stdout else ''
+
+    def cflags(self, c_code: str) -> List[str]:
+        # Флаги берутся у компилятора CBlerr (профиль size), как в обычной сборке
+        compiler = bs.StandaloneCompiler
+        return compiler.base_cflags('size', self.family, compiler.needs_omp_simd([c_code])).split()
+
+
+def run_once(path: Path, toolchain: Optional[Toolchain], work_dir: Path, trace_memory: bool = False) -> Dict[str, object]:
+    # trace_memory: пик памяти Python каждой фазы через tracemalloc (заметно замедляет замер)
+    phases: Dict[str, float] = {}
+    memory: Dict[str, int] = {}
+    notes: Dict[str, str] = {}
+
+    @contextmanager
+    def phase(name: str):
+        if trace_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        yield
+        phases[name] = time.perf_counter() - start
+        if trace_memory:
+            memory[name] = tracemalloc.get_traced_memory()[1] - base
+
+    with phase('read'):
+        source = path.read_text(encoding='utf-8')
+    with phase('tokenize'):
+        tokens = tokenize(source, str(path))
+    with phase('parse'):
+        ast = parse(tokens, str(path.resolve()))
+    with phase('imports'):
+        ast = inline_imports(ast, path)
+
+    # Проверка типов и мономорфизация пока не входят в конвейер сборки, но меряются,
+    # чтобы их стоимость была видна до подключения
+    try:
+        with phase('type_check'):
+            TypeChecker(_QUIET).check(ast)
+    except Exception as e:
+        notes['type_check'] = relative_paths(f"{type(e).__name__}: {e}", work_dir)
+    try:
+        with phase('monomorph'):
+            ast = monomorphize(ast)
+    except Exception as e:
+        notes['monomorph'] = relative_paths(f"{type(e).__name__}: {e}", work_dir)
+
+    with phase('fold'):
+        ast, _ = fold_constants(ast)
+
+    c_file = work_dir / f"{path.stem}.c"
+    is_gui = any(f.name == 'WinMain' for f in ast.functions)
+    with phase('codegen'):
+        c_code = bs.CCodeGenerator(is_gui_app=is_gui).generate(ast, c_filename=str(c_file))
+    c_file.write_text(c_code, encoding='utf-8')
+
+    if toolchain is not None:
+        start = time.perf_counter()
+        result = subprocess.run([toolchain.cc] + toolchain.cflags(c_code) + ['-c', str(c_file), '-o', str(c_file.with_suffix('.o'))],
+                                capture_output=True, text=True)
+        if result.returncode == 0:
+            phases['c_compile'] = time.perf_counter() - start
+        else:
+            errors = [line for line in result.stderr.splitlines() if 'error' in line]
+            notes['c_compile'] = relative_paths((errors or result.stderr.strip().splitlines() or ['compile failed'])[0], work_dir)
+
+    counts = {'bytes': len(source.encode('utf-8')), 'tokens': len(tokens), 'functions': len(ast.functions),
+              'ast_nodes': count_ast_nodes(ast), 'c_bytes': len(c_code.encode('utf-8'))}
+    return {'phases': phases, 'memory': memory, 'notes': notes, 'counts': counts}
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'runs': len(samples),
+    }
+
+
+def bench_program(path: Path, repeats: int, warmup: int, toolchain: Optional[Toolchain]) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory(prefix='cblerr_bench_') as tmp:
+        work_dir = Path(tmp)
+        first = run_once(path, toolchain, work_dir)
+        # Если Си файл не собирается на этой машине (WinAPI), программа меряется только до кодогенерации
+        codegen_only = toolchain is not None and 'c_compile' in first['notes']
+        tc = None if codegen_only else toolchain
+        for _ in range(max(0, warmup - 1)):
+            run_once(path, tc, work_dir)
+        runs = []
+        for _ in range(repeats):
+            gc.collect()
+            runs.append(run_once(path, tc, work_dir))
+
+    phases = {}
+    for name in PHASE_NAMES:
+        samples = [r['phases'][name] for r in runs if name in r['phases']]
+        if len(samples) == len(runs) and samples:
+            phases[name] = summarize(samples)
+    phases['total'] = summarize([sum(r['phases'].values()) for r in runs])
+    return {
+        'phases': phases,
+        'counts': runs[-1]['counts'],
+        'codegen_only': codegen_only,
+        'notes': first['notes'],
+    }
+
+
+def machine_info(toolchain: Optional[Toolchain]) -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cc': toolchain.version if toolchain else '',
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float, min_ms: float,
+            stat: str = 'min', sigma: float = 3.0) -> List[dict]:
+    # По умолчанию сравниваются минимумы: шум планировщика и кэшей только добавляет время,
+    # поэтому минимум стабильнее медианы при небольшом числе замеров. Рост засчитывается,
+    # только если он больше и порога в процентах, и sigma разбросов обоих замеров
+    regressions = []
+    for prog, res in results.items():
+        base = baseline.get(prog)
+        if not base:
+            continue
+        for phase, stats in res['phases'].items():
+            base_stats = base['phases'].get(phase)
+            if not base_stats or base_stats[stat] * 1000 < min_ms:
+                continue
+            change = (stats[stat] - base_stats[stat]) / base_stats[stat] * 100.0
+            noise = sigma * math.hypot(base_stats.get('stdev', 0.0), stats.get('stdev', 0.0))
+            if change > threshold and stats[stat] - base_stats[stat] > noise:
+                regressions.append({'program': prog, 'phase': phase, 'baseline_ms': base_stats[stat] * 1000,
+                                    'current_ms': stats[stat] * 1000, 'change_pct': change})
+    return regressions
+
+
+def print_table(results: Dict[str, dict], baseline: Dict[str, dict]):
+    shown = [p for p in PHASE_NAMES if any(p in r['phases'] for r in results.values())] + ['total']
+    header = f"{'программа':<44}" + "".join(f"{p[:10]:>11}" for p in shown)
+    print(header)
+    print("-" * len(header))
+    for prog, res in results.items():
+        cells = []
+        for phase in shown:
+            stats = res['phases'].get(phase)
+            if stats is None:
+                cells.append(f"{'-':>11}")
+                continue
+            cell = f"{stats['median'] * 1000:.2f}"
+            base = baseline.get(prog, {}).get('phases', {}).get(phase)
+            if base and base['median'] > 0:
+                cell += f"{(stats['median'] - base['median']) / base['median'] * 100.0:+.0f}%"
+            cells.append(f"{cell:>11}")
+        name = prog if len(prog) <= 42 else "..." + prog[-39:]
+        mark = " *" if res['codegen_only'] else ""
+        print(f"{name + mark:<44}" + "".join(cells))
+    print("Медианы в мс, после числа - изменение к базовой линии. * - только кодогенерация (Си не собирается на этой машине)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Бенчмарк времени компиляции CBlerr")
+    ap.add_argument('programs', nargs='*', help="Программы .cbl (по умолчанию все примеры из examples/)")
+    ap.add_argument('-r', '--repeats', type=int, default=10, help="Замеров на программу")
+    ap.add_argument('--warmup', type=int, default=1, help="Прогревочных прогонов")
+    ap.add_argument('--cc', default=os.getenv('CC', 'gcc'), help="Си компилятор для фазы c_compile")
+    ap.add_argument('--no-c-compile', action='store_true', help="Не запускать Си компилятор")
+    ap.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Файл базовой линии")
+    ap.add_argument('--save-baseline', action='store_true', help="Записать результаты как базовую линию")
+    ap.add_argument('--threshold', type=float, default=10.0, help="Допустимый рост времени фазы, %%")
+    ap.add_argument('--stat', choices=['min', 'median', 'mean'], default='min', help="Статистика для сравнения с базовой линией")
+    ap.add_argument('--min-ms', type=float, default=5.0, help="Фазы быстрее этого в базовой линии не сравниваются")
+    ap.add_argument('--sigma', type=float, default=3.0, help="Рост должен превышать столько стандартных отклонений")
+    ap.add_argument('--confirm', type=int, default=1, help="Повторных замеров программ с регрессиями; регрессия должна повториться")
+    ap.add_argument('--synthetic', help="Масштабы синтетических программ через запятую, например 1,4,16")
+    ap.add_argument('--json', help="Записать результаты в JSON")
+    args = ap.parse_args(argv)
+
+    programs = [(program_id(Path(p)), Path(p)) for p in args.programs]
+    if not programs:
+        programs = [(program_id(p), p) for p in discover_programs()]
+    synthetic_dir = None
+    if args.synthetic:
+        synthetic_dir = tempfile.mkdtemp(prefix='cblerr_synthetic_')
+        for scale in args.synthetic.split(','):
+            cfg = SyntheticConfig(modules=2).scaled(float(scale))
+            programs.append((f"synthetic/x{scale}", write_program(Path(synthetic_dir) / f"x{scale}", cfg)))
+    toolchain = None
+    if not args.no_c_compile:
+        toolchain = Toolchain(args.cc)
+        if not toolchain.path:
+            print(f"[WARN] {args.cc} не найден, фаза c_compile пропускается")
+            toolchain = None
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8')).get('programs', {})
+
+    try:
+        return run_benchmarks(args, programs, toolchain, baseline, baseline_path)
+    finally:
+        if synthetic_dir:
+            shutil.rmtree(synthetic_dir, ignore_errors=True)
+
+
+def run_benchmarks(args, programs: List[tuple], toolchain: Optional[Toolchain], baseline: Dict[str, dict],
+                   baseline_path: Path) -> int:
+    results = {}
+    for prog, path in programs:
+        print(f"  {prog}...", file=sys.stderr)
+        results[prog] = bench_program(path, args.repeats, args.warmup, toolchain)
+
+    report = {'version': 1, 'machine': machine_info(toolchain), 'repeats': args.repeats, 'programs': results}
+    print_table(results, baseline)
+    for prog, res in results.items():
+        for phase, note in res['notes'].items():
+            print(f"  {prog}: {phase} пропущена - {note[:100]}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=1) + "\n", encoding='utf-8')
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=1) + "\n", encoding='utf-8')
+        print(f"Базовая линия записана: {baseline_path}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.min_ms, args.stat, args.sigma)
+    # Одиночный всплеск нагрузки на машине не должен давать код возврата 1: программы с
+    # регрессиями перемериваются, остаются только фазы, которые регрессировали каждый раз
+    paths = dict(programs)
+    for attempt in range(args.confirm):
+        suspects = sorted({r['program'] for r in regressions})
+        if not suspects:
+            break
+        print(f"  перепроверка ({attempt + 1}/{args.confirm}): {', '.join(suspects)}", file=sys.stderr)
+        rerun = {prog: bench_program(paths[prog], args.repeats, args.warmup, toolchain) for prog in suspects}
+        again = {(r['program'], r['phase'])
+                 for r in compare(rerun, baseline, args.threshold, args.min_ms, args.stat, args.sigma)}
+        regressions = [r for r in regressions if (r['program'], r['phase']) in again]
+    for r in regressions:
+        print(f"[РЕГРЕССИЯ] {r['program']}: {r['phase']} ({args.stat}) {r['baseline_ms']:.2f} -> {r['current_ms']:.2f} мс "
+              f"({r['change_pct']:+.1f}% > {args.threshold:.0f}%)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
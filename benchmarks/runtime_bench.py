@@ -0,0 +1,308 @@
+# Бенчмарк сгенерированных программ: каждая программа из benchmarks/programs/ собирается
+# с каждым профилем оптимизации (--profile) и запускается несколько раз на закрепленном ядре.
+# Меряются время выполнения, пиковый RSS и размер исполняемого файла; время старта процесса
+# берется по пустой программе startup.cbl. Результаты сравниваются с базовой линией.
+#
+#   python benchmarks/runtime_bench.py                         # все программы, все профили
+#   python benchmarks/runtime_bench.py --profiles size,speed -r 10 --cpu 2
+#   python benchmarks/runtime_bench.py --save-baseline         # базовая линия этой машины
+#
+# Только Linux: программы запускает маленький Си раннер (sched_setaffinity, wait4), он собирается
+# тем же gcc/clang. Вывод программы должен совпадать во всех профилях, иначе это ошибка кодогенерации.
+# Программы-проверки (fold_float.cbl и т.п.) сообщают об ошибке ненулевым кодом возврата.
+# Время зависит от машины, поэтому базовая линия в репозиторий не кладется: она записывается
+# локально, а снятая на другой машине или другом ядре показывается только для информации.
+# Код возврата 1 - расхождения вывода, программа завершилась с ошибкой или регрессия: рост
+# больше --threshold и --sigma разбросов, повторившийся при перепроверке (--confirm).
+import os
+import sys
+import json
+import math
+import shutil
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from compile_bench import ROOT, bs, summarize, machine_info, Toolchain
+
+PROGRAMS_DIR = ROOT / 'benchmarks' / 'programs'
+DEFAULT_BASELINE = ROOT / 'benchmarks' / 'baselines' / 'runtime.json'
+BUILD_SCRIPT = ROOT / 'build' / 'build.py'
+STARTUP_PROGRAM = 'startup'
+# Пиковый RSS маленьких программ гуляет на десятки страниц от запуска к запуску
+RSS_NOISE_KB = 256
+
+
+def default_cpu() -> Optional[int]:
+    # Последнее доступное ядро: первое обычно занято прерываниями и системными потоками
+    try:
+        return max(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return None
+
+
+def build(src: Path, profile: str, out: Path, cc: Optional[str]) -> Optional[str]:
+    cmd = [sys.executable, str(BUILD_SCRIPT), str(src), '-t', 'linux', '-o', str(out), '--profile', profile]
+    if cc:
+        cmd.append(f'--{cc}')
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0 or not out.exists():
+        lines = [line for line in (result.stdout + result.stderr).splitlines() if line.strip()]
+        return lines[-1] if lines else f"код возврата {result.returncode}"
+    return None
+
+
+# Запуск через маленький Си раннер, а не из Python: ru_maxrss процесса включает пик памяти
+# того процесса, из которого он был порожден до exec, и для Python это ~20 МБ на любую программу
+RUNNER_SOURCE = r"""
+#define _GNU_SOURCE
+#include <fcntl.h>
+#include <sched.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include <unistd.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+
+int main(int argc, char **argv) {
+    if (argc < 3) return 2;
+    int cpu = atoi(argv[1]);
+    if (cpu >= 0) {
+        cpu_set_t set;
+        CPU_ZERO(&set);
+        CPU_SET(cpu, &set);
+        if (sched_setaffinity(0, sizeof(set), &set) != 0) return 3;
+    }
+    struct timespec t0, t1;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    pid_t pid = fork();
+    if (pid == 0) {
+        int devnull = open("/dev/null", O_WRONLY);
+        dup2(devnull, 2);
+        execv(argv[2], argv + 2);
+        _exit(127);
+    }
+    int status = 0;
+    struct rusage ru;
+    if (pid < 0 || wait4(pid, &status, 0, &ru) < 0) return 4;
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+    long long ns = (long long)(t1.tv_sec - t0.tv_sec) * 1000000000LL + (t1.tv_nsec - t0.tv_nsec);
+    long long cpu_us = (long long)(ru.ru_utime.tv_sec + ru.ru_stime.tv_sec) * 1000000LL + ru.ru_utime.tv_usec + ru.ru_stime.tv_usec;
+    int code = WIFEXITED(status) ? WEXITSTATUS(status) : 128 + WTERMSIG(status);
+    fprintf(stderr, "%lld %ld %lld %d\n", ns, ru.ru_maxrss, cpu_us, code);
+    return 0;
+}
+"""
+
+
+def build_runner(work: Path, cc: str) -> Path:
+    src = work / 'runner.c'
+    exe = work / 'runner'
+    src.write_text(RUNNER_SOURCE, encoding='utf-8')
+    subprocess.run([cc, '-O2', '-o', str(exe), str(src)], check=True, capture_output=True)
+    return exe
+
+
+def run_pinned(runner: Path, exe: Path, cpu: Optional[int]) -> Dict[str, object]:
+    result = subprocess.run([str(runner), str(cpu if cpu is not None else -1), str(exe)], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"раннер завершился с кодом {result.returncode}")
+    ns, rss_kb, cpu_us, code = result.stderr.decode().split()[-4:]
+    return {'wall': int(ns) / 1e9, 'rss': int(rss_kb) * 1024, 'cpu': int(cpu_us) / 1e6,
+            'exit': int(code), 'output': result.stdout.decode('utf-8', errors='replace')}
+
+
+def bench(runner: Path, exe: Path, repeats: int, warmup: int, cpu: Optional[int]) -> Dict[str, object]:
+    for _ in range(warmup):
+        run_pinned(runner, exe, cpu)
+    runs = [run_pinned(runner, exe, cpu) for _ in range(repeats)]
+    return {
+        'wall': summarize([r['wall'] for r in runs]),
+        'cpu_time': summarize([r['cpu'] for r in runs]),
+        'rss': max(r['rss'] for r in runs),
+        'size': exe.stat().st_size,
+        'exit': runs[-1]['exit'],
+        'output': runs[-1]['output'],
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float, size_threshold: float,
+            min_ms: float, stat: str, sigma: float = 3.0) -> List[dict]:
+    # Время засчитывается как регрессия, только если рост больше и порога в процентах,
+    # и sigma разбросов обоих замеров (как в compile_bench.compare)
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if not base or 'wall' not in res or 'wall' not in base:
+            continue
+        noise_ms = sigma * math.hypot(res['wall'].get('stdev', 0.0), base['wall'].get('stdev', 0.0)) * 1000
+        checks = [('время, мс', res['wall'][stat] * 1000, base['wall'][stat] * 1000, threshold, noise_ms,
+                   base['wall'][stat] * 1000 >= min_ms),
+                  ('размер, байт', res['size'], base['size'], size_threshold, 0.0, True),
+                  ('RSS, КБ', res['rss'] / 1024, base['rss'] / 1024, threshold, RSS_NOISE_KB, True)]
+        for label, cur, old, limit, noise, enabled in checks:
+            if enabled and old > 0:
+                change = (cur - old) / old * 100.0
+                if change > limit and cur - old > noise:
+                    regressions.append({'key': key, 'label': label, 'old': old, 'current': cur, 'change_pct': change,
+                                        'limit': limit})
+    return regressions
+
+
+def same_setup(report: dict, baseline_report: dict) -> bool:
+    # Замеры сравнимы только на той же машине, тем же компилятором и на том же ядре
+    cur, base = report.get('machine', {}), baseline_report.get('machine', {})
+    keys = ('platform', 'machine', 'cc', 'cpu_model')
+    return all(cur.get(k) == base.get(k) for k in keys) and report.get('cpu') == baseline_report.get('cpu')
+
+
+def cpu_model() -> str:
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return ''
+
+
+def print_table(results: Dict[str, dict], baseline: Dict[str, dict], startup: Dict[str, float], stat: str):
+    print(f"{'программа/профиль':<26} {'мс ' + stat:>10} {'мс median':>10} {'stdev':>7} {'RSS, КБ':>9} {'размер, КБ':>11}  к базе")
+    for key, res in results.items():
+        if 'error' in res:
+            print(f"{key:<26} {'ошибка сборки: ' + res['error'][:80]}")
+            continue
+        diff = ""
+        base = baseline.get(key)
+        if base and base.get('wall', {}).get(stat):
+            diff = f"{(res['wall'][stat] - base['wall'][stat]) / base['wall'][stat] * 100.0:+.1f}%"
+        print(f"{key:<26} {res['wall'][stat] * 1000:>10.2f} {res['wall']['median'] * 1000:>10.2f} "
+              f"{res['wall']['stdev'] * 1000:>7.2f} {res['rss'] / 1024:>9.0f} {res['size'] / 1024:>11.1f}  {diff}")
+    if startup:
+        print("Старт процесса (startup.cbl), мс: " + ", ".join(f"{p}={t * 1000:.2f}" for p, t in startup.items()))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    profiles = list(bs.StandaloneCompiler.OPTIMIZATION_PROFILES)
+    ap = argparse.ArgumentParser(description="Бенчмарк сгенерированных программ CBlerr по профилям оптимизации")
+    ap.add_argument('programs', nargs='*', help="Программы .cbl (по умолчанию benchmarks/programs/*.cbl)")
+    ap.add_argument('--profiles', default=",".join(profiles), help="Профили через запятую")
+    ap.add_argument('-r', '--repeats', type=int, default=10, help="Запусков на программу")
+    ap.add_argument('--warmup', type=int, default=1, help="Прогревочных запусков")
+    ap.add_argument('--cpu', type=int, default=default_cpu(), help="Ядро для закрепления (-1 - не закреплять)")
+    ap.add_argument('--cc', choices=['gcc', 'clang'], help="Си компилятор (по умолчанию выбирает build.py)")
+    ap.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Файл базовой линии")
+    ap.add_argument('--save-baseline', action='store_true', help="Записать результаты как базовую линию")
+    ap.add_argument('--threshold', type=float, default=5.0, help="Допустимый рост времени и RSS, %%")
+    ap.add_argument('--size-threshold', type=float, default=1.0, help="Допустимый рост размера файла, %%")
+    ap.add_argument('--stat', choices=['min', 'median', 'mean'], default='min', help="Статистика времени для сравнения")
+    ap.add_argument('--min-ms', type=float, default=5.0, help="Программы быстрее этого не сравниваются по времени")
+    ap.add_argument('--sigma', type=float, default=3.0, help="Рост времени должен превышать столько стандартных отклонений")
+    ap.add_argument('--confirm', type=int, default=1, help="Повторных замеров программ с регрессиями; регрессия должна повториться")
+    ap.add_argument('--json', help="Записать результаты в JSON")
+    args = ap.parse_args(argv)
+
+    if not sys.platform.startswith('linux'):
+        print("[ERROR] Бенчмарк выполнения работает только на Linux")
+        return 2
+    cpu = None if args.cpu is not None and args.cpu < 0 else args.cpu
+    selected = [p for p in args.profiles.split(',') if p]
+    unknown = [p for p in selected if p not in profiles]
+    if unknown:
+        print(f"[ERROR] Неизвестные профили: {', '.join(unknown)} (есть: {', '.join(profiles)})")
+        return 2
+
+    # Короткие имена (fib, sieve.cbl) ищутся в benchmarks/programs/
+    sources = [Path(p) if Path(p).exists() else PROGRAMS_DIR / Path(p).with_suffix('.cbl').name for p in args.programs]
+    sources = sources or sorted(PROGRAMS_DIR.glob('*.cbl'))
+    if not any(src.stem == STARTUP_PROGRAM for src in sources) and (PROGRAMS_DIR / f'{STARTUP_PROGRAM}.cbl').exists():
+        sources.insert(0, PROGRAMS_DIR / f'{STARTUP_PROGRAM}.cbl')
+
+    cc = args.cc or os.getenv('CC', 'gcc')
+    machine = dict(machine_info(Toolchain(cc)), cpu_model=cpu_model())
+    report = {'version': 1, 'machine': machine, 'cpu': cpu, 'repeats': args.repeats}
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    comparable = False
+    if baseline_path.exists() and not args.save_baseline:
+        baseline_report = json.loads(baseline_path.read_text(encoding='utf-8'))
+        baseline = baseline_report.get('results', {})
+        comparable = same_setup(report, baseline_report)
+        if not comparable:
+            print(f"[WARN] Базовая линия {baseline_path} снята на другой машине, компиляторе или ядре: "
+                  f"сравнение только для информации (перезапишите ее через --save-baseline)")
+
+    results: Dict[str, dict] = {}
+    startup: Dict[str, float] = {}
+    regressions: List[dict] = []
+    work = Path(tempfile.mkdtemp(prefix='cblerr_runtime_'))
+    try:
+        runner = build_runner(work, cc)
+        for profile in selected:
+            for src in sources:
+                key = f"{src.stem}/{profile}"
+                print(f"  {key}...", file=sys.stderr)
+                exe = work / f"{src.stem}-{profile}"
+                error = build(src, profile, exe, args.cc)
+                if error:
+                    results[key] = {'error': error}
+                    continue
+                results[key] = bench(runner, exe, args.repeats, args.warmup, cpu)
+                if src.stem == STARTUP_PROGRAM:
+                    startup[profile] = results[key]['wall'][args.stat]
+
+        if comparable:
+            compare_args = (args.threshold, args.size_threshold, args.min_ms, args.stat, args.sigma)
+            regressions = compare(results, baseline, *compare_args)
+            # Исполняемые файлы еще на месте: подозрительные перемериваются, остаются только
+            # регрессии, которые повторились каждый раз
+            for attempt in range(args.confirm):
+                suspects = sorted({r['key'] for r in regressions})
+                if not suspects:
+                    break
+                print(f"  перепроверка ({attempt + 1}/{args.confirm}): {', '.join(suspects)}", file=sys.stderr)
+                rerun = {key: bench(runner, work / key.replace('/', '-'), args.repeats, args.warmup, cpu)
+                         for key in suspects}
+                again = {(r['key'], r['label']) for r in compare(rerun, baseline, *compare_args)}
+                regressions = [r for r in regressions if (r['key'], r['label']) in again]
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print_table(results, baseline, startup, args.stat)
+
+    problems = []
+    for src in sources:
+        outputs = {p: results[f"{src.stem}/{p}"]['output'] for p in selected if 'output' in results.get(f"{src.stem}/{p}", {})}
+        if len(set(outputs.values())) > 1:
+            detail = "; ".join(f"{p}: {o.strip()[:40]!r}" for p, o in outputs.items())
+            problems.append(f"[РАСХОЖДЕНИЕ] {src.stem}: вывод зависит от профиля ({detail})")
+        for p in selected:
+            res = results.get(f"{src.stem}/{p}", {})
+            if 'error' in res:
+                problems.append(f"[ОШИБКА] {src.stem}/{p}: сборка не удалась")
+            elif res.get('exit', 0) != 0:
+                problems.append(f"[ОШИБКА] {src.stem}/{p}: код возврата {res['exit']}")
+
+    report.update(startup=startup, results=results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=1) + "\n", encoding='utf-8')
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=1) + "\n", encoding='utf-8')
+        print(f"Базовая линия записана: {baseline_path}")
+    for r in regressions:
+        problems.append(f"[РЕГРЕССИЯ] {r['key']}: {r['label']} {r['old']:.2f} -> {r['current']:.2f} "
+                        f"({r['change_pct']:+.1f}% > {r['limit']:g}%)")
+
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# Масштабирование компилятора: синтетические программы растущего размера (benchmarks/synthetic.py)
+# проходят все фазы, время и пик памяти каждой фазы аппроксимируются степенным законом
+# t ~ n^k по размеру AST. Фаза, растущая быстрее n*log(n), помечается.
+#
+#   python benchmarks/scaling_bench.py                                   # число функций 20..320
+#   python benchmarks/scaling_bench.py --knob expr-depth --sizes 2,4,8,16
+#   python benchmarks/scaling_bench.py --sizes 50,100,200,400,800 --modules 4 --json scaling.json
+#
+# Код возврата 1 - есть фазы с показателем выше n*log(n) + допуск.
+import gc
+import sys
+import math
+import json
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from compile_bench import Toolchain, run_once, machine_info
+from synthetic import SyntheticConfig, add_config_args, config_from_args, write_program
+from core.timing import PHASE_NAMES
+
+KNOBS = {
+    'functions': lambda cfg, n: _replace(cfg, functions=n, structs=max(cfg.structs, n // 10)),
+    'structs': lambda cfg, n: _replace(cfg, structs=n),
+    'modules': lambda cfg, n: _replace(cfg, modules=n, functions=max(cfg.functions, 4 * (n + 1))),
+    'nesting': lambda cfg, n: _replace(cfg, nesting=n),
+    'expr-depth': lambda cfg, n: _replace(cfg, expr_depth=n),
+}
+# Время фаз короче этого на всех размерах не аппроксимируется: там один шум таймера
+MIN_SECONDS = 0.002
+
+
+def _replace(cfg: SyntheticConfig, **changes) -> SyntheticConfig:
+    data = dict(vars(cfg))
+    data.update(changes)
+    return SyntheticConfig(**data)
+
+
+def fit_exponent(xs: List[float], ys: List[float]) -> Optional[float]:
+    # Наклон прямой по методу наименьших квадратов в логарифмических координатах
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(p[0] for p in points) / len(points)
+    my = sum(p[1] for p in points) / len(points)
+    var = sum((p[0] - mx) ** 2 for p in points)
+    if var == 0:
+        return None
+    return sum((p[0] - mx) * (p[1] - my) for p in points) / var
+
+
+def measure(cfg: SyntheticConfig, repeats: int, toolchain: Optional[Toolchain], work: Path) -> Dict[str, object]:
+    src = write_program(work / 'src', cfg)
+    runs = []
+    for _ in range(repeats):
+        gc.collect()
+        runs.append(run_once(src, toolchain, work))
+    tracemalloc.start()
+    try:
+        traced = run_once(src, None, work, trace_memory=True)
+    finally:
+        tracemalloc.stop()
+    lines = sum(len(f.read_text(encoding='utf-8').splitlines()) for f in src.parent.glob('*.cbl'))
+    shutil.rmtree(work / 'src', ignore_errors=True)
+
+    phases = {}
+    for name in PHASE_NAMES:
+        samples = [r['phases'][name] for r in runs if name in r['phases']]
+        if len(samples) == len(runs) and samples:
+            phases[name] = min(samples)
+    return {'phases': phases, 'memory': traced['memory'], 'counts': runs[-1]['counts'], 'notes': runs[-1]['notes'],
+            'lines': lines}
+
+
+def analyze(points: List[Dict[str, object]], tolerance: float) -> List[Dict[str, object]]:
+    xs = [p['counts']['ast_nodes'] for p in points]
+    nlogn = [x * math.log(x) for x in xs]
+    rows = []
+    for name in PHASE_NAMES + ['total']:
+        if name == 'total':
+            ts = [sum(p['phases'].values()) for p in points]
+        elif all(name in p['phases'] for p in points):
+            ts = [p['phases'][name] for p in points]
+        else:
+            continue
+        mem = [p['memory'].get(name, 0) for p in points]
+        row: Dict[str, object] = {'phase': name, 'seconds': ts, 'memory': mem,
+                                  'k_time': fit_exponent(xs, ts), 'k_memory': fit_exponent(xs, mem)}
+        # Показатель относительно n*log(n): 1.0 - ровно n*log(n), больше - растет быстрее
+        row['k_time_nlogn'] = fit_exponent(nlogn, ts)
+        row['k_memory_nlogn'] = fit_exponent(nlogn, mem)
+        row['measurable'] = max(ts) >= MIN_SECONDS
+        row['flag_time'] = bool(row['measurable'] and row['k_time_nlogn'] is not None
+                                and row['k_time_nlogn'] > 1.0 + tolerance)
+        row['flag_memory'] = bool(row['k_memory_nlogn'] is not None and max(mem) > 64 * 1024
+                                  and row['k_memory_nlogn'] > 1.0 + tolerance)
+        rows.append(row)
+    return rows
+
+
+def _fmt_k(k: Optional[float]) -> str:
+    return f"{k:.2f}" if k is not None else "-"
+
+
+def print_report(knob: str, sizes: List[int], points: List[Dict[str, object]], rows: List[Dict[str, object]]):
+    print(f"{knob:>12} {'строк':>8} {'узлов AST':>10} {'Си, байт':>10} {'всего, мс':>10}")
+    for size, p in zip(sizes, points):
+        total = sum(p['phases'].values()) * 1000
+        print(f"{size:>12} {p['lines']:>8} {p['counts']['ast_nodes']:>10} {p['counts']['c_bytes']:>10} {total:>10.1f}")
+    print()
+    print(f"{'фаза':<12} {'k(n)':>6} {'k(nlogn)':>9} {'мс min':>9} {'мс max':>9} {'k пам.':>7} {'пам. max':>10}")
+    for row in rows:
+        mark = []
+        if row['flag_time']:
+            mark.append("ВРЕМЯ > n*log(n)")
+        if row['flag_memory']:
+            mark.append("ПАМЯТЬ > n*log(n)")
+        if not row['measurable']:
+            mark.append("(слишком быстро)")
+        mem_max = max(row['memory']) / 1024 if row['memory'] else 0
+        print(f"{row['phase']:<12} {_fmt_k(row['k_time']):>6} {_fmt_k(row['k_time_nlogn']):>9} "
+              f"{min(row['seconds']) * 1000:>9.1f} {max(row['seconds']) * 1000:>9.1f} "
+              f"{_fmt_k(row['k_memory']):>7} {mem_max:>8.0f}КБ  {' '.join(mark)}")
+    print("k - показатель степени по числу узлов AST (1.0 - линейно); k(nlogn) > 1 - быстрее n*log(n).")
+    print("Память - пик Python-кучи внутри фазы (tracemalloc); Си компилятор в нее не входит.")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Масштабирование фаз компилятора CBlerr")
+    ap.add_argument('--knob', choices=sorted(KNOBS), default='functions', help="Какой параметр генератора растет")
+    ap.add_argument('--sizes', default='20,40,80,160,320', help="Значения параметра через запятую")
+    ap.add_argument('-r', '--repeats', type=int, default=2, help="Замеров на размер (берется минимум)")
+    ap.add_argument('--tolerance', type=float, default=0.15, help="Допуск показателя над n*log(n)")
+    ap.add_argument('--cc', default='gcc', help="Си компилятор для фазы c_compile")
+    ap.add_argument('--no-c-compile', action='store_true', help="Не запускать Си компилятор")
+    ap.add_argument('--json', help="Записать точки и аппроксимацию в JSON")
+    add_config_args(ap)
+    # По умолчанию без локальных структур, чтобы в аппроксимацию попала проверка типов
+    ap.add_argument('--struct-vars', dest='no_struct_vars', action='store_false', help="Объявлять локальные структуры")
+    ap.set_defaults(no_struct_vars=True)
+    args = ap.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    base = config_from_args(args)
+    toolchain = None
+    if not args.no_c_compile:
+        toolchain = Toolchain(args.cc)
+        if not toolchain.path:
+            print(f"[WARN] {args.cc} не найден, фаза c_compile пропускается")
+            toolchain = None
+
+    points = []
+    work = Path(tempfile.mkdtemp(prefix='cblerr_scaling_'))
+    try:
+        for size in sizes:
+            cfg = KNOBS[args.knob](base, size)
+            print(f"  {args.knob}={size}...", file=sys.stderr)
+            points.append(measure(cfg, args.repeats, toolchain, work))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    rows = analyze(points, args.tolerance)
+    print_report(args.knob, sizes, points, rows)
+    for note in sorted({f"{k}: {v[:100]}" for p in points for k, v in p['notes'].items()}):
+        print(f"  пропущено - {note}")
+
+    if args.json:
+        report = {'version': 1, 'machine': machine_info(toolchain), 'knob': args.knob, 'sizes': sizes,
+                  'config': vars(base), 'points': points, 'fit': rows}
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=1) + "\n", encoding='utf-8')
+    return 1 if any(row['flag_time'] or row['flag_memory'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
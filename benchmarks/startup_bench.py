@@ -0,0 +1,149 @@
+# Бенчмарк старта CLI: время от запуска build/build.py до выхода для справки (--help) и для
+# сборки, которая целиком берется из кэша, плюс разбор `python -X importtime` - какие модули
+# сколько стоят при импорте. Из времени вычитается старт пустого интерпретатора.
+#
+#   python benchmarks/startup_bench.py                    # сравнение с baselines/startup.json
+#   python benchmarks/startup_bench.py -r 30 --top 25
+#   python benchmarks/startup_bench.py --save-baseline
+#
+# Код возврата 1 - накладные расходы CLI выросли больше --threshold.
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from compile_bench import ROOT, summarize, machine_info
+
+DEFAULT_BASELINE = ROOT / 'benchmarks' / 'baselines' / 'startup.json'
+BUILD_SCRIPT = ROOT / 'build' / 'build.py'
+STANDALONE_SCRIPT = ROOT / 'build' / 'build_standalone.py'
+STARTUP_PROGRAM = ROOT / 'benchmarks' / 'programs' / 'startup.cbl'
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+
+def scenarios(work: Path) -> Dict[str, List[str]]:
+    exe = str(work / 'startup')
+    return {
+        'python': [sys.executable, '-c', 'pass'],
+        'help': [sys.executable, str(BUILD_SCRIPT), '--help'],
+        'help-direct': [sys.executable, str(STANDALONE_SCRIPT), '--help'],
+        'cached-build': [sys.executable, str(BUILD_SCRIPT), str(STARTUP_PROGRAM), '-t', 'linux', '-o', exe, '--no-server'],
+    }
+
+
+def wall_time(cmd: List[str], env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=ROOT)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)}: код возврата {result.returncode}")
+    return elapsed
+
+
+def import_times(cmd: List[str], env: Dict[str, str]) -> Tuple[float, List[Tuple[str, float, float]]]:
+    # Возвращает общее время импорта и (модуль, собственное, с вложенными) для каждого модуля, секунды
+    result = subprocess.run([cmd[0], '-X', 'importtime'] + cmd[1:], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, env=env, cwd=ROOT)
+    modules = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        own, cumulative = int(m.group(1)) / 1e6, int(m.group(2)) / 1e6
+        if len(m.group(3)) == 1:
+            total += cumulative
+        modules.append((m.group(4), own, cumulative))
+    return total, modules
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float, min_ms: float) -> List[str]:
+    problems = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base or 'overhead' not in res or 'overhead' not in base:
+            continue
+        cur, old = res['overhead'] * 1000, base['overhead'] * 1000
+        if old >= min_ms and (cur - old) / old * 100.0 > threshold:
+            problems.append(f"[РЕГРЕССИЯ] {name}: накладные расходы {old:.1f} -> {cur:.1f} мс "
+                            f"({(cur - old) / old * 100.0:+.1f}% > {threshold:g}%)")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Бенчмарк старта CLI компилятора CBlerr")
+    ap.add_argument('-r', '--repeats', type=int, default=15, help="Запусков на сценарий (берется минимум)")
+    ap.add_argument('--warmup', type=int, default=2, help="Прогревочных запусков (кэш .pyc и кэш сборки)")
+    ap.add_argument('--top', type=int, default=15, help="Сколько самых дорогих модулей показать")
+    ap.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Файл базовой линии")
+    ap.add_argument('--save-baseline', action='store_true', help="Записать результаты как базовую линию")
+    ap.add_argument('--threshold', type=float, default=10.0, help="Допустимый рост накладных расходов, %%")
+    ap.add_argument('--min-ms', type=float, default=5.0, help="Сценарии дешевле этого не сравниваются")
+    ap.add_argument('--json', help="Записать результаты в JSON")
+    args = ap.parse_args(argv)
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8')).get('results', {})
+
+    # Демон сборки не должен подхватить запросы: он спрятал бы стоимость старта
+    env = dict(os.environ, CBLERR_SOCKET=os.devnull + '.cblerr-startup-bench')
+    results: Dict[str, dict] = {}
+    work = Path(tempfile.mkdtemp(prefix='cblerr_startup_'))
+    try:
+        cmds = scenarios(work)
+        for name, cmd in cmds.items():
+            print(f"  {name}...", file=sys.stderr)
+            for _ in range(args.warmup):
+                wall_time(cmd, env)
+            results[name] = {'wall': summarize([wall_time(cmd, env) for _ in range(args.repeats)])}
+        total, modules = import_times(cmds['help'], env)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    floor = results['python']['wall']['min']
+    for name, res in results.items():
+        if name != 'python':
+            res['overhead'] = max(0.0, res['wall']['min'] - floor)
+
+    print(f"{'сценарий':<14} {'мс min':>8} {'мс median':>10} {'сверх python':>13}  к базе")
+    for name, res in results.items():
+        diff = ""
+        base = baseline.get(name)
+        if base and base.get('overhead') and 'overhead' in res:
+            diff = f"{(res['overhead'] - base['overhead']) / base['overhead'] * 100.0:+.1f}%"
+        extra = f"{res['overhead'] * 1000:>13.1f}" if 'overhead' in res else f"{'':>13}"
+        print(f"{name:<14} {res['wall']['min'] * 1000:>8.1f} {res['wall']['median'] * 1000:>10.1f} {extra}  {diff}")
+
+    print(f"\nИмпорт модулей при --help: {total * 1000:.1f} мс (python -X importtime)")
+    print(f"{'собств., мс':>12} {'всего, мс':>10}  модуль")
+    for name, own, cumulative in sorted(modules, key=lambda m: m[1], reverse=True)[:args.top]:
+        print(f"{own * 1000:>12.2f} {cumulative * 1000:>10.2f}  {name}")
+
+    report = {'version': 1, 'machine': machine_info(None), 'repeats': args.repeats, 'results': results,
+              'imports': {'total': total, 'modules': [list(m) for m in modules]}}
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=1) + "\n", encoding='utf-8')
+    problems = []
+    if args.save_baseline:
+        del report['imports']
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=1) + "\n", encoding='utf-8')
+        print(f"Базовая линия записана: {baseline_path}")
+    else:
+        problems = compare(results, baseline, args.threshold, args.min_ms)
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# Генератор синтетических программ CBlerr для проверки масштабирования компилятора.
+# Программы детерминированы (seed) и компилируются без внешних функций, поэтому
+# собираются gcc/clang на любой машине.
+#
+#   python benchmarks/synthetic.py OUT_DIR --functions 2000 --structs 100 --modules 8 --nesting 4 --expr-depth 6
+#
+# Функции вызывают только ранее объявленные функции своего модуля, main - функции всех модулей.
+# Первый параметр каждой функции - оставшаяся глубина вызовов, так что программы еще и быстро выполняются.
+import sys
+import random
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+OPS = ['+', '-', '*']
+CMPS = ['<', '>', '<=', '>=', '==', '!=']
+
+
+@dataclass
+class SyntheticConfig:
+    functions: int = 100
+    structs: int = 10
+    modules: int = 0
+    nesting: int = 2
+    expr_depth: int = 3
+    statements: int = 4
+    fields: int = 4
+    # Проверка типов пока не принимает инициализатор структуры {0}; без локальных структур
+    # синтетическая программа без модулей проходит ее целиком
+    struct_vars: bool = True
+    seed: int = 1
+
+    def scaled(self, factor: float) -> 'SyntheticConfig':
+        # Масштабируется объем программы; глубина вложенности и выражений остается прежней
+        return SyntheticConfig(
+            functions=max(1, int(self.functions * factor)),
+            structs=int(self.structs * factor),
+            modules=self.modules,
+            nesting=self.nesting,
+            expr_depth=self.expr_depth,
+            statements=self.statements,
+            fields=self.fields,
+            struct_vars=self.struct_vars,
+            seed=self.seed,
+        )
+
+
+class _ModuleWriter:
+    def __init__(self, rng: random.Random, cfg: SyntheticConfig, prefix: str):
+        self.rng = rng
+        self.cfg = cfg
+        self.prefix = prefix
+        self.lines: List[str] = []
+        self.structs: List[str] = []
+        self.functions: List[str] = []
+        self._var = 0
+
+    def _new_var(self) -> str:
+        self._var += 1
+        return f"v{self._var}"
+
+    def emit_structs(self, count: int):
+        for k in range(count):
+            name = f"{self.prefix}S{k}"
+            self.lines.append(f"struct {name}:")
+            for j in range(self.cfg.fields):
+                self.lines.append(f"    f{j}: int")
+            if self.structs:
+                self.lines.append(f"    inner: {self.structs[-1]}")
+            self.lines.append("")
+            self.structs.append(name)
+
+    def _leaf(self, scope: List[str], struct_var: Optional[str]) -> str:
+        r = self.rng.random()
+        if struct_var and r < 0.2:
+            return f"{struct_var}.f{self.rng.randrange(self.cfg.fields)}"
+        if scope and r < 0.7:
+            return self.rng.choice(scope)
+        return str(self.rng.randrange(1, 100))
+
+    def expression(self, depth: int, scope: List[str], struct_var: Optional[str] = None) -> str:
+        # Дерево смещено влево: глубина ровно depth, размер растет линейно
+        if depth <= 0:
+            return self._leaf(scope, struct_var)
+        right = self.expression(1, scope, struct_var) if self.rng.random() < 0.3 else self._leaf(scope, struct_var)
+        return f"({self.expression(depth - 1, scope, struct_var)} {self.rng.choice(OPS)} {right})"
+
+    def _condition(self, scope: List[str], struct_var: Optional[str]) -> str:
+        left = self.expression(max(1, self.cfg.expr_depth // 2), scope, struct_var)
+        return f"{left} {self.rng.choice(CMPS)} {self.rng.randrange(100)}"
+
+    def block(self, indent: int, nesting: int, scope: List[str], acc: str, struct_var: Optional[str]) -> List[str]:
+        pad = "    " * indent
+        out: List[str] = []
+        scope = list(scope)
+        for _ in range(self.cfg.statements):
+            r = self.rng.random()
+            if nesting > 0 and r < 0.25:
+                out.append(f"{pad}if {self._condition(scope, struct_var)}:")
+                out.extend(self.block(indent + 1, nesting - 1, scope, acc, struct_var))
+                out.append(f"{pad}else:")
+                out.extend(self.block(indent + 1, nesting - 1, scope, acc, struct_var))
+            elif nesting > 0 and r < 0.4:
+                counter = self._new_var()
+                out.append(f"{pad}{counter}: int = 0")
+                out.append(f"{pad}while {counter} < {self.rng.randrange(2, 8)}:")
+                out.extend(self.block(indent + 1, nesting - 1, scope + [counter], acc, struct_var))
+                out.append(f"{pad}    {counter} = {counter} + 1")
+            elif self.functions and r < 0.5:
+                # Глубина вызовов ограничена параметром a, чтобы программа завершалась быстро
+                callee = self.rng.choice(self.functions)
+                out.append(f"{pad}if a > 0:")
+                out.append(f"{pad}    {acc} = {acc} + {callee}(a - 1, {self.expression(self.cfg.expr_depth, scope, struct_var)})")
+            elif struct_var and r < 0.6:
+                out.append(f"{pad}{struct_var}.f{self.rng.randrange(self.cfg.fields)} = {self.expression(self.cfg.expr_depth, scope, struct_var)}")
+            elif r < 0.8:
+                var = self._new_var()
+                out.append(f"{pad}{var}: int = {self.expression(self.cfg.expr_depth, scope, struct_var)}")
+                out.append(f"{pad}{acc} = {acc} + {var}")
+                scope.append(var)
+            else:
+                out.append(f"{pad}{acc} = {acc} + {self.expression(self.cfg.expr_depth, scope, struct_var)}")
+        return out
+
+    def emit_function(self, name: str):
+        self._var = 0
+        params = ['a', 'b']
+        self.lines.append(f"def {name}(a: int, b: int) -> int:")
+        self.lines.append(f"    acc: int = {self.expression(self.cfg.expr_depth, params)}")
+        struct_var = None
+        if self.structs and self.cfg.struct_vars:
+            struct_var = "s"
+            self.lines.append(f"    s: {self.rng.choice(self.structs)} = {{0}}")
+        self.lines.extend(self.block(1, self.cfg.nesting, params + ['acc'], 'acc', struct_var))
+        self.lines.append("    return acc")
+        self.lines.append("")
+        self.functions.append(name)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _split(total: int, parts: int) -> List[int]:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def generate_program(cfg: SyntheticConfig) -> Dict[str, str]:
+    # Возвращает {имя файла: исходный текст}; главный файл - main.cbl
+    rng = random.Random(cfg.seed)
+    files: Dict[str, str] = {}
+    fn_split = _split(cfg.functions, cfg.modules + 1)
+    st_split = _split(cfg.structs, cfg.modules + 1)
+    exported: List[str] = []
+
+    for m in range(cfg.modules):
+        mod = _ModuleWriter(rng, cfg, f"m{m}_")
+        mod.emit_structs(st_split[m + 1])
+        for i in range(fn_split[m + 1]):
+            mod.emit_function(f"m{m}_f{i}")
+        files[f"mod{m}.cbl"] = mod.text()
+        exported.extend(mod.functions[-2:])
+
+    main = _ModuleWriter(rng, cfg, "")
+    main.lines.extend(f'import "mod{m}.cbl"' for m in range(cfg.modules))
+    if cfg.modules:
+        main.lines.append("")
+    main.emit_structs(st_split[0])
+    for i in range(fn_split[0]):
+        main.emit_function(f"f{i}")
+
+    main.lines.append("def main() -> int:")
+    main.lines.append("    total: int = 0")
+    for callee in main.functions[-4:] + exported:
+        main.lines.append(f"    total = total + {callee}(2, 3)")
+    main.lines.append("    return total % 256")
+    files["main.cbl"] = main.text()
+    return files
+
+
+def write_program(out_dir: Path, cfg: SyntheticConfig) -> Path:
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, text in generate_program(cfg).items():
+        (out_dir / name).write_text(text, encoding='utf-8')
+    return out_dir / "main.cbl"
+
+
+def add_config_args(ap: argparse.ArgumentParser):
+    defaults = SyntheticConfig()
+    ap.add_argument('--functions', type=int, default=defaults.functions, help="Число функций")
+    ap.add_argument('--structs', type=int, default=defaults.structs, help="Число структур")
+    ap.add_argument('--modules', type=int, default=defaults.modules, help="Число импортируемых модулей")
+    ap.add_argument('--nesting', type=int, default=defaults.nesting, help="Глубина вложенности if/while")
+    ap.add_argument('--expr-depth', type=int, default=defaults.expr_depth, help="Глубина выражений")
+    ap.add_argument('--statements', type=int, default=defaults.statements, help="Операторов в блоке")
+    ap.add_argument('--no-struct-vars', action='store_true', help="Не объявлять локальные переменные-структуры")
+    ap.add_argument('--seed', type=int, default=defaults.seed)
+
+
+def config_from_args(args) -> SyntheticConfig:
+    return SyntheticConfig(functions=args.functions, structs=args.structs, modules=args.modules, nesting=args.nesting,
+                           expr_depth=args.expr_depth, statements=args.statements,
+                           struct_vars=not args.no_struct_vars, seed=args.seed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Генератор синтетических программ CBlerr")
+    ap.add_argument('out_dir', help="Каталог для main.cbl и модулей")
+    add_config_args(ap)
+    args = ap.parse_args(argv)
+    path = write_program(Path(args.out_dir), config_from_args(args))
+    lines = sum(len(p.read_text(encoding='utf-8').splitlines()) for p in path.parent.glob('*.cbl'))
+    print(f"{path} ({lines} строк)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
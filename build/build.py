@@ -1,21 +1,138 @@
 import sys
-import subprocess
 import os
 from pathlib import Path
+from typing import List, Optional
+
+# Лаунчер запускается на каждую сборку: тяжелые модули импортируются только там, где нужны
+
+
+def default_socket_path() -> str:
+    # Один демон на пользователя; CBLERR_SOCKET переопределяет путь. Каталог сокета должен
+    # быть доступен только владельцу: XDG_RUNTIME_DIR или свой каталог во временной папке
+    if os.environ.get("CBLERR_SOCKET"):
+        return os.environ["CBLERR_SOCKET"]
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], f"cblerr-{uid}.sock")
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f"cblerr-{uid}", "cblerr.sock")
+
+
+def _connect(socket_path: str):
+    import socket
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    # Чужому сокету не отправляются ни аргументы, ни окружение
+    if hasattr(os, "getuid") and os.stat(socket_path).st_uid != os.getuid():
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError:
+        conn.close()
+        return None
+    return conn
+
+
+def _request(conn, request: dict):
+    # Ответ демона - поток JSON строк: {"out"|"err": текст}, в конце {"exit": код} или {"stale": true}
+    import json
+    with conn:
+        conn.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        for line in conn.makefile("rb"):
+            frame = json.loads(line.decode("utf-8"))
+            if "out" in frame:
+                sys.stdout.write(frame["out"])
+                sys.stdout.flush()
+            elif "err" in frame:
+                sys.stderr.write(frame["err"])
+                sys.stderr.flush()
+            else:
+                return frame
+    return None
+
+
+def build_via_server(args) -> Optional[int]:
+    # None - демон недоступен или устарел, сборка идет в этом процессе как обычно
+    conn = _connect(default_socket_path())
+    if conn is None:
+        return None
+    try:
+        frame = _request(conn, {"argv": args, "cwd": os.getcwd(), "env": dict(os.environ)})
+    except (OSError, ValueError):
+        return None
+    if frame is None or frame.get("stale"):
+        return None
+    return frame.get("exit", 1)
+
+
+def _import_compiler(current_dir: Path):
+    sys.path.insert(0, str(current_dir))
+    import build_standalone
+    return build_standalone
+
+
+def serve_command(current_dir: Path, args) -> int:
+    socket_path = default_socket_path()
+    idle_timeout = 0.0
+    i = 0
+    while i < len(args):
+        if args[i] == "--socket" and i + 1 < len(args):
+            socket_path = args[i + 1]
+            i += 2
+        elif args[i] == "--idle-timeout" and i + 1 < len(args):
+            idle_timeout = float(args[i + 1])
+            i += 2
+        elif args[i] in ("--stop", "--status"):
+            conn = _connect(socket_path)
+            if conn is None:
+                print(f"Демон не запущен ({socket_path})")
+                return 1
+            frame = _request(conn, {"command": args[i][2:]}) or {}
+            if args[i] == "--stop":
+                print("Демон остановлен")
+            else:
+                print(f"Демон pid {frame.get('pid')}: {socket_path}")
+                print(f"  сборок {frame.get('builds', 0)}, AST в памяти {frame.get('asts', 0)} ({frame.get('ast_bytes', 0) // 1024} КБ) "
+                      f"(из памяти {frame.get('ast_hits', 0)}), готовый Си код {frame.get('outputs', 0)} "
+                      f"(из памяти {frame.get('output_hits', 0)}), компиляторов {frame.get('toolchains', 0)}")
+            return 0
+        else:
+            print(f"Неизвестный параметр serve: {args[i]}")
+            return 1
+    return _import_compiler(current_dir).serve(socket_path, idle_timeout)
+
+
+def build_local(current_dir: Path, args: List[str]) -> int:
+    # Компилятор выполняется в этом же интерпретаторе: без второго запуска Python и без
+    # перекомпиляции build_standalone.py в байткод, которая ждет любой скрипт __main__
+    compiler = _import_compiler(current_dir)
+    return compiler.main([str(current_dir / "build_standalone.py")] + args)
+
 
 def main():
     current_dir = Path(__file__).parent.resolve()
-    target_script = current_dir / "build_standalone.py" #chito meowly fazber? Idk 
 
-    command = [sys.executable, str(target_script)] + sys.argv[1:]
+    args = sys.argv[1:]
+    if args and args[0] == "serve":
+        try:
+            sys.exit(serve_command(current_dir, args[1:]))
+        except KeyboardInterrupt:
+            sys.exit(130)
+
+    if "--no-server" in args:
+        args = [a for a in args if a != "--no-server"]
+    elif args and args[0] not in ("-h", "--help"):
+        code = build_via_server(args)
+        if code is not None:
+            sys.exit(code)
 
     try:
-        result = subprocess.run(command, check=False)
-        sys.exit(result.returncode)
+        sys.exit(build_local(current_dir, args))
     except KeyboardInterrupt:
         print("\nСборка прервана пользователем.")
         sys.exit(130)
-    except Exception as e:
+    except ImportError as e:
         print(f"Не удалось запустить компилятор: {e} (возможно, он не установлен или не найден в папке со скриптом)")
         sys.exit(1)
 
@@ -1,18 +1,22 @@
 import sys
 import os
 import subprocess
-import tempfile
 import re
-import platform
+import shutil
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict
 
 DERR_FLAG = False
 SAVE_C_FLAG = False
 
-def _extract_cli_flags():
+def _extract_cli_flags(argv: Optional[List[str]] = None) -> List[str]:
+    # Без аргументов разбирает и правит sys.argv; лаунчер и демон передают argv явно
     global DERR_FLAG, SAVE_C_FLAG
-    argv = sys.argv
+    if argv is None:
+        argv = sys.argv
+    else:
+        DERR_FLAG = False
+        SAVE_C_FLAG = False
     new_argv = [argv[0]] if argv else []
     i = 1
     while i < len(argv):
@@ -27,10 +31,9 @@ def _extract_cli_flags():
             continue
         new_argv.append(a)
         i += 1
-    if len(new_argv) != len(argv):
+    if argv is sys.argv and len(new_argv) != len(argv):
         sys.argv[:] = new_argv
-
-_extract_cli_flags()
+    return new_argv
 
 core_path = Path(__file__).parent.parent / "core"
 if getattr(sys, 'frozen', False):
@@ -63,12 +66,31 @@ from core.flux_ast import (
     StructDef, FieldAccess, ArrayAccess, ArrayLiteral, LogicalOp,
     PointerType, Dereference, InlineAsm, CastExpr, Decorator, ComptimeBlock
 )
-from core.flux_ast import MatchStmt, Case, ForLoop, EnumDef, AddressOf, SizeOf, WalrusExpr
+from core.flux_ast import MatchStmt, Case, ForLoop, EnumDef, AddressOf, SizeOf, WalrusExpr, GenericType
 from core.debugger import init_debugger, get_debugger, DebugLevel
+from core.build_cache import hash_parts, open_cache, open_function_cache, FunctionCache
+from core.timing import PhaseTimer, count_ast_nodes
+
+_CODEGEN_VERSION = None
+OMP_SIMD_PRAGMA = "#pragma omp simd"
+
+
+def _codegen_version() -> str:
+    # Отпечатки функций теряют силу при любом изменении самого генератора
+    global _CODEGEN_VERSION
+    if _CODEGEN_VERSION is None:
+        _CODEGEN_VERSION = hash_parts([Path(__file__).read_text(encoding='utf-8')])
+    return _CODEGEN_VERSION
 
 
 class CCodeGenerator:
-    def __init__(self, module_name: str = "cblerr_module", link_mode: Optional[str] = None, is_gui_app: bool = False):
+    # Точки входа, на которые ссылаются рантайм и линкер; остальные функции получают static
+    EXPORTED_FUNCTIONS = ('main', 'WinMain', 'CblerrStartup')
+    # Заменяется на "#line <номер следующей строки> <файл .c>" после сборки текста единицы
+    LINE_RESET = "#line __CBLERR_C_LINE__"
+
+    def __init__(self, module_name: str = "cblerr_module", link_mode: Optional[str] = None, is_gui_app: bool = False,
+                 jobs: int = 1, line_directives: bool = True, function_cache: Optional[FunctionCache] = None):
         self.module_name = module_name
         self.link_mode = link_mode
         self.is_gui_app = is_gui_app
@@ -82,10 +104,321 @@ class CCodeGenerator:
         self.break_stack = []
         self.continue_stack = []
         self.string_counter = 0
+        self.string_uses = 0
+        self.label_counter = 0
+        self.loop_pragmas = []
+        self.enum_names = set()
+        self.enum_values = {}
+        self.slice_types = {}
+        self.address_taken = set()
+        self.internal_linkage = True
+        self.stable_string_names = False
+        self.string_names = set()
+        self._current_strings = None
+        self.in_global_init = False
         self.local_vars_stack = []
         self.dynamic_globals =[]
+        self.jobs = max(1, jobs)
+        self.line_directives = line_directives
+        self.function_cache = function_cache
+        self.function_strings: Dict[str, List[str]] = {}
+        self._dependency_memo: Dict[str, Tuple[bytes, set]] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._cached_functions: Dict[str, dict] = {}
+        self._signatures: Dict[str, str] = {}
+        self._program_globals = {}
+        self._symbols = None
+        self._words_memo: Dict[bytes, tuple] = {}
+        self.source_file = None
+        self.source_map: List[Tuple[str, int, str, int]] = []
+
+    def generate(self, program: Program, c_filename: Optional[str] = None) -> str:
+        self._collect_tables(program)
+        self._emit_prelude()
+        self._emit_types(program)
+        self._emit_string_pool()
+        self._emit_globals(program)
+        self._emit_prototypes(program)
+        if program.functions:
+            for lines in self._generate_function_blocks(program):
+                self.code_lines.extend(lines)
+        self._emit_startup()
+        return self._resolve_line_directives("\n".join(self.code_lines), c_filename or f"{self.module_name}.c")
+
+    def generate_units(self, program: Program, n_units: int, header_name: str,
+                       c_dir: Optional[str] = None) -> Tuple[str, List[str]]:
+        # Функции из разных единиц трансляции вызывают друг друга, static здесь недопустим
+        self.internal_linkage = False
+        self._collect_tables(program)
+        self._emit_prelude(runtime_stubs=False)
+        self._emit_types(program)
+        self._emit_string_pool()
+        self._emit_global_externs(program)
+        self._emit_prototypes(program)
+        guard = re.sub(r'\W', '_', header_name).upper()
+        header = "\n".join([f"#ifndef {guard}", f"#define {guard}"] + self.code_lines + ["#endif", ""])
+
+        self.code_lines = []
+        self._emit_runtime_stubs()
+        self._emit_globals(program)
+        main_head = self.code_lines
+
+        blocks = self._generate_function_blocks(program) if program.functions else []
+        groups = self._partition_blocks(blocks, max(1, n_units))
+
+        self.code_lines = []
+        self._emit_startup()
+        main_tail = self.code_lines
+
+        include = f'#include "{header_name}"'
+        units = []
+        for idx, group in enumerate(groups):
+            lines = [include, ""]
+            if idx == 0:
+                lines.extend(main_head)
+            for block in group:
+                lines.extend(block)
+            if idx == 0:
+                lines.extend(main_tail)
+            unit_name = f"{Path(header_name).stem}_{idx}.c"
+            unit_path = os.path.join(c_dir, unit_name) if c_dir else unit_name
+            units.append(self._resolve_line_directives("\n".join(lines), unit_path) + "\n")
+        return header, units
+
+    def generate_modules(self, program: Program, header_name: str, main_source: Optional[str] = None,
+                         c_dir: Optional[str] = None) -> Tuple[str, List[Tuple[str, str]]]:
+        # Своя единица трансляции на каждый исходный модуль: правка одного .cbl меняет только
+        # его Си файл, а заголовок (типы, extern, прототипы) - только при смене интерфейса.
+        # Пул строк уходит в единицы, имена строк не зависят от порядка модулей
+        self.internal_linkage = False
+        self.stable_string_names = True
+        self._collect_tables(program)
+        self._emit_prelude(runtime_stubs=False)
+        self._emit_types(program)
+        self._emit_global_externs(program)
+        self._emit_prototypes(program)
+        guard = re.sub(r'\W', '_', header_name).upper()
+        header = "\n".join([f"#ifndef {guard}", f"#define {guard}"] + self.code_lines + ["#endif", ""])
+
+        self.code_lines = []
+        self._emit_runtime_stubs()
+        self._emit_globals(program)
+        main_head = self.code_lines
+
+        bodies = [f for f in program.functions if not (hasattr(f, 'is_extern') and f.is_extern)]
+        blocks = self._generate_function_blocks(program) if bodies else []
+        groups: Dict[Optional[str], List[List[str]]] = {main_source: []}
+        for func_def, block in zip(bodies, blocks):
+            source = getattr(func_def, 'source_file', None) or main_source
+            groups.setdefault(source, []).append(block)
+
+        self.code_lines = []
+        self._emit_startup()
+        main_tail = self.code_lines
+
+        stem = Path(header_name).stem
+        taken = set()
+        units = []
+        for idx, (source, group) in enumerate(groups.items()):
+            base = f"{stem}__{Path(source).stem if source else 'main'}"
+            unit_name = f"{base}.c"
+            n = 1
+            while unit_name in taken:
+                unit_name = f"{base}_{n}.c"
+                n += 1
+            taken.add(unit_name)
+
+            body = list(main_head) if idx == 0 else []
+            for block in group:
+                body.extend(block)
+            if idx == 0:
+                body.extend(main_tail)
+            used = set(re.findall(r'\b__str_[0-9a-f_]+\b', "\n".join(body)))
+            self.code_lines = []
+            if used:
+                self._emit_string_pool(used)
+            lines = [f'#include "{header_name}"', ""] + self.code_lines + body
+            unit_path = os.path.join(c_dir, unit_name) if c_dir else unit_name
+            units.append((unit_name, self._resolve_line_directives("\n".join(lines), unit_path) + "\n"))
+        self.code_lines = []
+        return header, units
+
+    _LINE_DIRECTIVE_RE = re.compile(r'#line (\d+) "((?:[^"\\]|\\.)*)"$')
+
+    def _resolve_line_directives(self, text: str, c_filename: str) -> str:
+        # Проставляет реальные номера строк в LINE_RESET и собирает карту
+        # строка Си -> строка .cbl по уже расставленным директивам #line
+        if self.LINE_RESET not in text:
+            return text
+        out = []
+        current = None
+        for line in text.split("\n"):
+            c_line = len(out) + 1
+            stripped = line.strip()
+            if stripped == self.LINE_RESET:
+                out.append(f'#line {c_line + 1} "{self._escape_path(c_filename)}"')
+                current = None
+                continue
+            m = self._LINE_DIRECTIVE_RE.match(stripped)
+            if m:
+                current = [m.group(2).replace('\\\\', '\\'), int(m.group(1))]
+                out.append(line)
+                continue
+            if current is not None:
+                if stripped:
+                    self.source_map.append((c_filename, c_line, current[0], current[1]))
+                current[1] += 1
+            out.append(line)
+        return "\n".join(out)
+
+    def _escape_path(self, path: str) -> str:
+        return path.replace('\\', '\\\\').replace('"', '\\"')
+
+    def _emit_line_directive(self, node):
+        line = getattr(node, 'line', None)
+        if self.line_directives and self.source_file and line is not None:
+            self.code_lines.append(f'#line {line} "{self._escape_path(self.source_file)}"')
+
+    def _collect_tables(self, program: Program):
+        for struct_def in program.structs:
+            if isinstance(struct_def, EnumDef):
+                self._collect_enum(struct_def)
+            else:
+                self.struct_definitions[struct_def.name] = struct_def
+        for func_def in program.functions:
+            self.function_declarations[func_def.name] = func_def
+            if not func_def.is_extern:
+                self._current_strings = self.function_strings.setdefault(func_def.name, [])
+                self._collect_strings(func_def.body)
+        self._current_strings = None
+        self._collect_slices(program)
+        self._collect_address_taken(program)
+
+    def _collect_enum(self, enum_def: EnumDef):
+        self.enum_names.add(enum_def.name)
+        next_value = 0
+        for name, val in enum_def.members:
+            if val is not None:
+                key = self._constant_case_key(val)
+                if key is None:
+                    # Значение не известно на этапе компиляции - switch по этому enum невозможен
+                    next_value = None
+                    continue
+                next_value = key
+            if next_value is None:
+                continue
+            self.enum_values[name] = next_value
+            next_value += 1
+
+    def _collect_strings(self, node):
+        # Пул строится до генерации тел в порядке исходника, чтобы имена __str_N
+        # не зависели от того, в каком процессе генерируется функция
+        if isinstance(node, list):
+            for x in node:
+                self._collect_strings(x)
+            return
+        if isinstance(node, Literal):
+            if isinstance(node.value, str):
+                self.string_uses += 1
+                if self._current_strings is not None:
+                    self._current_strings.append(node.value)
+                if node.value not in self.string_constants:
+                    self.string_constants[node.value] = self._string_name(node.value)
+                    self.string_counter += 1
+            return
+        if isinstance(node, Call) and node.func_name == 'print':
+            for a in (node.args or []):
+                if not (isinstance(a, Literal) and isinstance(a.value, str)):
+                    self._collect_strings(a)
+            return
+        if hasattr(node, '__dict__'):
+            for v in vars(node).values():
+                if isinstance(v, (list, tuple)) or hasattr(v, '__dict__'):
+                    self._collect_strings(v)
+
+    def _string_name(self, value: str) -> str:
+        if not self.stable_string_names:
+            return f"__str_{self.string_counter}"
+        # Имя от содержимого: новая строка в одном модуле не сдвигает имена в других
+        base = f"__str_{self._fnv1a(value.encode('utf-8')):08x}"
+        name = base
+        n = 1
+        while name in self.string_names:
+            name = f"{base}_{n}"
+            n += 1
+        self.string_names.add(name)
+        return name
+
+    def _collect_slices(self, node):
+        # Вложенные slice<slice<T>> регистрируются раньше внешних, поэтому
+        # порядок словаря годится для порядка typedef
+        if isinstance(node, GenericType):
+            if node.name == 'slice':
+                self.get_c_type(node)
+                return
+        if isinstance(node, str):
+            if node.startswith('slice<'):
+                self.get_c_type(node)
+            return
+        if isinstance(node, (list, tuple)):
+            for x in node:
+                self._collect_slices(x)
+            return
+        if hasattr(node, '__dict__'):
+            for v in vars(node).values():
+                if isinstance(v, (list, tuple, str)) or hasattr(v, '__dict__'):
+                    self._collect_slices(v)
+
+    def _collect_address_taken(self, node):
+        # Функция, на которую берётся указатель, должна сохранить сигнатуру без const,
+        # иначе указатель станет несовместим с объявленным типом *fn(...)
+        if isinstance(node, (list, tuple)):
+            for x in node:
+                self._collect_address_taken(x)
+            return
+        if isinstance(node, Variable):
+            if node.name in self.function_declarations:
+                self.address_taken.add(node.name)
+            return
+        if hasattr(node, '__dict__'):
+            for v in vars(node).values():
+                if isinstance(v, (list, tuple)) or hasattr(v, '__dict__'):
+                    self._collect_address_taken(v)
+
+    def _slice_c_type(self, elem_c: str) -> str:
+        suffix = re.sub(r'\W', '_', elem_c.replace('struct ', '').replace('*', '_ptr'))
+        name = f"flux_slice_{suffix}"
+        self.slice_types[name] = elem_c
+        return name
+
+    def _emit_string_pool(self, names: Optional[set] = None):
+        if not self.string_constants:
+            return
+        for value, name in self.string_constants.items():
+            if names is not None and name not in names:
+                continue
+            self.emit_line(f'static const flux_string {name} = {{"{self._escape_string(value)}", {self._byte_length(value)}}};')
+        self.emit_line("")
 
-    def generate(self, program: Program) -> str:
+    def _partition_blocks(self, blocks: List[List[str]], n_units: int) -> List[List[List[str]]]:
+        # Непрерывные группы примерно равного объема: порядок функций сохраняется. Функция не
+        # делится, поэтому групп не больше, чем функций; большая функция в конце не должна
+        # съедать оставшиеся группы, так что группа закрывается и тогда, когда иначе
+        # оставшихся функций не хватит на оставшиеся группы
+        sizes = [sum(len(line) for line in b) for b in blocks]
+        total = sum(sizes)
+        n_groups = max(1, min(n_units, len(blocks)))
+        groups: List[List[List[str]]] = [[]]
+        acc = 0
+        for i, (block, size) in enumerate(zip(blocks, sizes)):
+            if groups[-1] and len(groups) < n_groups and (acc >= total * len(groups) / n_groups
+                                                          or len(blocks) - i <= n_groups - len(groups)):
+                groups.append([])
+            groups[-1].append(block)
+            acc += size
+        return groups
+
+    def _emit_prelude(self, runtime_stubs: bool = True):
         if self.link_mode == 'static':
             self.emit_line('#define CBLERR_LINK_STATIC 1')
         elif self.link_mode == 'dynamic':
@@ -112,6 +445,34 @@ class CCodeGenerator:
         self.emit_line("#define true 1")
         self.emit_line("#define false 0")
         self.emit_line("#define NULL ((void*)0)")
+        self.emit_line("#if defined(_MSC_VER)")
+        self.emit_line("#define CBLERR_INLINE __forceinline")
+        self.emit_line("#define CBLERR_NOINLINE __declspec(noinline)")
+        self.emit_line("#define CBLERR_HOT")
+        self.emit_line("#define CBLERR_COLD")
+        self.emit_line("#define CBLERR_PURE")
+        self.emit_line("#define CBLERR_CONST __declspec(noalias)")
+        self.emit_line("#define CBLERR_FLATTEN")
+        self.emit_line("#define CBLERR_FASTMATH")
+        self.emit_line("#define CBLERR_VECTORIZE")
+        self.emit_line("#define CBLERR_ALIGN(n) __declspec(align(n))")
+        self.emit_line("#else")
+        self.emit_line("#define CBLERR_INLINE __attribute__((always_inline))")
+        self.emit_line("#define CBLERR_NOINLINE __attribute__((noinline))")
+        self.emit_line("#define CBLERR_HOT __attribute__((hot))")
+        self.emit_line("#define CBLERR_COLD __attribute__((cold))")
+        self.emit_line("#define CBLERR_PURE __attribute__((pure))")
+        self.emit_line("#define CBLERR_CONST __attribute__((const))")
+        self.emit_line("#define CBLERR_FLATTEN __attribute__((flatten))")
+        self.emit_line("#if defined(__clang__)")
+        self.emit_line("#define CBLERR_FASTMATH")
+        self.emit_line("#define CBLERR_VECTORIZE")
+        self.emit_line("#else")
+        self.emit_line("#define CBLERR_FASTMATH __attribute__((optimize(\"fast-math\")))")
+        self.emit_line("#define CBLERR_VECTORIZE __attribute__((optimize(\"O2\", \"tree-vectorize\")))")
+        self.emit_line("#endif")
+        self.emit_line("#define CBLERR_ALIGN(n) __attribute__((aligned(n)))")
+        self.emit_line("#endif")
         self.emit_line("")
         self.emit_line("typedef struct { const char* data; int64_t length; } flux_string;")
         self.emit_line("extern int memcmp(const void*, const void*, size_t);") 
@@ -120,6 +481,23 @@ class CCodeGenerator:
         self.emit_line("    if (a.length == 0) return true;")
         self.emit_line("    return memcmp(a.data, b.data, (size_t)a.length) == 0;")
         self.emit_line("}") 
+        self.emit_line("static inline int32_t flux_string_cmp(flux_string a, flux_string b) {")
+        self.emit_line("    int64_t n = a.length < b.length ? a.length : b.length;")
+        self.emit_line("    int r = n > 0 ? memcmp(a.data, b.data, (size_t)n) : 0;")
+        self.emit_line("    if (r != 0) return r;")
+        self.emit_line("    return (a.length > b.length) - (a.length < b.length);")
+        self.emit_line("}")
+        self.emit_line("static inline uint32_t flux_string_hash(const char* s, int64_t n) {")
+        self.emit_line("    uint32_t h = 2166136261u;")
+        self.emit_line("    for (int64_t i = 0; i < n; ++i) { h ^= (uint8_t)s[i]; h *= 16777619u; }")
+        self.emit_line("    return h;")
+        self.emit_line("}")
+        self.emit_line("static inline int64_t cblerr_ipow(int64_t base, int64_t exp) {")
+        self.emit_line("    uint64_t result = 1, b = (uint64_t)base;")
+        self.emit_line("    if (exp < 0) return base == 1 ? 1 : (base == -1 ? ((exp & 1) ? -1 : 1) : 0);")
+        self.emit_line("    while (exp) { if (exp & 1) result *= b; exp >>= 1; b *= b; }")
+        self.emit_line("    return (int64_t)result;")
+        self.emit_line("}")
         self.emit_line("")
         
         self.emit_line("#if defined(_WIN32) || defined(__WIN32__)")
@@ -127,8 +505,9 @@ class CCodeGenerator:
         self.emit_line("extern void* __stdcall GetProcAddress(void*, const void*);")
         self.emit_line("extern void* __stdcall GetModuleHandleA(const void*);")
         self.emit_line("extern void __stdcall ExitProcess(uint32_t);")
-        self.emit_line("int _fltused = 0;")       
-        self.emit_line("void __main(void) {}")    
+        if runtime_stubs:
+            self.emit_line("int _fltused = 0;")       
+            self.emit_line("void __main(void) {}")    
         self.emit_line("#endif")
         self.emit_line("")
         
@@ -169,12 +548,24 @@ class CCodeGenerator:
         self.emit_line("#endif")
         self.emit_line("")
 
+    def _emit_runtime_stubs(self):
+        self.emit_line("#if defined(_WIN32) || defined(__WIN32__)")
+        self.emit_line("int _fltused = 0;")
+        self.emit_line("void __main(void) {}")
+        self.emit_line("#endif")
+        self.emit_line("")
+
+    def _emit_types(self, program: Program):
         if program.structs:
             for struct_def in program.structs:
                 if isinstance(struct_def, EnumDef):
                     continue
                 self.emit_line(f"struct {struct_def.name};")
             self.emit_line("")
+        if self.slice_types:
+            for name, elem_c in self.slice_types.items():
+                self.emit_line(f"typedef struct {{ {elem_c}* data; int64_t length; }} {name};")
+            self.emit_line("")
         if program.structs:
             for struct_def in program.structs:
                 if isinstance(struct_def, EnumDef):
@@ -182,11 +573,26 @@ class CCodeGenerator:
                 else:
                     self.generate_struct_def(struct_def)
             self.emit_line("")
+
+    def _emit_globals(self, program: Program):
         if program.global_vars:
+            # Инициализатор глобальной переменной должен быть константным выражением,
+            # поэтому ссылки на пул строк здесь недопустимы
+            self.in_global_init = True
             for global_var in program.global_vars:
                 self.generate_global_var(global_var)
+            self.in_global_init = False
             self.emit_line("")
-            
+
+    def _emit_global_externs(self, program: Program):
+        if program.global_vars:
+            for global_var in program.global_vars:
+                self.emit_line(f"extern {self.get_global_declaration(global_var)};")
+            self.emit_line("")
+
+    def _emit_prototypes(self, program: Program):
+        if self.function_cache is not None:
+            self._lookup_function_cache(program)
         if program.functions:
             skip_std = {'malloc', 'calloc', 'realloc', 'free', 'memset', 'memcpy', 'memmove', 'printf', 'sprintf',
                         'puts', 'putchar', 'scanf', 'exit', 'fopen', 'fgetc', 'feof', 'fclose', 'fputc', 'system',
@@ -200,20 +606,130 @@ class CCodeGenerator:
             for func_def in program.functions:
                 if hasattr(func_def, 'is_extern') and func_def.is_extern:
                     continue
-                sig = self.generate_function_signature(func_def)
+                if func_def.name in self._cached_functions:
+                    sig = self._cached_functions[func_def.name]['sig']
+                else:
+                    sig = self.generate_function_signature(func_def)
+                    self._signatures[func_def.name] = sig
                 self.emit_line(f"{sig};")
             has_forwardes = any(
                 not (hasattr(f, 'is_extern') and f.is_extern) for f in program.functions
             )
             if has_forwardes:
                 self.emit_line("")
-        if program.functions:
-            for func_def in program.functions:
-                if hasattr(func_def, 'is_extern') and func_def.is_extern:
-                    continue
-                self.generate_function_def(func_def)
-                self.emit_line("")
-                
+
+    def _generate_function_blocks(self, program: Program) -> List[List[str]]:
+        bodies = [f for f in program.functions if not (hasattr(f, 'is_extern') and f.is_extern)]
+        if self.function_cache is None:
+            return self._generate_bodies(bodies)
+
+        blocks = [self._cached_functions[f.name]['lines'] if f.name in self._cached_functions else None
+                  for f in bodies]
+        missing = [i for i, block in enumerate(blocks) if block is None]
+        generated = self._generate_bodies([bodies[i] for i in missing])
+        for i, block in zip(missing, generated):
+            blocks[i] = block
+            func_def = bodies[i]
+            sig = self._signatures.get(func_def.name) or self.generate_function_signature(func_def)
+            self.function_cache.put(self._fingerprints[func_def.name], {'sig': sig, 'lines': block})
+        return blocks
+
+    def _lookup_function_cache(self, program: Program):
+        # Вызывается до прототипов: попадание отдает и сигнатуру, и тело, так что
+        # неизменившаяся функция не обходится вовсе
+        self._program_globals = {g.name: g for g in program.global_vars}
+        for func_def in program.functions:
+            if hasattr(func_def, 'is_extern') and func_def.is_extern:
+                continue
+            fingerprint = self._function_fingerprint(func_def)
+            self._fingerprints[func_def.name] = fingerprint
+            entry = self.function_cache.get(fingerprint)
+            if entry is not None:
+                self._cached_functions[func_def.name] = entry
+
+    def _function_fingerprint(self, func_def) -> str:
+        # Отпечаток покрывает тело функции (вместе с позициями для #line), сигнатуры вызываемых
+        # функций, раскладку затронутых структур, глобальные переменные, значения enum и
+        # имена строк пула - всё, от чего зависит её Си текст. Сериализация через pickle
+        # на порядок быстрее обхода дерева на Python
+        import hashlib
+        import pickle
+        data = pickle.dumps(func_def, protocol=4)
+        h = hashlib.sha256()
+        h.update("|".join([_codegen_version(), self.module_name, str(self.link_mode), str(self.is_gui_app),
+                           str(self.internal_linkage), str(self.line_directives), str(self.stable_string_names),
+                           str(func_def.name in self.address_taken)]).encode('utf-8'))
+        h.update(data)
+        for name in sorted(self._dependency_closure(data, func_def.name)):
+            h.update(b"@" + name.encode('utf-8') + b"=" + self._dependency_digest(name))
+        strings = self.function_strings.get(func_def.name, ())
+        h.update("|".join(self.string_constants[v] for v in strings).encode('utf-8'))
+        return h.hexdigest()
+
+    def _symbol_names(self, data: bytes) -> set:
+        # Идентификаторы берутся из строк внутри pickle (SHORT_BINUNICODE: 0x8c, длина, utf-8)
+        # и фильтруются по известным символам; ложные совпадения лишь расширяют зависимости
+        found = set()
+        words_memo = self._words_memo
+        pos = data.find(b'\x8c')
+        while pos != -1:
+            raw = data[pos + 2:pos + 2 + data[pos + 1]] if pos + 1 < len(data) else b''
+            words = words_memo.get(raw)
+            if words is None:
+                words = tuple(w for w in re.findall(r'\w+', raw.decode('utf-8', 'ignore')) if w in self._symbols)
+                words_memo[raw] = words
+            found.update(words)
+            pos = data.find(b'\x8c', pos + 1)
+        return found
+
+    def _dependency_closure(self, data: bytes, own_name: str) -> set:
+        if self._symbols is None:
+            self._symbols = (set(self.function_declarations) | set(self.struct_definitions) | set(self._program_globals)
+                             | set(self.enum_values) | self.enum_names | set(self.slice_types))
+        seen = set()
+        work = list(self._symbol_names(data) - {own_name})
+        while work:
+            name = work.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            self._dependency_digest(name)
+            work.extend(n for n in self._dependency_memo[name][1] if n not in seen and n != own_name)
+        return seen
+
+    def _dependency_digest(self, name: str) -> bytes:
+        memo = self._dependency_memo.get(name)
+        if memo is None:
+            import hashlib
+            import pickle
+            if name in self.function_declarations:
+                f = self.function_declarations[name]
+                # Для вызывающих важна только сигнатура, тело вызываемой функции не учитывается
+                dep = (f.params, f.return_type, f.is_extern, f.decorators, f.is_vararg, name in self.address_taken)
+                names = self._symbol_names(pickle.dumps((f.params, f.return_type), protocol=4))
+            else:
+                dep = (self.struct_definitions.get(name), self._program_globals.get(name), self.enum_values.get(name),
+                       name in self.enum_names, self.slice_types.get(name))
+                names = set()
+                if name in self.struct_definitions or name in self._program_globals:
+                    names = self._symbol_names(pickle.dumps(dep, protocol=4))
+            memo = (hashlib.sha256(pickle.dumps(dep, protocol=4)).digest(), names)
+            self._dependency_memo[name] = memo
+        return memo[0]
+
+    def _generate_bodies(self, bodies: List[FunctionDef]) -> List[List[str]]:
+        if self.jobs > 1 and len(bodies) > 1:
+            return self._generate_function_defs_parallel(bodies)
+        blocks = []
+        for func_def in bodies:
+            start = len(self.code_lines)
+            self.generate_function_def(func_def)
+            self.emit_line("")
+            blocks.append(self.code_lines[start:])
+            del self.code_lines[start:]
+        return blocks
+
+    def _emit_startup(self):
         self.emit_line("")
         self.emit_line("void CblerrInitGlobals(void) {")
         for name, val_code in self.dynamic_globals:
@@ -226,8 +742,38 @@ class CCodeGenerator:
         else:
             self.emit_line("void CblerrStartup(void) { CblerrInitGlobals(); main(); ExitProcess(0); }")
         self.emit_line("#endif")
-        
-        return "\n".join(self.code_lines)
+
+    def _worker_state(self) -> dict:
+        return {
+            'module_name': self.module_name,
+            'link_mode': self.link_mode,
+            'is_gui_app': self.is_gui_app,
+            'struct_definitions': self.struct_definitions,
+            'function_declarations': self.function_declarations,
+            'global_vars': self.global_vars,
+            'string_constants': self.string_constants,
+            'enum_names': self.enum_names,
+            'enum_values': self.enum_values,
+            'slice_types': self.slice_types,
+            'address_taken': self.address_taken,
+            'internal_linkage': self.internal_linkage,
+            'line_directives': self.line_directives,
+        }
+
+    def _generate_function_defs_parallel(self, func_defs: List[FunctionDef]) -> List[List[str]]:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Несколько чанков на воркер: тела функций сильно отличаются по размеру
+        n_chunks = min(len(func_defs), self.jobs * 4)
+        size = -(-len(func_defs) // n_chunks)
+        chunks = [func_defs[i:i + size] for i in range(0, len(func_defs), size)]
+        state = self._worker_state()
+
+        blocks: List[List[str]] = []
+        with ProcessPoolExecutor(max_workers=min(self.jobs, len(chunks))) as pool:
+            for chunk_blocks in pool.map(_generate_function_chunk, [(state, c) for c in chunks]):
+                blocks.extend(chunk_blocks)
+        return blocks
 
     def emit_line(self, line: str = ""):
         if line:
@@ -239,6 +785,16 @@ class CCodeGenerator:
         for line in lines:
             self.emit_line(line)
 
+    def _byte_length(self, s: str) -> int:
+        return len(s.encode('utf-8'))
+
+    def _fnv1a(self, data: bytes) -> int:
+        h = 2166136261
+        for b in data:
+            h ^= b
+            h = (h * 16777619) & 0xFFFFFFFF
+        return h
+
     def _escape_string(self, s: str) -> str:
         s = s.replace('\\', '\\\\')
         s = s.replace('"', '\\"')
@@ -248,7 +804,13 @@ class CCodeGenerator:
         return s
 
     def generate_struct_def(self, struct_def):
-        self.emit_line(f"struct {struct_def.name} {{")
+        packed = self._decorator(struct_def, 'packed') is not None
+        align = self._decorator(struct_def, 'align')
+        if packed:
+            # pragma pack одинаково понимают GCC, Clang и MSVC
+            self.emit_line("#pragma pack(push, 1)")
+        align_code = f"CBLERR_ALIGN({align.args[0]}) " if align is not None else ""
+        self.emit_line(f"struct {align_code}{struct_def.name} {{")
         self.indent_level += 1
         if isinstance(struct_def.fields, dict):
             fields_items = struct_def.fields.items()
@@ -267,6 +829,8 @@ class CCodeGenerator:
                 self.emit_line(f"{c_type} {field_name};")
         self.indent_level -= 1
         self.emit_line("};")
+        if packed:
+            self.emit_line("#pragma pack(pop)")
 
     def generate_global_var(self, global_var):
         if isinstance(global_var.var_type, str) and global_var.var_type.startswith('*fn('):
@@ -290,6 +854,9 @@ class CCodeGenerator:
             c_type = f"{inner_c}[]"
             
         self.global_vars[global_var.name] = global_var
+        align = self._decorator(global_var, 'align')
+        if align is not None:
+            c_type = f"CBLERR_ALIGN({align.args[0]}) {c_type}"
         
         if hasattr(global_var, 'value') and global_var.value:
             value_code = self.generate_expression(global_var.value)
@@ -313,8 +880,20 @@ class CCodeGenerator:
             else:
                 self.emit_line(f"{c_type} {global_var.name};")
 
+    def get_global_declaration(self, global_var) -> str:
+        if isinstance(global_var.var_type, str) and global_var.var_type.startswith('*fn('):
+            return self.get_c_declaration(global_var.var_type, global_var.name)
+        c_type = self.get_c_type(global_var.var_type)
+        if getattr(global_var.var_type, 'name', None) == 'array':
+            inner = global_var.var_type.args[0] if getattr(global_var.var_type, 'args', None) else 'int'
+            return f"{self.get_c_type(inner)} {global_var.name}[]"
+        return f"{c_type} {global_var.name}"
+
     def generate_function_signature(self, func_def) -> str:
         return_type = self.get_c_type(func_def.return_type)
+        is_extern = bool(getattr(func_def, 'is_extern', False))
+        const_params = set() if is_extern else self._const_pointer_params(func_def)
+        restrict_params = set() if is_extern else self._restrict_params(func_def)
         params = []
         if func_def.params:
             for param_tuple in func_def.params:
@@ -324,9 +903,20 @@ class CCodeGenerator:
                         params.append(self.get_c_declaration(param_type, param_name))
                     else:
                         param_c_type = self.get_c_type(param_type)
+                        if param_name in const_params:
+                            param_c_type = f"const {param_c_type}"
+                        if param_name in restrict_params and param_c_type.endswith('*'):
+                            param_c_type = f"{param_c_type} __restrict"
                         params.append(f"{param_c_type} {param_name}")
         params_str = ", ".join(params) if params else "void"
+        attributes = self._function_attributes(func_def)
+        if attributes:
+            return_type = f"{' '.join(attributes)} {return_type}"
+        if not is_extern and self._has_internal_linkage(func_def):
+            inline = "inline " if self._decorator(func_def, 'inline') is not None else ""
+            return_type = f"static {inline}{return_type}"
         
+        import platform
         if platform.system() == 'Windows':
             cdecl_funcs = {'malloc', 'calloc', 'realloc', 'free', 'memset', 'memcpy', 'memmove', 
                            'printf', 'sprintf', 'puts', 'putchar', 'scanf', 'exit', 'fopen', 
@@ -341,15 +931,185 @@ class CCodeGenerator:
                 
         return f"{return_type} {func_def.name}({params_str})"
 
+    def _decorator(self, node, name: str):
+        for dec in (getattr(node, 'decorators', None) or []):
+            if dec.name == name:
+                return dec
+        return None
+
+    FUNCTION_ATTRIBUTES = {
+        'inline': 'CBLERR_INLINE', 'noinline': 'CBLERR_NOINLINE', 'hot': 'CBLERR_HOT', 'cold': 'CBLERR_COLD',
+        'pure': 'CBLERR_PURE', 'const': 'CBLERR_CONST', 'flatten': 'CBLERR_FLATTEN', 'fastmath': 'CBLERR_FASTMATH',
+    }
+
+    def _function_attributes(self, func_def) -> List[str]:
+        attributes = [self.FUNCTION_ATTRIBUTES[dec.name] for dec in (func_def.decorators or [])
+                      if dec.name in self.FUNCTION_ATTRIBUTES]
+        # У GCC нет прагмы, включающей векторизацию одного цикла, а под -Os векторизатор
+        # не версионирует циклы по алиасингу, поэтому @vectorize поднимается до
+        # optimize("O2", "tree-vectorize") на всю функцию
+        if not getattr(func_def, 'is_extern', False) and self._has_loop_decorator(func_def.body, 'vectorize'):
+            attributes.append('CBLERR_VECTORIZE')
+        return attributes
+
+    def _has_loop_decorator(self, node, name: str) -> bool:
+        if isinstance(node, (list, tuple)):
+            return any(self._has_loop_decorator(x, name) for x in node)
+        if isinstance(node, (ForLoop, WhileLoop)) and self._decorator(node, name) is not None:
+            return True
+        if hasattr(node, '__dict__'):
+            return any(self._has_loop_decorator(v, name) for v in vars(node).values()
+                       if isinstance(v, (list, tuple)) or hasattr(v, '__dict__'))
+        return False
+
+    def _loop_pragma_lines(self, loop) -> List[str]:
+        clang, gcc, common = [], [], []
+        for dec in (getattr(loop, 'decorators', None) or []):
+            if dec.name == 'unroll':
+                count = int(dec.args[0])
+                clang.append(f"unroll_count({count})" if count > 1 else "unroll(disable)")
+                gcc.append(f"#pragma GCC unroll {count}")
+            elif dec.name == 'ivdep':
+                clang.append("vectorize(assume_safety)")
+                gcc.append("#pragma GCC ivdep")
+            elif dec.name == 'vectorize':
+                clang.append("vectorize(enable)")
+            elif dec.name == 'simd':
+                common.append(OMP_SIMD_PRAGMA)
+        lines = []
+        if clang or gcc:
+            lines.append("#if defined(__clang__)")
+            if clang:
+                lines.append(f"#pragma clang loop {' '.join(clang)}")
+            if gcc:
+                lines.append("#elif defined(__GNUC__)")
+                lines.extend(gcc)
+            lines.append("#endif")
+        return lines + common
+
+    def _emit_loop_pragmas(self):
+        # Прагма должна стоять непосредственно перед заголовком for/while
+        for line in self.loop_pragmas:
+            self.emit_line(line)
+        self.loop_pragmas = []
+
+    def _has_internal_linkage(self, func_def) -> bool:
+        if not self.internal_linkage or func_def.name in self.EXPORTED_FUNCTIONS:
+            return False
+        return self._decorator(func_def, 'export') is None
+
+    def _pointer_params(self, func_def) -> List[str]:
+        names = []
+        for param_tuple in (func_def.params or []):
+            if not (isinstance(param_tuple, tuple) and len(param_tuple) >= 2):
+                continue
+            pname, ptype = param_tuple[0], param_tuple[1]
+            if isinstance(ptype, str) and ptype.startswith('*fn('):
+                continue
+            c_type = self.get_c_type(ptype)
+            # Только одноуровневые указатели: для T** const пришлось бы ставить между звёздочками
+            if c_type.endswith('*') and not c_type[:-1].rstrip().endswith('*'):
+                names.append(pname)
+        return names
+
+    def _restrict_params(self, func_def) -> set:
+        dec = self._decorator(func_def, 'restrict')
+        if dec is None:
+            return set()
+        pointers = set(self._pointer_params(func_def))
+        if not dec.args:
+            return pointers
+        for name in dec.args:
+            if name not in pointers:
+                raise SyntaxError(f"@restrict({name}): '{name}' не является указателем-параметром функции {func_def.name}")
+        return set(dec.args)
+
+    def _const_pointer_params(self, func_def) -> set:
+        # const ставится только там, где это доказуемо: указатель используется лишь для
+        # чтения через p[i], *p, p.field и в сравнениях. Любая другая утечка (аргумент
+        # вызова, присваивание, арифметика, &p, asm) считается потенциальной записью.
+        if func_def.name in self.address_taken or func_def.name in self.EXPORTED_FUNCTIONS:
+            return set()
+        candidates = set(self._pointer_params(func_def))
+        if not candidates:
+            return set()
+        written = set()
+
+        def visit(node, as_base=False):
+            if isinstance(node, (list, tuple)):
+                for x in node:
+                    visit(x)
+                return
+            if isinstance(node, Variable):
+                if node.name in candidates and not as_base:
+                    written.add(node.name)
+                return
+            if isinstance(node, InlineAsm):
+                written.update(candidates)
+                return
+            if isinstance(node, Assign):
+                if isinstance(node.target, str):
+                    if getattr(node, 'var_type', None) and node.target in candidates:
+                        written.add(node.target)
+                else:
+                    visit_lvalue(node.target)
+                visit(node.value)
+                return
+            if isinstance(node, ArrayAccess):
+                visit(node.arr, as_base=True)
+                visit(node.index)
+                return
+            if isinstance(node, FieldAccess):
+                visit(node.obj, as_base=True)
+                return
+            if isinstance(node, Dereference):
+                visit(node.ptr, as_base=True)
+                return
+            if isinstance(node, Compare):
+                visit(node.left, as_base=True)
+                visit(node.right, as_base=True)
+                return
+            if isinstance(node, AddressOf):
+                # &p[i], &p.f дают неконстантный указатель внутрь *p
+                visit_lvalue(node.expr)
+                return
+            if hasattr(node, '__dict__'):
+                for v in vars(node).values():
+                    if isinstance(v, (list, tuple)) or hasattr(v, '__dict__'):
+                        visit(v)
+
+        def visit_lvalue(node):
+            if isinstance(node, Variable):
+                if node.name in candidates:
+                    written.add(node.name)
+                return
+            if isinstance(node, ArrayAccess):
+                visit_lvalue(node.arr)
+                visit(node.index)
+                return
+            if isinstance(node, FieldAccess):
+                visit_lvalue(node.obj)
+                return
+            if isinstance(node, Dereference):
+                visit_lvalue(node.ptr)
+                return
+            visit(node)
+
+        visit(func_def.body)
+        return candidates - written
+
     def generate_function_def(self, func_def):
         sig = self.generate_function_signature(func_def)
         if hasattr(func_def, 'is_extern') and func_def.is_extern:
             self.emit_line(f"{sig};")
             return
         
+        self.source_file = getattr(func_def, 'source_file', None)
+        self._emit_line_directive(func_def)
         self.emit_line(f"{sig} {{")
         self.indent_level += 1
         self.current_function = func_def.name
+        self.label_counter = 0
         self.local_vars_stack.append({})
 
         if func_def.params:
@@ -380,8 +1140,23 @@ class CCodeGenerator:
         self.emit_line("}")
         if self.local_vars_stack:
             self.local_vars_stack.pop()
+        if self.line_directives and self.source_file:
+            self.code_lines.append(self.LINE_RESET)
+        self.source_file = None
 
     def generate_statement(self, stmt):
+        self._emit_line_directive(stmt)
+        try:
+            self._generate_statement(stmt)
+        except SyntaxError as e:
+            # Ошибка генерации получает позицию самого внутреннего оператора
+            if getattr(e, 'lineno', None) is None and getattr(stmt, 'line', None) is not None:
+                e.lineno = stmt.line
+                e.offset = getattr(stmt, 'column', 0) + 1
+                e.filename = self.source_file
+            raise
+
+    def _generate_statement(self, stmt):
         if isinstance(stmt, Return):
             self.generate_return(stmt)
         elif isinstance(stmt, Assign):
@@ -399,7 +1174,7 @@ class CCodeGenerator:
         elif isinstance(stmt, InlineAsm):
             self.emit_line(f'__asm__("{self._escape_string(stmt.code)}");')
         elif isinstance(stmt, BreakStmt):
-            self.emit_line("break;")
+            self.emit_line(self._break_code())
         elif isinstance(stmt, ContinueStmt):
             self.emit_line("continue;")
         elif isinstance(stmt, Call):
@@ -429,6 +1204,9 @@ class CCodeGenerator:
                         self.local_vars_stack[-1][target] = decl
                 else:
                     c_type = self.get_c_type(assign_stmt.var_type)
+                    if self._is_aggregate_c_type(c_type) and isinstance(assign_stmt.value, Literal) and assign_stmt.value.value == 0:
+                        # Объявление без значения: агрегат обнуляется, а не инициализируется скаляром
+                        value = "{0}"
                     self.emit_line(f"{c_type} {target} = {value};")
                     if self.local_vars_stack:
                         self.local_vars_stack[-1][target] = c_type
@@ -439,6 +1217,9 @@ class CCodeGenerator:
             value = self.generate_expression(assign_stmt.value)
             self.emit_line(f"{target} = {value};")
 
+    def _is_aggregate_c_type(self, c_type: str) -> bool:
+        return c_type in self.slice_types or c_type == 'flux_string' or (c_type.startswith('struct ') and not c_type.endswith('*'))
+
     def generate_if(self, if_stmt):
         condition = self.generate_expression(if_stmt.condition)
         self.emit_line(f"if ({condition}) {{")
@@ -458,14 +1239,24 @@ class CCodeGenerator:
 
     def generate_while(self, while_stmt):
         condition = self.generate_expression(while_stmt.condition)
+        self.loop_pragmas = self._loop_pragma_lines(while_stmt)
+        self._emit_loop_pragmas()
         self.emit_line(f"while ({condition}) {{")
+        self._push_loop()
         self.indent_level += 1
         for stmt in while_stmt.body:
             self.generate_statement(stmt)
         self.indent_level -= 1
         self.emit_line("}")
+        self._pop_loop()
 
     def generate_for(self, for_stmt: ForLoop):
+        self.loop_pragmas = self._loop_pragma_lines(for_stmt)
+        self._push_loop()
+        self._generate_for_loop(for_stmt)
+        self._pop_loop()
+
+    def _generate_for_loop(self, for_stmt: ForLoop):
         if for_stmt.init or for_stmt.condition or for_stmt.post:
             init_code = ""
             if for_stmt.init:
@@ -480,6 +1271,7 @@ class CCodeGenerator:
                     init_code = self.generate_expression(for_stmt.init)
             cond_code = self.generate_expression(for_stmt.condition) if for_stmt.condition else "1"
             post_code = self.generate_expression(for_stmt.post) if for_stmt.post else ""
+            self._emit_loop_pragmas()
             self.emit_line(f"for ({init_code}; {cond_code}; {post_code}) {{")
             self.indent_level += 1
             for stmt in for_stmt.body:
@@ -490,44 +1282,174 @@ class CCodeGenerator:
 
         if for_stmt.iter_var and for_stmt.iter_expr:
             ie = for_stmt.iter_expr
-            if isinstance(ie, Call) and isinstance(ie.func_name, str) and ie.func_name == 'range' and len(ie.args) >= 2:
-                start = self.generate_expression(ie.args[0])
-                end = self.generate_expression(ie.args[1])
-                self.emit_line(f"for (int {for_stmt.iter_var} = {start}; {for_stmt.iter_var} < {end}; ++{for_stmt.iter_var}) {{")
-                self.indent_level += 1
-                for stmt in for_stmt.body:
-                    self.generate_statement(stmt)
-                self.indent_level -= 1
-                self.emit_line("}")
+            if isinstance(ie, Call) and isinstance(ie.func_name, str) and ie.func_name == 'range' and 1 <= len(ie.args) <= 3:
+                self._generate_range_for(for_stmt, list(ie.args))
                 return
 
-            iter_resolved = getattr(ie, 'resolved_type', None)
-            if isinstance(ie, Variable) and iter_resolved and isinstance(iter_resolved, str) and iter_resolved.startswith('array<'):
-                inner = iter_resolved[len('array<'):-1]
-                elem_c = self.get_c_type(inner)
+            iter_c = self.infer_c_type(ie)
+            if iter_c in self.slice_types or iter_c == 'flux_string':
+                elem_c = self.slice_types.get(iter_c, 'uint8_t')
+                self._generate_for_span(for_stmt, elem_c, f"{{seq}}.data", f"{{seq}}.length", iter_c)
+                return
+
+            if self._is_fixed_array(ie):
+                elem_c = iter_c[:-1].rstrip() if iter_c and iter_c.endswith('*') else self.get_c_type('int')
                 arr_name = self.generate_expression(ie)
-                idx_name = f"__idx_{for_stmt.iter_var}"
-                len_expr = f"(sizeof({arr_name})/sizeof({arr_name}[0]))"
-                self.emit_line(f"for (int {idx_name} = 0; {idx_name} < {len_expr}; ++{idx_name}) {{")
-                self.indent_level += 1
-                self.emit_line(f"{elem_c} {for_stmt.iter_var} = {arr_name}[{idx_name}];")
-                for stmt in for_stmt.body:
-                    self.generate_statement(stmt)
-                self.indent_level -= 1
-                self.emit_line("}")
+                self._generate_for_span(for_stmt, elem_c, arr_name, f"(int64_t)(sizeof({arr_name})/sizeof({arr_name}[0]))")
+                return
+
+            raise SyntaxError(f"Невозможно итерировать '{self.generate_expression(ie)}' ({iter_c or 'неизвестный тип'}): "
+                              f"длина неизвестна, используйте range(), str, slice<T> или массив")
+
+    # Постоянный цикл с таким числом итераций разворачивается полностью
+    FULL_UNROLL_MAX_TRIPS = 4
+
+    def _generate_range_for(self, for_stmt: ForLoop, args: list):
+        if len(args) == 1:
+            args = [Literal(0, 'int')] + args
+        start, end = args[0], args[1]
+        step = args[2] if len(args) > 2 else Literal(1, 'int')
+        start_k, end_k, step_k = (self._constant_case_key(a) for a in (start, end, step))
+        var = for_stmt.iter_var
+        idx_c = self._range_index_type([start, end, step])
+
+        if (start_k is not None and end_k is not None and step_k and not for_stmt.decorators
+                and not self._contains_loop_jump(for_stmt.body)):
+            # range() не материализуется: границы могут быть сколь угодно большими
+            trips = range(start_k, end_k, step_k)
+            if len(trips) <= self.FULL_UNROLL_MAX_TRIPS:
+                for value in trips:
+                    self.emit_line("{")
+                    self.indent_level += 1
+                    self.emit_line(f"{idx_c} {var} = {value};")
+                    self._generate_loop_body(for_stmt, {var: idx_c})
+                    self.indent_level -= 1
+                    self.emit_line("}")
                 return
 
+        # Границы вычисляются один раз, как у range(); константы подставляются как есть
+        label = self._new_label('__range')
+        hoisted = []
+        start_code = self.generate_expression(start)
+        end_code = str(end_k) if end_k is not None else f"{label}_end"
+        if end_k is None:
+            hoisted.append(f"const {idx_c} {label}_end = {self.generate_expression(end)};")
+        step_code = str(step_k) if step_k is not None else f"{label}_step"
+        if step_k is None:
+            hoisted.append(f"const {idx_c} {label}_step = {self.generate_expression(step)};")
+        if hoisted:
             self.emit_line("{")
             self.indent_level += 1
-            self.emit_line("TODO: implement generic iteration")
-            for stmt in for_stmt.body:
-                self.generate_statement(stmt)
+            for line in hoisted:
+                self.emit_line(line)
+        if step_k is None and not idx_c.startswith(('uint', 'size')):
+            # Знак шага известен только во время выполнения
+            cond = f"({step_code} > 0 ? {var} < {end_code} : {var} > {end_code})"
+        else:
+            cond = f"{var} {'>' if step_k is not None and step_k < 0 else '<'} {end_code}"
+        post = f"++{var}" if step_k == 1 else f"{var} += {step_code}"
+        self._emit_loop_pragmas()
+        self.emit_line(f"for ({idx_c} {var} = {start_code}; {cond}; {post}) {{")
+        self.indent_level += 1
+        self._generate_loop_body(for_stmt, {var: idx_c})
+        self.indent_level -= 1
+        self.emit_line("}")
+        if hoisted:
             self.indent_level -= 1
             self.emit_line("}")
 
+    def _range_index_type(self, bounds: list) -> str:
+        # Ширина индекса берётся из типов границ, чтобы не было расширения знака
+        # на каждой итерации при индексации 64-битными указателями
+        consts, types = [], []
+        for b in bounds:
+            k = self._constant_case_key(b)
+            if k is not None:
+                consts.append(k)
+            else:
+                types.append(self.infer_c_type(b))
+        unsigned = bool(types) and all(t in ('uint32_t', 'uint64_t', 'size_t') for t in types) and all(k >= 0 for k in consts)
+        if any(t in ('int64_t', 'uint64_t', 'size_t') for t in types) or any(not -2**31 <= k < 2**31 for k in consts):
+            if unsigned:
+                return 'size_t' if 'size_t' in types else 'uint64_t'
+            return 'int64_t'
+        return 'uint32_t' if unsigned else 'int32_t'
+
+    def _contains_loop_jump(self, node) -> bool:
+        # break/continue вложенных циклов относятся к ним и развёртке не мешают
+        if isinstance(node, (BreakStmt, ContinueStmt)):
+            return True
+        if isinstance(node, (ForLoop, WhileLoop)):
+            return False
+        if isinstance(node, (list, tuple)):
+            return any(self._contains_loop_jump(x) for x in node)
+        if hasattr(node, '__dict__'):
+            return any(self._contains_loop_jump(v) for v in vars(node).values()
+                       if isinstance(v, (list, tuple)) or hasattr(v, '__dict__'))
+        return False
+
+    def _generate_loop_body(self, for_stmt: ForLoop, scope: dict):
+        self.local_vars_stack.append(scope)
+        for stmt in for_stmt.body:
+            self.generate_statement(stmt)
+        self.local_vars_stack.pop()
+
+    def _generate_for_span(self, for_stmt: ForLoop, elem_c: str, data_code: str, len_code: str,
+                           seq_c: Optional[str] = None):
+        # Указатель и длина вычисляются один раз до цикла, тело индексирует локальный указатель
+        label = self._new_label('__it')
+        self.emit_line("{")
+        self.indent_level += 1
+        if seq_c is not None:
+            self.emit_line(f"{seq_c} {label}_seq = {self.generate_expression(for_stmt.iter_expr)};")
+            data_code = data_code.format(seq=f"{label}_seq")
+            len_code = len_code.format(seq=f"{label}_seq")
+        ptr_c = 'const uint8_t' if seq_c == 'flux_string' else elem_c
+        cast = '(const uint8_t*)' if seq_c == 'flux_string' else ''
+        self.emit_line(f"{ptr_c}* {label}_ptr = {cast}{data_code};")
+        self.emit_line(f"int64_t {label}_len = {len_code};")
+        self._emit_loop_pragmas()
+        self.emit_line(f"for (int64_t {label}_i = 0; {label}_i < {label}_len; ++{label}_i) {{")
+        self.indent_level += 1
+        self.emit_line(f"{elem_c} {for_stmt.iter_var} = {label}_ptr[{label}_i];")
+        self._generate_loop_body(for_stmt, {for_stmt.iter_var: elem_c})
+        self.indent_level -= 1
+        self.emit_line("}")
+        self.indent_level -= 1
+        self.emit_line("}")
+
+    def _is_fixed_array(self, expr) -> bool:
+        # Только глобальные array<T> являются настоящими массивами Си, для которых sizeof даёт длину
+        if not isinstance(expr, Variable):
+            return False
+        for scope in self.local_vars_stack:
+            if expr.name in scope:
+                return False
+        gv = self.global_vars.get(expr.name)
+        return gv is not None and getattr(gv.var_type, 'name', None) == 'array'
+
     def generate_match(self, match_stmt: MatchStmt):
+        case_keys = self._switch_case_keys(match_stmt)
+        if case_keys is not None:
+            self._generate_match_switch(match_stmt)
+            return
+        if self._is_string_match(match_stmt):
+            self._generate_match_string(match_stmt)
+            return
+
         expr_code = self.generate_expression(match_stmt.expr)
-        expr_type = getattr(match_stmt.expr, 'resolved_type', None)
+        expr_type = 'str' if self.infer_c_type(match_stmt.expr) == 'flux_string' else getattr(match_stmt.expr, 'resolved_type', None)
+        scoped = False
+        if not self._is_pure_expr(match_stmt.expr) and any(c.values and len(c.values) > 0 for c in match_stmt.cases):
+            # Выражение с побочными эффектами вычисляется ровно один раз
+            c_type = self.infer_c_type(match_stmt.expr)
+            if c_type and c_type != 'void':
+                tmp = self._new_label('__match')
+                self.emit_line("{")
+                self.indent_level += 1
+                self.emit_line(f"{c_type} {tmp} = {expr_code};")
+                expr_code = tmp
+                scoped = True
         first = True
         for case in match_stmt.cases:
             if case.values is None:
@@ -546,8 +1468,8 @@ class CCodeGenerator:
             conds = []
             for v in case.values:
                 vcode = self.generate_expression(v)
-                if expr_type == 'str' or getattr(v, 'resolved_type', None) == 'str':
-                    conds.append(f"(strcmp({expr_code}.data, {vcode}.data) == 0)")
+                if expr_type == 'str' or getattr(v, 'resolved_type', None) == 'str' or self.infer_c_type(v) == 'flux_string':
+                    conds.append(f"flux_string_eq({expr_code}, {vcode})")
                 else:
                     conds.append(f"({expr_code} == {vcode})")
             cond_code = " || ".join(conds)
@@ -561,6 +1483,156 @@ class CCodeGenerator:
             self.indent_level -= 1
             self.emit_line("}")
             first = False
+        if scoped:
+            self.indent_level -= 1
+            self.emit_line("}")
+
+    def _is_string_match(self, match_stmt: MatchStmt) -> bool:
+        seen = set()
+        for case in match_stmt.cases:
+            for v in (case.values or []):
+                if not (isinstance(v, Literal) and isinstance(v.value, str)) or v.value in seen:
+                    return False
+                seen.add(v.value)
+        return bool(seen)
+
+    def _generate_match_string(self, match_stmt: MatchStmt):
+        # Длина -> хеш FNV-1a (если кандидатов несколько) -> один memcmp,
+        # затем switch по номеру найденного варианта
+        subject = self._new_label('__match')
+        index = f"{subject}_case"
+        buckets: Dict[int, List[Tuple[bytes, int]]] = {}
+        for case_idx, case in enumerate(match_stmt.cases):
+            for v in (case.values or []):
+                data = v.value.encode('utf-8')
+                buckets.setdefault(len(data), []).append((data, case_idx))
+
+        self.emit_line("{")
+        self.indent_level += 1
+        self.emit_line(f"flux_string {subject} = {self.generate_expression(match_stmt.expr)};")
+        self.emit_line(f"int32_t {index} = -1;")
+        self.emit_line(f"switch ({subject}.length) {{")
+        for length in sorted(buckets):
+            candidates = buckets[length]
+            self.emit_line(f"case {length}:")
+            self.indent_level += 1
+            if length == 0:
+                self.emit_line(f"{index} = {candidates[0][1]};")
+            elif len(candidates) == 1:
+                data, case_idx = candidates[0]
+                self.emit_line(f"if ({self._memcmp_code(subject, data)}) {index} = {case_idx};")
+            else:
+                by_hash: Dict[int, List[Tuple[bytes, int]]] = {}
+                for data, case_idx in candidates:
+                    by_hash.setdefault(self._fnv1a(data), []).append((data, case_idx))
+                self.emit_line(f"switch (flux_string_hash({subject}.data, {length})) {{")
+                for h in sorted(by_hash):
+                    checks = [f"if ({self._memcmp_code(subject, data)}) {index} = {case_idx};" for data, case_idx in by_hash[h]]
+                    self.emit_line(f"case 0x{h:08x}u: {' else '.join(checks)} break;")
+                self.emit_line("}")
+            self.emit_line("break;")
+            self.indent_level -= 1
+        self.emit_line("}")
+
+        self.emit_line(f"switch ({index}) {{")
+        self.break_stack.append({'kind': 'switch'})
+        for case_idx, case in enumerate(match_stmt.cases):
+            if case.values is None:
+                self.emit_line("default: {")
+            else:
+                self.emit_line(f"case {case_idx}: {{")
+            self.indent_level += 1
+            for stmt in case.body:
+                self.generate_statement(stmt)
+            self.emit_line("break;")
+            self.indent_level -= 1
+            self.emit_line("}")
+        self.break_stack.pop()
+        self.emit_line("}")
+        self.indent_level -= 1
+        self.emit_line("}")
+
+    def _memcmp_code(self, subject: str, data: bytes) -> str:
+        literal = self._escape_string(data.decode('utf-8'))
+        return f'memcmp({subject}.data, "{literal}", {len(data)}) == 0'
+
+    def _is_pure_expr(self, expr) -> bool:
+        if isinstance(expr, (Literal, Variable)):
+            return True
+        if isinstance(expr, FieldAccess):
+            return self._is_pure_expr(expr.obj)
+        if isinstance(expr, CastExpr):
+            return self._is_pure_expr(expr.expr)
+        return False
+
+    def _new_label(self, prefix: str) -> str:
+        name = f"{prefix}_{self.label_counter}"
+        self.label_counter += 1
+        return name
+
+    def _constant_case_key(self, value):
+        if isinstance(value, CastExpr):
+            value = value.expr
+        if isinstance(value, Literal) and isinstance(value.value, int) and not isinstance(value.value, bool):
+            return value.value
+        if isinstance(value, Variable) and value.name in self.enum_values:
+            return self.enum_values[value.name]
+        return None
+
+    def _switch_case_keys(self, match_stmt: MatchStmt) -> Optional[List[int]]:
+        expr_t = self.infer_c_type(match_stmt.expr)
+        if expr_t not in self.INT_C_TYPES and expr_t not in self.enum_names:
+            return None
+        keys: List[int] = []
+        for case in match_stmt.cases:
+            for v in (case.values or []):
+                key = self._constant_case_key(v)
+                if key is None or key in keys:
+                    return None
+                keys.append(key)
+        if not keys:
+            return None
+        return keys
+
+    def _generate_match_switch(self, match_stmt: MatchStmt):
+        expr_code = self.generate_expression(match_stmt.expr)
+        self.emit_line(f"switch ({expr_code}) {{")
+        self.break_stack.append({'kind': 'switch'})
+        for case in match_stmt.cases:
+            if case.values is None:
+                self.emit_line("default: {")
+            else:
+                labels = [f"case {self.generate_expression(v)}:" for v in case.values]
+                for label in labels[:-1]:
+                    self.emit_line(label)
+                self.emit_line(f"{labels[-1]} {{")
+            self.indent_level += 1
+            for stmt in case.body:
+                self.generate_statement(stmt)
+            self.emit_line("break;")
+            self.indent_level -= 1
+            self.emit_line("}")
+        self.break_stack.pop()
+        self.emit_line("}")
+
+    def _break_code(self) -> str:
+        if not self.break_stack or self.break_stack[-1]['kind'] == 'loop':
+            return "break;"
+        # break внутри switch должен выйти из цикла, а не из switch
+        for entry in reversed(self.break_stack):
+            if entry['kind'] == 'loop':
+                if entry['label'] is None:
+                    entry['label'] = self._new_label('__loop_exit')
+                return f"goto {entry['label']};"
+        return "break;"
+
+    def _push_loop(self):
+        self.break_stack.append({'kind': 'loop', 'label': None})
+
+    def _pop_loop(self):
+        entry = self.break_stack.pop()
+        if entry['label']:
+            self.emit_line(f"{entry['label']}:;")
 
     def generate_enum(self, enum_def: EnumDef):
         self.emit_line(f"typedef enum {{")
@@ -583,8 +1655,11 @@ class CCodeGenerator:
         
         if isinstance(expr, Literal):
             if isinstance(expr.value, str):
+                pooled = self.string_constants.get(expr.value)
+                if pooled is not None and not self.in_global_init:
+                    return pooled
                 escaped = self._escape_string(expr.value)
-                length = len(expr.value)
+                length = self._byte_length(expr.value)
                 return f'(flux_string){{"{escaped}", {length}}}'
             elif isinstance(expr.value, float):
                 return str(expr.value)
@@ -601,7 +1676,7 @@ class CCodeGenerator:
             right = self.generate_expression(expr.right)
 
             if expr.op == '**':
-                return f"pow({left}, {right})"
+                return self._generate_pow(expr, left, right)
 
             op_map = {
                 '+': '+', '-': '-', '*': '*', '/': '/',
@@ -616,7 +1691,7 @@ class CCodeGenerator:
             right = self.generate_expression(expr.right)
             left_t = getattr(expr.left, 'resolved_type', getattr(expr.left, 'type', None))
             right_t = getattr(expr.right, 'resolved_type', getattr(expr.right, 'type', None))
-            if left_t == 'str' or right_t == 'str':
+            if left_t == 'str' or right_t == 'str' or 'flux_string' in (self.infer_c_type(expr.left), self.infer_c_type(expr.right)):
                 if expr.op == '==':
                     return f"flux_string_eq({left}, {right})"
                 elif expr.op == '!=':
@@ -624,7 +1699,7 @@ class CCodeGenerator:
                 else:
                     cmp_map = {'<': '< 0', '>': '> 0', '<=': '<= 0', '>=': '>= 0'}
                     suffix = cmp_map.get(expr.op, f"== 0")
-                    return f"(strcmp({left}.data, {right}.data) {suffix})"
+                    return f"(flux_string_cmp({left}, {right}) {suffix})"
             else:
                 op_map = {
                     '<': '<', '>': '>', '<=': '<=', '>=': '>=',
@@ -653,11 +1728,21 @@ class CCodeGenerator:
                 a = expr.args[0]
                 a_code = self.generate_expression(a)
                 a_t = getattr(a, 'resolved_type', None) or getattr(a, 'type', None)
-                if a_t == 'str':
+                a_c = self.infer_c_type(a)
+                if a_t == 'str' or a_c == 'flux_string' or a_c in self.slice_types:
                     return f"({a_code}.length)"
-                if isinstance(a, Variable) or (isinstance(a_t, str) and a_t.startswith('array')):
-                    return f"(sizeof({a_code})/sizeof({a_code}[0]))"
-                return f"(sizeof({a_code})/sizeof({a_code}[0]))"
+                if self._is_fixed_array(a):
+                    return f"((int64_t)(sizeof({a_code})/sizeof({a_code}[0])))"
+                raise SyntaxError(f"len() не применим к '{a_code}' ({a_c or 'неизвестный тип'}): используйте str, slice<T> или массив")
+            if fname == 'slice':
+                if not expr.args or len(expr.args) != 2:
+                    raise SyntaxError("slice() ожидает два аргумента: указатель и длину")
+                slice_c = self.infer_c_type(expr)
+                if slice_c is None:
+                    raise SyntaxError("Первый аргумент slice() должен быть типизированным указателем")
+                ptr = self.generate_expression(expr.args[0])
+                length = self.generate_expression(expr.args[1])
+                return f"(({slice_c}){{{ptr}, (int64_t)({length})}})"
 
             args = [self.generate_expression(arg) for arg in (expr.args or [])]
             args_str = ", ".join(args)
@@ -670,6 +1755,9 @@ class CCodeGenerator:
         elif isinstance(expr, ArrayAccess):
             array = self.generate_expression(expr.arr)
             index = self.generate_expression(expr.index)
+            arr_c = self.infer_c_type(expr.arr)
+            if arr_c in self.slice_types or arr_c == 'flux_string':
+                return f"{array}.data[{index}]"
             return f"{array}[{index}]"
         
         elif isinstance(expr, FieldAccess):
@@ -681,12 +1769,14 @@ class CCodeGenerator:
             else:
                 if self.local_vars_stack and hasattr(expr.obj, 'name'):
                     name = getattr(expr.obj, 'name')
-                    try:
-                        declared = self.local_vars_stack[-1].get(name)
-                        if declared and ('*' in declared):
-                            use_arrow = True
-                    except Exception:
-                        pass
+                    # Тела циклов for открывают свою область, поэтому параметр-указатель
+                    # ищется во всех областях, от внутренней к внешней, как в infer_c_type
+                    for scope in reversed(self.local_vars_stack):
+                        if name in scope:
+                            declared = scope[name]
+                            if isinstance(declared, str) and '*' in declared:
+                                use_arrow = True
+                            break
             if use_arrow:
                 return f"{obj}->{expr.field}"
             return f"{obj}.{expr.field}"
@@ -741,6 +1831,109 @@ class CCodeGenerator:
         else:
             return "0"
     
+    INT_C_TYPES = ('int8_t', 'int16_t', 'int32_t', 'int64_t', 'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t', 'bool', 'size_t')
+    FLOAT_C_TYPES = ('float', 'double')
+
+    def infer_c_type(self, expr) -> Optional[str]:
+        resolved = getattr(expr, 'resolved_type', None)
+        if isinstance(resolved, str):
+            return self.get_c_type(resolved)
+
+        if isinstance(expr, Literal):
+            if isinstance(expr.value, bool):
+                return 'bool'
+            if isinstance(expr.value, str):
+                return 'flux_string'
+            if isinstance(expr.value, float):
+                return 'double'
+            if isinstance(expr.value, int):
+                return 'int32_t' if -2**31 <= expr.value < 2**31 else 'int64_t'
+            return None
+
+        if isinstance(expr, Variable):
+            for scope in reversed(self.local_vars_stack):
+                if expr.name in scope:
+                    return scope[expr.name]
+            gv = self.global_vars.get(expr.name)
+            if gv is not None:
+                return self.get_c_type(gv.var_type)
+            return None
+
+        if isinstance(expr, CastExpr):
+            return self.get_c_type(expr.target_type)
+
+        if isinstance(expr, Call):
+            fd = self.function_declarations.get(expr.func_name) if isinstance(expr.func_name, str) else None
+            if fd is not None:
+                return self.get_c_type(fd.return_type)
+            if expr.func_name == 'slice' and expr.args:
+                ptr_t = self.infer_c_type(expr.args[0])
+                if ptr_t and ptr_t.endswith('*'):
+                    return self._slice_c_type(ptr_t[:-1].rstrip())
+            if expr.func_name == 'len':
+                return 'int64_t'
+            return None
+
+        if isinstance(expr, BinaryOp):
+            lt = self.infer_c_type(expr.left)
+            rt = self.infer_c_type(expr.right)
+            if lt in self.FLOAT_C_TYPES or rt in self.FLOAT_C_TYPES:
+                return 'double' if 'double' in (lt, rt) or expr.op == '**' else 'float'
+            if lt in self.INT_C_TYPES and rt in self.INT_C_TYPES:
+                return 'int64_t' if {'int64_t', 'uint64_t'} & {lt, rt} else 'int32_t'
+            if lt and lt.endswith('*') and expr.op in ('+', '-') and rt in self.INT_C_TYPES:
+                return lt
+            return None
+
+        if isinstance(expr, (Compare, LogicalOp)):
+            return 'bool'
+
+        if isinstance(expr, FieldAccess):
+            obj_t = self.infer_c_type(expr.obj)
+            if obj_t == 'flux_string':
+                return 'int64_t' if expr.field == 'length' else 'const char*'
+            if obj_t in self.slice_types:
+                return 'int64_t' if expr.field == 'length' else f"{self.slice_types[obj_t]}*"
+            if obj_t and obj_t.startswith('struct '):
+                sd = self.struct_definitions.get(obj_t[len('struct '):].rstrip('*'))
+                if sd is not None:
+                    for fname, ftype in sd.fields:
+                        if fname == expr.field:
+                            return self.get_c_type(ftype)
+            return None
+
+        if isinstance(expr, (ArrayAccess, Dereference)):
+            base_t = self.infer_c_type(expr.arr if isinstance(expr, ArrayAccess) else expr.ptr)
+            if base_t in self.slice_types:
+                return self.slice_types[base_t]
+            if base_t == 'flux_string':
+                return 'char'
+            if base_t and base_t.endswith('*'):
+                return base_t[:-1]
+            return None
+
+        return None
+
+    def _generate_pow(self, expr, left: str, right: str) -> str:
+        lt = self.infer_c_type(expr.left)
+        rt = self.infer_c_type(expr.right)
+        if lt not in self.INT_C_TYPES or rt not in self.INT_C_TYPES:
+            return f"pow({left}, {right})"
+
+        # Знак результата - как у основания, ширина 64 бита, если 64-битный хотя бы один операнд
+        wide = bool({'int64_t', 'uint64_t', 'size_t'} & {lt, rt})
+        unsigned_t = 'uint64_t' if wide else 'uint32_t'
+        result_t = unsigned_t if lt.startswith(('uint', 'size')) else ('int64_t' if wide else 'int32_t')
+        exp = expr.right
+        if isinstance(exp, Literal) and isinstance(exp.value, int) and 0 <= exp.value <= 4:
+            if exp.value == 0:
+                return f"(({result_t})1)"
+            # Основание без побочных эффектов можно повторить: x*x*x вместо вызова. Умножение
+            # беззнаковое, переполнение заворачивается так же, как в cblerr_ipow
+            if isinstance(expr.left, (Variable, Literal)):
+                return f"(({result_t})(" + " * ".join([f"({unsigned_t}){left}"] * exp.value) + "))"
+        return f"(({result_t})cblerr_ipow({left}, {right}))"
+
     def _generate_print_call(self, expr) -> str:
         if not getattr(expr, 'args', None):
             return 'printf("\\n")'
@@ -810,6 +2003,9 @@ class CCodeGenerator:
             'str': 'flux_string',
         }
         if hasattr(flux_type, 'name') and hasattr(flux_type, 'args'):
+            if flux_type.name == 'slice':
+                inner = flux_type.args[0] if flux_type.args else 'int'
+                return self._slice_c_type(self.get_c_type(inner))
             if flux_type.name == 'array':
                 inner = flux_type.args[0] if flux_type.args else 'int'
                 inner_c = self.get_c_type(inner)
@@ -820,11 +2016,16 @@ class CCodeGenerator:
         
         if flux_type in type_map:
             return type_map[flux_type]
+        if isinstance(flux_type, str) and flux_type in self.enum_names:
+            return flux_type
         if isinstance(flux_type, str) and flux_type.startswith('*'):
             inner = flux_type[1:]
             inner_c_type = self.get_c_type(inner)
             return f"{inner_c_type}*"
         
+        if isinstance(flux_type, str) and flux_type.startswith('slice<') and flux_type.endswith('>'):
+            return self._slice_c_type(self.get_c_type(flux_type[6:-1]))
+
         if isinstance(flux_type, str) and flux_type.startswith('ptr<'):
             inner = flux_type[4:-1]
             inner_c_type = self.get_c_type(inner)
@@ -896,14 +2097,197 @@ class CCodeGenerator:
         return f"{ret_c} {name}({', '.join(param_cs)})"
 
 
+def _generate_function_chunk(payload) -> List[List[str]]:
+    state, func_defs = payload
+    gen = CCodeGenerator(module_name=state['module_name'], link_mode=state['link_mode'],
+                         is_gui_app=state['is_gui_app'])
+    gen.struct_definitions = state['struct_definitions']
+    gen.function_declarations = state['function_declarations']
+    gen.global_vars = state['global_vars']
+    gen.string_constants = state['string_constants']
+    gen.enum_names = state['enum_names']
+    gen.enum_values = state['enum_values']
+    gen.slice_types = dict(state['slice_types'])
+    gen.address_taken = state['address_taken']
+    gen.internal_linkage = state['internal_linkage']
+    gen.line_directives = state['line_directives']
+    blocks = []
+    for func_def in func_defs:
+        gen.code_lines = []
+        gen.generate_function_def(func_def)
+        gen.emit_line("")
+        blocks.append(gen.code_lines)
+    return blocks
+
+
+def _run_forwarding_output(cmd, **kwargs) -> subprocess.CompletedProcess:
+    # В демоне sys.stdout/sys.stderr - потоки в сокет клиента без файлового дескриптора:
+    # вывод дочернего процесса пересылается туда же, а не в терминал демона
+    try:
+        sys.stdout.fileno()
+        sys.stderr.fileno()
+        return subprocess.run(cmd, **kwargs)
+    except (AttributeError, OSError, ValueError):
+        pass
+    import threading
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, errors='replace', **kwargs)
+    err_stream = sys.stderr
+
+    def pump_stderr():
+        for line in proc.stderr:
+            err_stream.write(line)
+
+    pump = threading.Thread(target=pump_stderr, daemon=True)
+    pump.start()
+    for line in proc.stdout:
+        sys.stdout.write(line)
+    pump.join()
+    return subprocess.CompletedProcess(cmd, proc.wait())
+
+
+class WarmState:
+    # Состояние, которое демон сборки (build.py serve) держит между запросами: AST файлов по
+    # содержимому, кэш генерации функций в памяти, найденные компиляторы и готовый Си код
+    # для входов, которые не менялись с прошлой сборки. AST и Си код вытесняются по LRU,
+    # чтобы долго живущий демон не рос без предела
+    MAX_AST_BYTES = 64 * 1024 * 1024
+    MAX_OUTPUTS = 64
+
+    def __init__(self):
+        from collections import OrderedDict
+        self.asts: 'OrderedDict[Path, Tuple[str, bytes]]' = OrderedDict()
+        self.ast_bytes = 0
+        self.function_caches: Dict[Path, FunctionCache] = {}
+        self.toolchains: Dict[str, Tuple[bool, str]] = {}
+        self.outputs: 'OrderedDict[tuple, dict]' = OrderedDict()
+        self.deps: Dict[str, str] = {}
+        self.builds = 0
+        self.ast_hits = 0
+        self.output_hits = 0
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hash_parts([text])
+
+    def begin_build(self):
+        self.deps = {}
+        self.builds += 1
+
+    def has_ast(self, path: Path, source: str) -> bool:
+        entry = self.asts.get(path)
+        return entry is not None and entry[0] == self._digest(source)
+
+    def store_ast(self, path: Path, source: str, program: Program):
+        # Хранится копия до инлайнинга импортов и свертки: обе фазы меняют дерево на месте
+        import pickle
+        digest = self._digest(source)
+        data = pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL)
+        old = self.asts.pop(path, None)
+        if old is not None:
+            self.ast_bytes -= len(old[1])
+        self.asts[path] = (digest, data)
+        self.ast_bytes += len(data)
+        while self.ast_bytes > self.MAX_AST_BYTES and len(self.asts) > 1:
+            _, (_, evicted) = self.asts.popitem(last=False)
+            self.ast_bytes -= len(evicted)
+        self.deps[str(path)] = digest
+
+    def load(self, path: Path, source: Optional[str] = None) -> Program:
+        path = Path(path).resolve()
+        if source is None:
+            source = path.read_text(encoding='utf-8')
+        if self.has_ast(path, source):
+            import pickle
+            self.ast_hits += 1
+            self.asts.move_to_end(path)
+            digest, data = self.asts[path]
+            self.deps[str(path)] = digest
+            return pickle.loads(data)
+        program = parse(tokenize(source, str(path)), str(path))
+        self.store_ast(path, source, program)
+        return program
+
+    def function_cache(self, root: Path) -> FunctionCache:
+        cache = self.function_caches.get(root)
+        if cache is None:
+            cache = self.function_caches[root] = open_function_cache(root)
+        cache.start_build()
+        return cache
+
+    def lookup_outputs(self, key: tuple) -> Optional[dict]:
+        entry = self.outputs.get(key)
+        if entry is None:
+            return None
+        for path, digest in entry['deps'].items():
+            try:
+                if self._digest(Path(path).read_text(encoding='utf-8')) != digest:
+                    return None
+            except OSError:
+                return None
+        if not all(Path(p).parent.exists() for p in entry['files']):
+            return None
+        self.outputs.move_to_end(key)
+        self.output_hits += 1
+        return entry
+
+    def store_outputs(self, key: tuple, snapshot: dict):
+        snapshot['deps'] = dict(self.deps)
+        self.outputs.pop(key, None)
+        self.outputs[key] = snapshot
+        while len(self.outputs) > self.MAX_OUTPUTS:
+            self.outputs.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {'builds': self.builds, 'asts': len(self.asts), 'ast_bytes': self.ast_bytes, 'ast_hits': self.ast_hits,
+                'outputs': len(self.outputs), 'output_hits': self.output_hits,
+                'toolchains': len(self.toolchains)}
+
+
 class StandaloneCompiler:
+    # Именованные профили оптимизации: флаги для GCC/Clang, добавки для Windows и флаги MSVC
+    OPTIMIZATION_PROFILES = {
+        'size': {
+            'gcc': '-Os -s', 'clang': '-Os -s',
+            'windows': '-fno-asynchronous-unwind-tables -fno-unwind-tables -fomit-frame-pointer',
+            'lto': False, 'icf': False,
+            'msvc': '/O2 /Os', 'msvc_link': '',
+        },
+        'speed': {
+            'gcc': '-O3 -s -fipa-icf', 'clang': '-O3 -s',
+            'windows': '-fno-asynchronous-unwind-tables -fno-unwind-tables -fomit-frame-pointer',
+            'lto': True, 'icf': True,
+            'msvc': '/O2 /Ot', 'msvc_link': '',
+        },
+        'native': {
+            'gcc': '-O3 -s -fipa-icf -march=native -mtune=native', 'clang': '-O3 -s -march=native -mtune=native',
+            'windows': '-fno-asynchronous-unwind-tables -fno-unwind-tables -fomit-frame-pointer',
+            'lto': True, 'icf': True,
+            'msvc': '/O2 /Ot', 'msvc_link': '',
+        },
+        'debug': {
+            'gcc': '-O0 -g -fno-omit-frame-pointer', 'clang': '-O0 -g -fno-omit-frame-pointer',
+            'windows': '',
+            'lto': False, 'icf': False,
+            'msvc': '/Od /Zi', 'msvc_link': '/DEBUG',
+        },
+    }
+
     def __init__(self, source_file: str, output_exe: str, verbose: bool = True,
                  link_mode: Optional[str] = None, stack_reserve: Optional[int] = None,
-                 compiler_type: Optional[str] = None):
+                 compiler_type: Optional[str] = None, jobs: int = 1, units: int = 1,
+                 lto: bool = False, fold: bool = True, line_directives: bool = True,
+                 source_map: bool = False, pgo: bool = False, pgo_train: Optional[str] = None,
+                 pgo_args: Optional[str] = None, opt_profile: str = 'size', use_cache: bool = True,
+                 incremental: bool = False, time_report: Optional[str] = None,
+                 warm: Optional['WarmState'] = None):
         self.source_file = Path(source_file)
         self.output_exe = Path(output_exe)
         self.verbose = verbose
+        self.warm = warm
         
+        import platform
+        import tempfile
         self.system = platform.system()
         self.is_windows = self.system == 'Windows'
         
@@ -914,7 +2298,32 @@ class StandaloneCompiler:
         self.obj_file = self.temp_dir / f"{self.source_file.stem}.obj" if self.is_windows else self.temp_dir / f"{self.source_file.stem}.o"
         self.link_mode = link_mode
         self.stack_reserve = stack_reserve
+        self.use_lld = (compiler_type or '').lower() == 'lld'
+        self.compiler_versions: Dict[str, str] = {}
         self.compiler_type = self._select_compiler(compiler_type)
+        self.jobs = max(1, jobs)
+        self.units = max(1, units)
+        self.lto = lto
+        self.fold = fold
+        self.line_directives = line_directives
+        self.source_map = source_map
+        self.pgo = pgo
+        self.pgo_train = pgo_train
+        self.pgo_args = pgo_args
+        self.pgo_flags = ''
+        self.pgo_instrumenting = False
+        self.opt_profile = opt_profile
+        self.use_cache = use_cache
+        self.incremental = incremental
+        self.time_report = time_report
+        # JSON отчет без файла печатается в stdout процесса, журнал сборки main() уводит в stderr
+        self.report_stream = sys.stdout
+        self.timer = PhaseTimer()
+        self.header_file: Optional[Path] = None
+        # Есть ли в Си коде #pragma omp simd (@simd): только тогда нужен -fopenmp-simd
+        self.uses_omp_simd = False
+        self.c_hash = None
+        self.unit_files: List[Path] = []
     
     def log(self, message: str, level: str = "INFO"):
         if self.verbose:
@@ -969,25 +2378,56 @@ class StandaloneCompiler:
         return 'gcc'
     
     def _compiler_exists(self, compiler_name: str) -> bool:
+        if self.warm is not None and compiler_name in self.warm.toolchains:
+            found, version = self.warm.toolchains[compiler_name]
+            if found:
+                self.compiler_versions[compiler_name] = version
+            return found
         try:
             if self.is_windows:
                 cmd = f'{compiler_name}.exe'
             else:
                 cmd = compiler_name
             result = subprocess.run([cmd, '--version'], capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
+            found = result.returncode == 0
+            if found:
+                self.compiler_versions[compiler_name] = result.stdout
         except Exception:
-            return False
+            found = False
+        if self.warm is not None:
+            self.warm.toolchains[compiler_name] = (found, self.compiler_versions.get(compiler_name, ''))
+        return found
+
+    @classmethod
+    def base_cflags(cls, opt_profile: str, family: str, uses_omp_simd: bool = False) -> str:
+        flags = f"-std=c11 {cls.OPTIMIZATION_PROFILES[opt_profile][family]} -ffunction-sections -fdata-sections -fno-ident"
+        if uses_omp_simd:
+            flags += " -fopenmp-simd"
+        return flags
+
+    @staticmethod
+    def needs_omp_simd(c_sources) -> bool:
+        return any(OMP_SIMD_PRAGMA in text for text in c_sources)
 
     def _get_compiler_flags(self) -> str:
+        profile = self.OPTIMIZATION_PROFILES[self.opt_profile]
         env_cflags = os.getenv('CBLERR_CFLAGS')
         if env_cflags:
-            return env_cflags
-        
-        flags = '-std=c11 -Os -s -ffunction-sections -fdata-sections -fno-ident'
-        
-        if self.is_windows:
-            flags += ' -fno-asynchronous-unwind-tables -fno-unwind-tables -fomit-frame-pointer -mno-stack-arg-probe -fno-math-errno'
+            flags = env_cflags
+        else:
+            family = 'clang' if self.compiler_type in ('clang', 'lld') else 'gcc'
+            flags = self.base_cflags(self.opt_profile, family, self.uses_omp_simd)
+            
+            if self.is_windows:
+                if profile['windows']:
+                    flags += ' ' + profile['windows']
+                flags += ' -mno-stack-arg-probe -fno-math-errno'
+
+        if self.lto or profile['lto']:
+            flags += ' -flto'
+
+        if self.pgo_flags:
+            flags += ' ' + self.pgo_flags
             
         return flags
     
@@ -1003,6 +2443,12 @@ class StandaloneCompiler:
                 flags.append('-static')
                 
             flags.append('-Wl,--gc-sections')
+
+            if self.use_lld:
+                flags.append('-fuse-ld=lld')
+                # Слияние одинаковых функций умеет только LLD, GCC делает это сам через -fipa-icf
+                if self.OPTIMIZATION_PROFILES[self.opt_profile]['icf']:
+                    flags.append('-Wl,--icf=safe')
             
             if self.is_windows:
                 flags.append('-Wl,--build-id=none')
@@ -1018,12 +2464,53 @@ class StandaloneCompiler:
         
         return ' '.join(flags)
 
+    def _log_flags(self, cflags: str, ldflags: str):
+        self.log(f"  Профиль оптимизации: {self.opt_profile}")
+        self.log(f"    CFLAGS:  {cflags}")
+        self.log(f"    LDFLAGS: {ldflags}")
+
+    def _write_source_map(self, mappings: List[Tuple[str, int, str, int]]):
+        import json
+        sources: Dict[str, List[str]] = {}
+        entries = []
+        for c_file, c_line, src, line in mappings:
+            if src not in sources:
+                try:
+                    with open(src, 'r', encoding='utf-8') as f:
+                        sources[src] = f.read().splitlines()
+                except OSError:
+                    sources[src] = []
+            text = sources[src][line - 1] if 0 < line <= len(sources[src]) else ""
+            column = len(text) - len(text.lstrip()) + 1 if text.strip() else 1
+            entries.append({"c_file": c_file, "c_line": c_line, "source": src, "line": line, "column": column})
+        map_path = self.temp_dir / f"{self.source_file.stem}.map.json"
+        with open(map_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "files": sorted(sources), "mappings": entries}, f, ensure_ascii=False, indent=1)
+        self.log(f"  Карта исходников: {map_path} ({len(entries)} строк)")
+
+    _CBL_DIAGNOSTIC_RE = re.compile(
+        r"^(.+?\.cbl):(\d+)(?::(\d+))?:\s*(?:fatal )?(?:error|ошибка):\s*(.+)$", re.M | re.I)
+
     def _handle_compile_error(self, error_output: str, debugger) -> bool:
         try:
             if "undefined reference" in error_output or "ld returned 1" in error_output or "неопределенная ссылка" in error_output:
                 print(f"\n\033[31m[ОШИБКА ЛИНКЕРА (ld)]\033[0m\n{error_output.strip()}", file=sys.stderr)
                 return True
 
+            # Благодаря #line компилятор Си сам указывает файл и строку .cbl
+            m_cbl = self._CBL_DIAGNOSTIC_RE.search(error_output)
+            if m_cbl and Path(m_cbl.group(1)).exists():
+                with open(m_cbl.group(1), 'r', encoding='utf-8') as f:
+                    cbl_source = f.read()
+                exc = SyntaxError(m_cbl.group(4).strip())
+                exc.lineno = int(m_cbl.group(2))
+                # Колонка из диагностики относится к строке Си, поэтому указываем на начало оператора
+                lines = cbl_source.splitlines()
+                text = lines[exc.lineno - 1] if 0 < exc.lineno <= len(lines) else ""
+                exc.offset = len(text) - len(text.lstrip()) + 1
+                debugger.display_syntax_error(exc, source=cbl_source, filename=m_cbl.group(1))
+                return True
+
             m_implicit = re.search(r"(?:implicit declaration of function|неявное объявление функции) ['‘]([^'’]+)['’]", error_output, flags=re.I)
             if m_implicit:
                 func_name = m_implicit.group(1)
@@ -1079,6 +2566,8 @@ class StandaloneCompiler:
     def compile(self) -> bool:
         debugger = init_debugger(DebugLevel.INFO)
         self.debugger = debugger
+        if self.warm is not None:
+            self.warm.begin_build()
         try:
             debugger.log_info("Начало компиляции...")
             self.log(f"Консольный Компилятор CBlerr (CCC)")
@@ -1090,67 +2579,30 @@ class StandaloneCompiler:
                 self.log(f"Файл не найден!: {self.source_file}", "ERROR")
                 return False
 
-            with open(self.source_file, 'r', encoding='utf-8') as f:
-                source = f.read()
+            timer = self.timer
+            with timer.phase('read'):
+                with open(self.source_file, 'r', encoding='utf-8') as f:
+                    source = f.read()
+            timer.count(bytes=len(source.encode('utf-8')))
             self.log(f"  Прочитано {len(source)} байтов из {self.source_file}")
 
-            self.log("\n[2/4] Токенизация...")
-            tokens = tokenize(source, str(self.source_file))
-            self.log(f"  Сгенерировано {len(tokens)} токенов")
-
-            self.log("\n[3/4] Парсинг кода...")
-            ast = parse(tokens)
-            self.log(f"  AST Успешно создано!")
-
-            try:
-                from core.module_loader import inline_imports
-                ast = inline_imports(ast, self.source_file)
-            except Exception as e:
-                self.log(f'Ошибка "Import": {e}', "ERROR")
-                return False
-
-            try:
-                from core.flux_ast import Return, Literal
-                main_fn = None
-                self.is_gui_app = False
-                
-                for fn in ast.functions:
-                    if fn.name == 'main':
-                        main_fn = fn
-                    elif fn.name == 'WinMain':
-                        self.is_gui_app = True
-
-                if main_fn and not getattr(main_fn, 'is_extern', False):
-                    found_return0 = False
-                    found_endofcode = False
-                    for stmt in main_fn.body:
-                        if isinstance(stmt, Return):
-                            val = getattr(stmt, 'value', None)
-                            if isinstance(val, Literal) and getattr(val, 'type', None) in ('int', 'i32', 'int32') and int(getattr(val, 'value', 0)) == 0:
-                                found_return0 = True
-                                if getattr(stmt, 'is_endofcode', False):
-                                    found_endofcode = True
-                    if found_return0 and not found_endofcode:
-                        self.log('Используйте "endofcode" вместо return 0. Только по вашему желанию!')
-            except Exception:
-                import traceback
-                traceback.print_exc()
-                self.log("Постобработка AST завершилась неудачей.", "ERROR")
+            warm_key = self._warm_key() if self.warm is not None else None
+            snapshot = self.warm.lookup_outputs(warm_key) if warm_key else None
+            if snapshot is not None:
+                self._restore_outputs(snapshot)
+            elif not self._generate_c(source, warm_key):
                 return False
 
-            self.log("\n[4/4] Генерирую код...")
-            generator = CCodeGenerator(link_mode=self.link_mode, is_gui_app=getattr(self, 'is_gui_app', False))
-            c_code = generator.generate(ast)
-
-            with open(self.c_file, 'w', encoding='utf-8') as f:
-                f.write(c_code)
-            self.log(f"  Сгенерировано {len(c_code)} байтов Си кода.")
-            self.log(f"  Си кoд сохранен в:{self.c_file}")
-
             self.log("\n[5/5] Компилируем Си код в исполняемый файл...")
-            success = self._compile_c_to_exe()
+            if self.pgo:
+                success = self._compile_with_pgo()
+            else:
+                success = self._compile_cached()
+            timer.finish()
             if success:
                 print("\033[92mКомпиляция успешна!\033[0m")
+            if self.time_report:
+                self._print_time_report()
             return success
 
         except (SyntaxError, NameError) as e:
@@ -1164,8 +2616,14 @@ class StandaloneCompiler:
                 return False
             else:
                 src = locals().get('source', None)
+                filename = str(self.source_file)
+                err_file = getattr(e, 'filename', None)
+                if err_file and Path(err_file).exists() and Path(err_file).resolve() != self.source_file.resolve():
+                    filename = err_file
+                    with open(err_file, 'r', encoding='utf-8') as f:
+                        src = f.read()
                 try:
-                    debugger.display_syntax_error(e, source=src, filename=str(self.source_file))
+                    debugger.display_syntax_error(e, source=src, filename=filename)
                 except Exception:
                     print(f"[ОШИБКА!] ОШИБКА КОДА: {e}")
                 return False
@@ -1179,6 +2637,298 @@ class StandaloneCompiler:
             traceback.print_exc()
             return False
     
+    def _generate_c(self, source: str, warm_key: Optional[tuple] = None) -> bool:
+        timer = self.timer
+        main_path = self.source_file.resolve()
+        if self.warm is not None and self.warm.has_ast(main_path, source):
+            self.log("\n[2/4] Токенизация...\n[3/4] Парсинг кода...")
+            with timer.phase('parse'):
+                ast = self.warm.load(main_path, source)
+            self.log(f"  AST взят из памяти демона")
+        else:
+            self.log("\n[2/4] Токенизация...")
+            with timer.phase('tokenize'):
+                tokens = tokenize(source, str(self.source_file))
+            timer.count(tokens=len(tokens))
+            self.log(f"  Сгенерировано {len(tokens)} токенов")
+
+            self.log("\n[3/4] Парсинг кода...")
+            with timer.phase('parse'):
+                ast = parse(tokens, str(main_path))
+            if self.warm is not None:
+                self.warm.store_ast(main_path, source, ast)
+            self.log(f"  AST Успешно создано!")
+
+        try:
+            from core.module_loader import inline_imports
+            with timer.phase('imports'):
+                ast = inline_imports(ast, self.source_file, loader=self.warm.load if self.warm is not None else None)
+            timer.count(functions=len(ast.functions), structs=len(ast.structs), globals=len(ast.global_vars))
+            if self.time_report:
+                timer.count(ast_nodes=count_ast_nodes(ast))
+        except Exception as e:
+            self.log(f'Ошибка "Import": {e}', "ERROR")
+            return False
+
+        try:
+            from core.flux_ast import Return, Literal
+            main_fn = None
+            self.is_gui_app = False
+            
+            for fn in ast.functions:
+                if fn.name == 'main':
+                    main_fn = fn
+                elif fn.name == 'WinMain':
+                    self.is_gui_app = True
+
+            if main_fn and not getattr(main_fn, 'is_extern', False):
+                found_return0 = False
+                found_endofcode = False
+                for stmt in main_fn.body:
+                    if isinstance(stmt, Return):
+                        val = getattr(stmt, 'value', None)
+                        if isinstance(val, Literal) and getattr(val, 'type', None) in ('int', 'i32', 'int32') and int(getattr(val, 'value', 0)) == 0:
+                            found_return0 = True
+                            if getattr(stmt, 'is_endofcode', False):
+                                found_endofcode = True
+                if found_return0 and not found_endofcode:
+                    self.log('Используйте "endofcode" вместо return 0. Только по вашему желанию!')
+        except Exception:
+            import traceback
+            traceback.print_exc()
+            self.log("Постобработка AST завершилась неудачей.", "ERROR")
+            return False
+
+        if self.fold:
+            from core.constant_folder import fold_constants
+            with timer.phase('fold'):
+                ast, folded = fold_constants(ast)
+            self.log(f"  Свернуто константных выражений: {folded}")
+
+        self.log("\n[4/4] Генерирую код...")
+        function_cache = None
+        if self.use_cache:
+            function_cache = self.warm.function_cache(self.temp_dir) if self.warm is not None else open_function_cache(self.temp_dir)
+        generator = CCodeGenerator(link_mode=self.link_mode, is_gui_app=getattr(self, 'is_gui_app', False),
+                                   jobs=self.jobs, line_directives=self.line_directives,
+                                   function_cache=function_cache)
+        if self.jobs > 1:
+            self.log(f"  Параллельная генерация функций: {self.jobs} процессов")
+        with timer.phase('codegen'):
+            self._write_c_sources(generator, ast)
+        timer.count(c_bytes=sum(p.stat().st_size for p in (self.unit_files or [self.c_file]))
+                    + (self.header_file.stat().st_size if self.header_file else 0))
+        if function_cache is not None:
+            function_cache.save()
+            total = function_cache.hits + function_cache.misses
+            self.log(f"  Функций из кэша генерации: {function_cache.hits} из {total}")
+        if self.source_map:
+            self._write_source_map(generator.source_map)
+        unique_strings = len(generator.string_constants)
+        self.log(f"  Строковых литералов: {unique_strings} уникальных, объединено дубликатов: {generator.string_uses - unique_strings}")
+        if warm_key:
+            self.warm.store_outputs(warm_key, self._snapshot_outputs(generator))
+        return True
+
+    def _warm_key(self) -> tuple:
+        # Все, от чего зависит Си текст, кроме содержимого исходников (их проверяет WarmState)
+        return (str(self.source_file.resolve()), str(self.c_file), self.link_mode, self.line_directives,
+                self.units, self.incremental, self.fold, self.source_map)
+
+    def _snapshot_outputs(self, generator: CCodeGenerator) -> dict:
+        paths = ([self.header_file] + self.unit_files) if self.header_file else [self.c_file]
+        return {
+            'files': {str(p): p.read_text(encoding='utf-8') for p in paths},
+            'c_hash': self.c_hash,
+            'uses_omp_simd': self.uses_omp_simd,
+            'unit_files': list(self.unit_files),
+            'header_file': self.header_file,
+            'is_gui_app': getattr(self, 'is_gui_app', False),
+            'source_map': list(generator.source_map) if self.source_map else [],
+            'counts': dict(self.timer.counts),
+        }
+
+    def _restore_outputs(self, snapshot: dict):
+        for path, text in snapshot['files'].items():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        self.c_hash = snapshot['c_hash']
+        self.uses_omp_simd = snapshot['uses_omp_simd']
+        self.unit_files = list(snapshot['unit_files'])
+        self.header_file = snapshot['header_file']
+        self.is_gui_app = snapshot['is_gui_app']
+        self.timer.count(**snapshot['counts'])
+        if self.source_map:
+            self._write_source_map(snapshot['source_map'])
+        self.log("\n[2-4/4] Исходники не изменились, Си код взят из памяти демона")
+
+    def _compile_cached(self) -> bool:
+        cache = open_cache(self.temp_dir, 'exe') if self.use_cache else None
+        if cache is None:
+            return self._compile_c_to_exe()
+
+        cc = self.compiler_type
+        cc_cmd = f'{cc}.exe' if self.is_windows else cc
+        if cc not in self.compiler_versions:
+            self._compiler_exists(cc)
+        key = hash_parts([self.c_hash or '', cc, shutil.which(cc_cmd) or cc_cmd, self.compiler_versions.get(cc, ''),
+                          self._get_compiler_flags(), self._get_linker_flags(), self.link_mode or '',
+                          str(self.stack_reserve or ''), str(getattr(self, 'is_gui_app', False))])
+        if cache.get(key, self.output_exe):
+            self.log(f"  Кэш: исполняемый файл взят из кэша ({key[:12]}), компиляция Си пропущена")
+            return True
+
+        if not self._compile_c_to_exe():
+            return False
+        exe = self.output_exe if self.output_exe.exists() else self.output_exe.with_suffix('.exe')
+        if exe.exists():
+            cache.put(key, exe)
+        return True
+
+    def print_cache_stats(self):
+        print_cache_stats(self.temp_dir)
+
+    def _pgo_profile_dir(self) -> Path:
+        # Профиль привязан к сгенерированному Си (он покрывает и импортированные модули),
+        # флагам и пути выходного файла: от них зависят имена и контрольные суммы .gcda
+        key = hash_parts([self.c_hash or '', self.compiler_type, self._get_compiler_flags(),
+                                self._get_linker_flags(), str(self.output_exe.resolve())])
+        profile_dir = self.temp_dir / 'pgo' / key[:16]
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        return profile_dir
+
+    def _pgo_has_profile(self, profile_dir: Path) -> bool:
+        if self.compiler_type in ('clang', 'lld'):
+            return (profile_dir / 'default.profdata').exists()
+        return any(profile_dir.rglob('*.gcda'))
+
+    def _run_pgo_training(self) -> bool:
+        import shlex
+        exe = self.output_exe if self.output_exe.exists() else self.output_exe.with_suffix('.exe')
+        if self.pgo_train:
+            cmd = self.pgo_train.replace('{exe}', shlex.quote(str(exe.resolve())))
+            self.log(f"  PGO: тренировочный запуск: {cmd}")
+            result = _run_forwarding_output(cmd, shell=True)
+        else:
+            cmd = [str(exe.resolve())] + shlex.split(self.pgo_args or '')
+            self.log(f"  PGO: тренировочный запуск: {' '.join(cmd)}")
+            result = _run_forwarding_output(cmd)
+        if result.returncode != 0:
+            self.log(f"  PGO: тренировочный запуск завершился с кодом {result.returncode}", "WARN")
+        return True
+
+    def _merge_clang_profiles(self, profile_dir: Path) -> bool:
+        raw = [str(p) for p in profile_dir.glob('*.profraw')]
+        if not raw:
+            return False
+        profdata_tool = os.getenv('CBLERR_LLVM_PROFDATA', 'llvm-profdata')
+        try:
+            result = subprocess.run([profdata_tool, 'merge', '-output=' + str(profile_dir / 'default.profdata')] + raw,
+                                    capture_output=True, text=True, timeout=120)
+        except FileNotFoundError:
+            self.log(f"  PGO: {profdata_tool} не найден (задайте CBLERR_LLVM_PROFDATA)", "WARN")
+            return False
+        if result.returncode != 0:
+            self.log(f"  PGO: ошибка {profdata_tool}: {result.stderr.strip()}", "WARN")
+            return False
+        return True
+
+    def _compile_with_pgo(self) -> bool:
+        clang = self.compiler_type in ('clang', 'lld')
+        profile_dir = self._pgo_profile_dir()
+
+        if self._pgo_has_profile(profile_dir):
+            self.log(f"  PGO: используется сохраненный профиль {profile_dir}")
+        else:
+            self.log("  PGO: сборка с инструментированием (-fprofile-generate)...")
+            self.pgo_flags = f'-fprofile-generate={profile_dir}'
+            self.pgo_instrumenting = True
+            try:
+                if not self._compile_c_to_exe():
+                    return False
+            finally:
+                self.pgo_instrumenting = False
+            with self.timer.phase('pgo_train'):
+                self._run_pgo_training()
+            if clang:
+                self._merge_clang_profiles(profile_dir)
+            if not self._pgo_has_profile(profile_dir):
+                self.log("  PGO: тренировочный запуск не записал профиль, собираю без PGO", "WARN")
+                self.pgo_flags = ''
+                return self._compile_c_to_exe()
+
+        if clang:
+            self.pgo_flags = f'-fprofile-use={profile_dir / "default.profdata"} -Wno-profile-instr-unprofiled'
+        else:
+            self.pgo_flags = f'-fprofile-use={profile_dir} -fprofile-partial-training -Wno-missing-profile'
+        self.log("  PGO: пересборка с профилем (-fprofile-use)...")
+        return self._compile_c_to_exe()
+
+    def _write_c_sources(self, generator: CCodeGenerator, ast: Program):
+        if self.incremental:
+            header_name = f"{self.source_file.stem}.h"
+            header, modules = generator.generate_modules(ast, header_name, main_source=str(self.source_file.resolve()),
+                                                         c_dir=str(self.temp_dir))
+            self.header_file = self.temp_dir / header_name
+            with open(self.header_file, 'w', encoding='utf-8') as f:
+                f.write(header)
+            self.unit_files = []
+            for unit_name, unit in modules:
+                unit_path = self.temp_dir / unit_name
+                with open(unit_path, 'w', encoding='utf-8') as f:
+                    f.write(unit)
+                self.unit_files.append(unit_path)
+            self.c_hash = hash_parts([header] + [unit for _, unit in modules])
+            self.uses_omp_simd = self.needs_omp_simd(unit for _, unit in modules)
+            self.log(f"  Сгенерировано {len(header) + sum(len(u) for _, u in modules)} байтов Си кода в {len(modules)} модулях.")
+            self.log(f"  Си кoд сохранен в:{self.temp_dir}")
+        elif self.units > 1:
+            header_name = f"{self.source_file.stem}.h"
+            header, units = generator.generate_units(ast, self.units, header_name, c_dir=str(self.temp_dir))
+            self.header_file = self.temp_dir / header_name
+            with open(self.header_file, 'w', encoding='utf-8') as f:
+                f.write(header)
+            self.unit_files = []
+            for idx, unit in enumerate(units):
+                unit_path = self.temp_dir / f"{self.source_file.stem}_{idx}.c"
+                with open(unit_path, 'w', encoding='utf-8') as f:
+                    f.write(unit)
+                self.unit_files.append(unit_path)
+            self.c_hash = hash_parts([header] + units)
+            self.uses_omp_simd = self.needs_omp_simd(units)
+            self.log(f"  Сгенерировано {len(header) + sum(len(u) for u in units)} байтов Си кода в {len(units)} единицах трансляции.")
+            if len(units) < self.units:
+                self.log(f"  --units {self.units}: получилось {len(units)} единиц трансляции - функция не делится между единицами, "
+                         f"а функций с телом меньше, чем запрошено", "WARN")
+            self.log(f"  Си кoд сохранен в:{self.temp_dir}")
+        else:
+            c_code = generator.generate(ast, c_filename=str(self.c_file))
+            self.c_hash = hash_parts([c_code])
+            self.uses_omp_simd = self.needs_omp_simd([c_code])
+
+            with open(self.c_file, 'w', encoding='utf-8') as f:
+                f.write(c_code)
+            self.log(f"  Сгенерировано {len(c_code)} байтов Си кода.")
+            self.log(f"  Си кoд сохранен в:{self.c_file}")
+
+    def _run_toolchain(self, cmd: List[str], timeout: int) -> subprocess.CompletedProcess:
+        # В режиме единиц трансляции объекты уже собраны, остается только линковка
+        with self.timer.phase('link' if self.unit_files else 'c_compile'):
+            return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+
+    def _print_time_report(self):
+        if self.time_report == 'table':
+            print("\nВремя по фазам:")
+            print(self.timer.format_table())
+            return
+        path = self.time_report.split(':', 1)[1] if ':' in self.time_report else None
+        text = self.timer.dump_json(path)
+        if path:
+            self.log(f"  Отчет о времени фаз: {path}")
+        else:
+            print(text, file=self.report_stream)
+            self.report_stream.flush()
+
     def _compile_c_to_exe(self) -> bool:
         if self.compiler_type == 'gcc':
             if self.is_windows:
@@ -1195,6 +2945,57 @@ class StandaloneCompiler:
         else:
             return self._compile_gcc() or self._compile_clang() or self._compile_lld()
     
+    def _c_sources(self, cc: str, cflags: List[str]) -> Optional[List[str]]:
+        if not self.unit_files:
+            return [str(self.c_file)]
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        obj_ext = '.obj' if self.is_windows else '.o'
+        objs = [str(p.with_suffix(obj_ext)) for p in self.unit_files]
+        workers = min(len(objs), self.jobs if self.jobs > 1 else (os.cpu_count() or 1))
+
+        # Объект зависит от текста единицы, заголовка с интерфейсами остальных модулей,
+        # компилятора и флагов - неизменившиеся единицы берутся из кэша без запуска компилятора
+        cache = open_cache(self.temp_dir, 'obj') if self.use_cache and not self.pgo else None
+        keys: Dict[str, str] = {}
+        pending = []
+        if cache is not None:
+            cc_name = cc[:-4] if cc.endswith('.exe') else cc
+            if cc_name not in self.compiler_versions:
+                self._compiler_exists(cc_name)
+            header_text = self.header_file.read_text(encoding='utf-8') if self.header_file else ''
+            toolchain = [cc, shutil.which(cc) or cc, self.compiler_versions.get(cc_name, ''), ' '.join(cflags)]
+            for src, obj in zip(self.unit_files, objs):
+                keys[obj] = hash_parts([Path(src).read_text(encoding='utf-8'), header_text] + toolchain)
+                if not cache.get(keys[obj], Path(obj)):
+                    pending.append((src, obj))
+            self.log(f"  Объектов из кэша: {len(objs) - len(pending)} из {len(objs)}")
+        else:
+            pending = list(zip(self.unit_files, objs))
+
+        def run(pair):
+            src, obj = pair
+            return subprocess.run([cc] + cflags + ['-c', str(src), '-o', obj], capture_output=True, text=True, timeout=120)
+
+        if pending:
+            workers = min(len(pending), workers)
+            self.log(f"  Компилирую {len(pending)} единиц трансляции в {workers} потоках...")
+            with self.timer.phase('c_compile'), ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run, pending))
+        else:
+            results = []
+
+        for (src, obj), result in zip(pending, results):
+            if result.returncode != 0:
+                combined = (result.stdout or "") + ("\n" if result.stdout and result.stderr else "") + (result.stderr or "")
+                if not self._handle_compile_error(combined, self.debugger):
+                    self.log(f"  Ошибка компиляции единицы трансляции: {combined}", "WARN")
+                return None
+            if cache is not None:
+                cache.put(keys[obj], Path(obj))
+        return objs
+
     def _compile_msvc(self) -> bool:
         self.log("Пробую MSVC...")
         
@@ -1205,12 +3006,19 @@ class StandaloneCompiler:
                 return False
             
             runtime_c = Path(__file__).parent.parent / 'lib' / 'cblerr_engine_runtime.c'
-            srcs = [str(self.c_file)]
+            srcs = [str(p) for p in self.unit_files] or [str(self.c_file)]
             if runtime_c.exists():
                 srcs.append(str(runtime_c))
 
-            msvc_compile_flags = '/O2 /GS- /GR- /Zc:threadSafeInit- /Oi /Os /Gy'
+            profile = self.OPTIMIZATION_PROFILES[self.opt_profile]
+            msvc_compile_flags = f"{profile['msvc']} /GS- /GR- /Zc:threadSafeInit- /Oi /Gy"
+            if self.unit_files:
+                msvc_compile_flags += ' /MP'
+            if self.lto or profile['lto']:
+                msvc_compile_flags += ' /GL'
             msvc_link_flags = '/NODEFAULTLIB /INCREMENTAL:NO /OPT:REF /OPT:ICF /ALIGN:16'
+            if profile['msvc_link']:
+                msvc_link_flags += ' ' + profile['msvc_link']
             
             if getattr(self, 'is_gui_app', False):
                 msvc_link_flags += ' /SUBSYSTEM:WINDOWS /ENTRY:CblerrStartup'
@@ -1223,16 +3031,17 @@ class StandaloneCompiler:
             libs = ['opengl32.lib', 'winmm.lib', 'kernel32.lib', 'user32.lib', 'msvcrt.lib', 'gdi32.lib']
 
             cmd = [cl_exe] + msvc_compile_flags.split() + srcs + [f'/Fe{self.output_exe}', '/link'] + msvc_link_flags.split() + libs
+            self._log_flags(msvc_compile_flags, msvc_link_flags)
             
             self.log(f"  Запускаю: cl.exe для компиляции кода...")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            result = self._run_toolchain(cmd, timeout=60)
 
             exe_found = self.output_exe.exists() or (self.is_windows and self.output_exe.with_suffix('.exe').exists())
 
             if result.returncode == 0 and exe_found:
                 self.log(f"  Компиляция через MSVC удачна!")
                 try:
-                    keep = SAVE_C_FLAG or os.getenv('CBLERR_KEEP_C', '0') == '1'
+                    keep = SAVE_C_FLAG or self.pgo_instrumenting or os.getenv('CBLERR_KEEP_C', '0') == '1'
                     if keep:
                         self.log(f"  Оставляю Си файл из - за флага -c: {self.c_file}")
                     else:
@@ -1255,8 +3064,6 @@ class StandaloneCompiler:
         self.log("Пробую MinGW (gcc.exe)...")
         
         try:
-            srcs = [str(self.c_file)]
-            
             if self.is_windows:
                 libs = ['-lopengl32', '-lwinmm', '-lmsvcrt', '-lkernel32', '-luser32', '-lgdi32']
             else:
@@ -1264,11 +3071,16 @@ class StandaloneCompiler:
 
             cflags_str = self._get_compiler_flags()
             ldflags_str = self._get_linker_flags()
+            self._log_flags(cflags_str, ldflags_str)
+
+            srcs = self._c_sources('gcc.exe', cflags_str.split())
+            if srcs is None:
+                return False
 
             cmd = ['gcc.exe'] + cflags_str.split() + srcs + ['-o', str(self.output_exe)] + ldflags_str.split() + libs
 
             self.log(f"  Запускаю: gcc.exe для компиляции кода (Ультра-размер)...")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            result = self._run_toolchain(cmd, timeout=120)
 
             exe_found = self.output_exe.exists() or (self.is_windows and self.output_exe.with_suffix('.exe').exists())
 
@@ -1278,7 +3090,7 @@ class StandaloneCompiler:
                     phys = os.path.getsize(str(exe_p))
                     self.log(f"Размер итогового файла: {phys/1024.0:.2f} КБ")
 
-                    keep = SAVE_C_FLAG or os.getenv('CBLERR_KEEP_C', '0') == '1'
+                    keep = SAVE_C_FLAG or self.pgo_instrumenting or os.getenv('CBLERR_KEEP_C', '0') == '1'
                     if keep:
                         self.log(f"  Оставляю временный Си файл: {self.c_file}")
                     else:
@@ -1304,16 +3116,20 @@ class StandaloneCompiler:
         self.log("Пробую GCC (Linux)...")
         
         try:
-            srcs = [str(self.c_file)]
             libs = ['-lm', '-lc']
 
             cflags_str = self._get_compiler_flags()
             ldflags_str = self._get_linker_flags()
+            self._log_flags(cflags_str, ldflags_str)
+
+            srcs = self._c_sources('gcc', cflags_str.split())
+            if srcs is None:
+                return False
             
             cmd = ['gcc'] + cflags_str.split() + srcs + ['-o', str(self.output_exe)] + ldflags_str.split() + libs
 
             self.log(f"  Запускаю: gcc для компиляции кода...")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            result = self._run_toolchain(cmd, timeout=60)
 
             exe_found = self.output_exe.exists()
 
@@ -1337,7 +3153,6 @@ class StandaloneCompiler:
         self.log("Пробую Clang...")
         
         try:
-            srcs = [str(self.c_file)]
             if self.is_windows:
                 libs = ['-lopengl32', '-lwinmm', '-lkernel32', '-luser32', '-lmsvcrt', '-lgdi32']
             else:
@@ -1345,12 +3160,16 @@ class StandaloneCompiler:
 
             cflags_str = self._get_compiler_flags()
             ldflags_str = self._get_linker_flags()
+            self._log_flags(cflags_str, ldflags_str)
             
             clang_cmd = 'clang.exe' if self.is_windows else 'clang'
+            srcs = self._c_sources(clang_cmd, cflags_str.split())
+            if srcs is None:
+                return False
             cmd = [clang_cmd] + cflags_str.split() + srcs + ['-o', str(self.output_exe)] + ldflags_str.split() + libs
 
             self.log(f"  Запускаю: {clang_cmd} для компиляции кода...")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            result = self._run_toolchain(cmd, timeout=60)
 
             exe_found = self.output_exe.exists() or (self.is_windows and self.output_exe.with_suffix('.exe').exists())
 
@@ -1393,8 +3212,193 @@ class StandaloneCompiler:
         return None
 
 
-def main():
-    if len(sys.argv) < 2:
+def print_cache_stats(temp_dir: Path):
+    cache = open_cache(temp_dir, 'exe')
+    if cache is None:
+        print("Кэш сборки недоступен")
+        return
+    stats = cache.stats()
+    lookups = stats.get('hits', 0) + stats.get('misses', 0)
+    ratio = 100.0 * stats.get('hits', 0) / lookups if lookups else 0.0
+    print(f"Кэш сборки: {cache.root}")
+    print(f"  Попаданий: {stats.get('hits', 0)}, промахов: {stats.get('misses', 0)} ({ratio:.1f}% попаданий)")
+    print(f"  Записей: {stats['entries']}, размер: {stats['bytes'] / 1024.0:.1f} КБ из {stats['max_bytes'] / (1024.0 * 1024.0):.0f} МБ")
+    print(f"  Вытеснено: {stats.get('evictions', 0)}")
+
+
+class _SocketStream:
+    # stdout/stderr запроса: каждая запись уходит клиенту отдельным JSON кадром
+    def __init__(self, conn, stream: str):
+        self.conn = conn
+        self.stream = stream
+
+    def write(self, data: str) -> int:
+        import json
+        if data:
+            self.conn.sendall((json.dumps({self.stream: data}, ensure_ascii=False) + "\n").encode('utf-8'))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def _compiler_sources_version() -> Dict[str, int]:
+    root = Path(__file__).resolve().parent.parent
+    files = [Path(__file__).resolve()] + sorted((root / 'core').glob('*.py'))
+    return {str(f): f.stat().st_mtime_ns for f in files if f.exists()}
+
+
+def _serve_request(conn, warm: WarmState, version: Dict[str, int]) -> bool:
+    # Возвращает False, когда демону пора завершиться
+    import contextlib
+    import json
+    reader = conn.makefile('rb')
+    line = reader.readline()
+    if not line:
+        return True
+    request = json.loads(line.decode('utf-8'))
+    command = request.get('command', 'build')
+
+    def reply(**frame):
+        conn.sendall((json.dumps(frame, ensure_ascii=False) + "\n").encode('utf-8'))
+
+    if command == 'stop':
+        reply(exit=0, stopped=True)
+        return False
+    if command == 'status':
+        reply(exit=0, pid=os.getpid(), **warm.stats())
+        return True
+    if _compiler_sources_version() != version:
+        # Исходники компилятора изменились: клиент соберет сам, демон нужно перезапустить
+        reply(stale=True)
+        return False
+
+    saved_cwd = os.getcwd()
+    saved_env = dict(os.environ)
+    code = 1
+    try:
+        os.chdir(request.get('cwd') or saved_cwd)
+        if 'env' in request:
+            os.environ.clear()
+            os.environ.update(request['env'])
+        with contextlib.redirect_stdout(_SocketStream(conn, 'out')), contextlib.redirect_stderr(_SocketStream(conn, 'err')):
+            try:
+                code = main(['build.py'] + list(request.get('argv', [])), warm=warm)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                code = 1
+    except (BrokenPipeError, ConnectionResetError):
+        return True
+    finally:
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+    try:
+        reply(exit=code)
+    except OSError:
+        pass
+    return True
+
+
+def _check_private_dir(directory: Path) -> Optional[str]:
+    # Демон выполняет команды клиента (--pgo-train) с его окружением, поэтому сокет лежит
+    # только в каталоге, который не могут читать и подменять другие пользователи
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return None
+    st = directory.stat()
+    if st.st_uid != os.getuid():
+        return f"Каталог сокета {directory} принадлежит другому пользователю"
+    if st.st_mode & 0o077:
+        return f"Каталог сокета {directory} доступен другим пользователям (нужны права 0700)"
+    return None
+
+
+def _peer_is_owner(conn) -> bool:
+    import socket
+    if not hasattr(socket, 'SO_PEERCRED') or not hasattr(os, 'getuid'):
+        return True
+    import struct
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', creds)
+    return uid == os.getuid()
+
+
+def serve(socket_path: str, idle_timeout: float = 0.0) -> int:
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        print("[ОШИБКА] Демон сборки требует Unix сокетов (AF_UNIX)")
+        return 1
+    path = Path(socket_path)
+    problem = _check_private_dir(path.parent)
+    if problem:
+        print(f"[ОШИБКА] {problem}")
+        return 1
+    if path.exists():
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(path))
+            print(f"Демон уже запущен: {path}")
+            return 1
+        except OSError:
+            path.unlink()
+        finally:
+            probe.close()
+
+    warm = WarmState()
+    version = _compiler_sources_version()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Сокет сразу создается с правами только для владельца, без окна между bind и chmod
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(str(path))
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    if idle_timeout > 0:
+        server.settimeout(idle_timeout)
+    print(f"Демон CBlerr слушает {path} (pid {os.getpid()})", flush=True)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                print("Демон остановлен: нет запросов дольше --idle-timeout")
+                break
+            conn.settimeout(None)
+            with conn:
+                if not _peer_is_owner(conn):
+                    continue
+                if not _serve_request(conn, warm, version):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    stats = warm.stats()
+    print(f"Демон завершен: сборок {stats['builds']}, AST из памяти {stats['ast_hits']}, Си код из памяти {stats['output_hits']}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None, warm: Optional[WarmState] = None) -> int:
+    # argv передают лаунчер и демон в том же процессе; без него разбирается sys.argv
+    argv = _extract_cli_flags(argv)
+    if len(argv) >= 2 and argv[1] == '--cache-stats':
+        import tempfile
+        print_cache_stats(Path(tempfile.gettempdir()) / "cblerr_standalone")
+        return 0
+
+    if len(argv) < 2 or argv[1] in ('-h', '--help'):
         print("Использование: python build/build.py <исходный_файл.cbl> [опции]")
         print("Опции:")
         print("  -o <файл>    Путь к выходному исполняемому файлу")
@@ -1408,47 +3412,157 @@ def main():
         print("  --clang      Использовать Clang компилятор")
         print("  --lld        Использовать Clang + LLD линкер")
         print("  --mingw      Использовать MinGW (GCC для Windows)")
-        sys.exit(1)
+        print("  -j, --jobs <N>  Генерировать тела функций в N процессах (0 = по числу ядер)")
+        print("  --units <N>  Разбить Си код на N единиц трансляции и компилировать их параллельно (0 = по числу ядер)")
+        print("  --lto        Включить -flto (межмодульная оптимизация при линковке)")
+        print("  --no-fold    Отключить свертку констант перед генерацией кода")
+        print("  --no-line-directives  Не вставлять #line (ошибки и отладчик укажут на строки Си кода)")
+        print("  --source-map Записать JSON карту строк Си -> строки .cbl рядом с Си файлом")
+        print("  --incremental  Отдельная единица трансляции и объектный файл на каждый модуль, пересобираются только измененные")
+        print("  --time-report[=json[:файл]]  Время и пропускная способность по фазам (таблица или JSON)")
+        print("  --profile-compiler[=файл.pstats]  Профилировать сам компилятор через cProfile и вывести самые горячие функции")
+        print("  --profile-compiler=sample[:файл.collapsed]  Сэмплирующий профиль со стеками для flame graph")
+        print("  --profile-top <N>  Сколько функций показывать в сводке профиля (по умолчанию 25)")
+        print("  --no-cache   Не использовать кэш готовых исполняемых файлов")
+        print("  --cache-stats  Показать статистику кэша (можно без исходного файла)")
+        print("  --profile <имя>  Профиль оптимизации: size (по умолчанию), speed, native, debug")
+        print("  --pgo        Сборка с профилем: инструментирование, тренировочный запуск, пересборка")
+        print("  --pgo-args \"<аргументы>\"  Аргументы программы для тренировочного запуска --pgo")
+        print("  --pgo-train \"<команда>\"  Своя тренировочная команда для --pgo ({exe} заменяется путем к программе)")
+        print("Демон сборки (держит модули, AST и кэши в памяти между сборками):")
+        print("  python build/build.py serve [--socket <путь>] [--idle-timeout <сек>]  Запустить демон")
+        print("  python build/build.py serve --stop | --status  Остановить демон или показать его статистику")
+        print("  --no-server  Собрать в этом процессе, даже если демон запущен")
+        print("  -h, --help   Показать эту справку")
+        return 0 if len(argv) >= 2 else 1
     
-    source_file = sys.argv[1]
+    source_file = argv[1]
     output_exe = None
     target = "windows"
     verbose = True
     link_mode = None
     stack_size = None
     compiler_type = None
+    jobs = 1
+    units = 1
+    lto = False
+    fold = True
+    line_directives = True
+    source_map = False
+    opt_profile = 'size'
+    use_cache = True
+    cache_stats = False
+    incremental = False
+    time_report = None
+    profile_compiler = None
+    profile_top = 25
+    pgo = False
+    pgo_train = None
+    pgo_args = None
     
     i = 2
-    while i < len(sys.argv):
-        if sys.argv[i] == '-o' and i + 1 < len(sys.argv):
-            output_exe = sys.argv[i + 1]
+    while i < len(argv):
+        if argv[i] == '-o' and i + 1 < len(argv):
+            output_exe = argv[i + 1]
             i += 2
-        elif sys.argv[i] == '-t' and i + 1 < len(sys.argv):
-            target = sys.argv[i + 1]
+        elif argv[i] == '-t' and i + 1 < len(argv):
+            target = argv[i + 1]
             i += 2
-        elif sys.argv[i] == '--verbose':
+        elif argv[i] == '--verbose':
             verbose = True
             i += 1
-        elif sys.argv[i] == '-static':
+        elif argv[i] == '-static':
             link_mode = 'static'
             i += 1
-        elif sys.argv[i] == '-dynamic':
+        elif argv[i] == '-dynamic':
             link_mode = 'dynamic'
             i += 1
-        elif sys.argv[i] == '--gcc':
+        elif argv[i] == '--gcc':
             compiler_type = 'gcc'
             i += 1
-        elif sys.argv[i] == '--clang':
+        elif argv[i] == '--clang':
             compiler_type = 'clang'
             i += 1
-        elif sys.argv[i] == '--lld':
+        elif argv[i] == '--lld':
             compiler_type = 'lld'
             i += 1
-        elif sys.argv[i] == '--mingw':
+        elif argv[i] == '--mingw':
             compiler_type = 'mingw'
             i += 1
-        elif sys.argv[i] in ('--stack-size',) and i + 1 < len(sys.argv):
-            raw = sys.argv[i + 1]
+        elif argv[i] in ('-j', '--jobs') and i + 1 < len(argv):
+            try:
+                jobs = int(argv[i + 1])
+            except ValueError:
+                print(f"Неверное число процессов: {argv[i + 1]}")
+                sys.exit(1)
+            if jobs <= 0:
+                jobs = os.cpu_count() or 1
+            i += 2
+        elif argv[i] == '--units' and i + 1 < len(argv):
+            try:
+                units = int(argv[i + 1])
+            except ValueError:
+                print(f"Неверное число единиц трансляции: {argv[i + 1]}")
+                sys.exit(1)
+            if units <= 0:
+                units = os.cpu_count() or 1
+            i += 2
+        elif argv[i] == '--lto':
+            lto = True
+            i += 1
+        elif argv[i] == '--no-fold':
+            fold = False
+            i += 1
+        elif argv[i] == '--no-line-directives':
+            line_directives = False
+            i += 1
+        elif argv[i] == '--source-map':
+            source_map = True
+            i += 1
+        elif argv[i] == '--profile' and i + 1 < len(argv):
+            opt_profile = argv[i + 1].lower()
+            if opt_profile not in StandaloneCompiler.OPTIMIZATION_PROFILES:
+                print(f"Неизвестный профиль оптимизации: {argv[i + 1]} (доступны: {', '.join(StandaloneCompiler.OPTIMIZATION_PROFILES)})")
+                sys.exit(1)
+            i += 2
+        elif argv[i] == '--time-report' or argv[i].startswith('--time-report='):
+            time_report = argv[i].split('=', 1)[1] if '=' in argv[i] else 'table'
+            if not (time_report == 'table' or time_report == 'json' or time_report.startswith('json:')):
+                print(f"Неверный формат отчета о времени: {time_report} (table, json или json:<файл>)")
+                sys.exit(1)
+            i += 1
+        elif argv[i] == '--profile-compiler' or argv[i].startswith('--profile-compiler='):
+            profile_compiler = argv[i].split('=', 1)[1] if '=' in argv[i] else ''
+            i += 1
+        elif argv[i] == '--profile-top' and i + 1 < len(argv):
+            try:
+                profile_top = int(argv[i + 1])
+            except ValueError:
+                print(f"Неверное число функций для сводки профиля: {argv[i + 1]}")
+                sys.exit(1)
+            i += 2
+        elif argv[i] == '--incremental':
+            incremental = True
+            i += 1
+        elif argv[i] == '--no-cache':
+            use_cache = False
+            i += 1
+        elif argv[i] == '--cache-stats':
+            cache_stats = True
+            i += 1
+        elif argv[i] == '--pgo':
+            pgo = True
+            i += 1
+        elif argv[i] == '--pgo-train' and i + 1 < len(argv):
+            pgo = True
+            pgo_train = argv[i + 1]
+            i += 2
+        elif argv[i] == '--pgo-args' and i + 1 < len(argv):
+            pgo = True
+            pgo_args = argv[i + 1]
+            i += 2
+        elif argv[i] in ('--stack-size',) and i + 1 < len(argv):
+            raw = argv[i + 1]
             try:
                 s = raw.strip().upper()
                 if s.endswith('M'):
@@ -1469,15 +3583,33 @@ def main():
         exe_ext = '.exe' if target == 'windows' else ''
         output_exe = source_path.stem + exe_ext
     
-    compiler = StandaloneCompiler(source_file, output_exe, verbose=verbose, link_mode=link_mode, stack_reserve=stack_size, compiler_type=compiler_type)
-    success = compiler.compile()
-    
-    if success:
-        print(f"Исполняемый файл: {compiler.output_exe}")
-        sys.exit(0)
-    else:
-        print(f"\n[НЕУДАЧА] Ошибка компиляции!")
-        sys.exit(1)
+    compiler = StandaloneCompiler(source_file, output_exe, verbose=verbose, link_mode=link_mode, stack_reserve=stack_size, compiler_type=compiler_type, jobs=jobs,
+                                  units=units, lto=lto, fold=fold, line_directives=line_directives,
+                                  source_map=source_map, pgo=pgo, pgo_train=pgo_train, pgo_args=pgo_args,
+                                  opt_profile=opt_profile, use_cache=use_cache,
+                                  incremental=incremental, time_report=time_report, warm=warm)
+    # --time-report=json: в stdout только JSON, чтобы его можно было перенаправить в файл
+    import contextlib
+    quiet_stdout = contextlib.redirect_stdout(sys.stderr) if time_report == 'json' else contextlib.nullcontext()
+    with quiet_stdout:
+        if profile_compiler is None:
+            success = compiler.compile()
+        elif profile_compiler == 'sample' or profile_compiler.startswith('sample:'):
+            from core.profiling import run_sampling
+            path = profile_compiler.split(':', 1)[1] if ':' in profile_compiler else f"{Path(source_file).stem}.collapsed"
+            success = run_sampling(compiler.compile, path, top=profile_top)
+        else:
+            from core.profiling import run_cprofile
+            success = run_cprofile(compiler.compile, profile_compiler or f"{Path(source_file).stem}.pstats", top=profile_top)
+        if cache_stats:
+            compiler.print_cache_stats()
+
+        if success:
+            print(f"Исполняемый файл: {compiler.output_exe}")
+            return 0
+        else:
+            print(f"\n[НЕУДАЧА] Ошибка компиляции!")
+            return 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+
+def hash_parts(parts: Iterable[str]) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def parse_size(raw: str) -> int:
+    s = raw.strip().upper()
+    if s.endswith('G'):
+        return int(float(s[:-1]) * 1024 * 1024 * 1024)
+    if s.endswith('M'):
+        return int(float(s[:-1]) * 1024 * 1024)
+    if s.endswith('K'):
+        return int(float(s[:-1]) * 1024)
+    return int(s)
+
+
+class BuildCache:
+    # Контентно-адресуемое хранилище артефактов сборки: ключ -> файл.
+    # Время изменения записи обновляется при попадании, вытесняются самые старые записи.
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.objects = self.root / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.stats_file = self.root / 'stats.json'
+
+    def _entry(self, key: str) -> Path:
+        return self.objects / key[:2] / key
+
+    def _load_stats(self) -> Dict[str, int]:
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _bump(self, field: str, n: int = 1):
+        stats = self._load_stats()
+        stats[field] = stats.get(field, 0) + n
+        tmp = self.stats_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(stats, f)
+        os.replace(tmp, self.stats_file)
+
+    def get(self, key: str, dest: Path) -> bool:
+        entry = self._entry(key)
+        if not entry.exists():
+            self._bump('misses')
+            return False
+        dest = Path(dest)
+        tmp = dest.with_name(dest.name + '.cache-tmp')
+        shutil.copyfile(entry, tmp)
+        shutil.copymode(entry, tmp)
+        os.replace(tmp, dest)
+        os.utime(entry)
+        self._bump('hits')
+        return True
+
+    def put(self, key: str, src: Path):
+        entry = self._entry(key)
+        entry.parent.mkdir(exist_ok=True)
+        tmp = entry.with_name(entry.name + '.tmp')
+        shutil.copyfile(src, tmp)
+        shutil.copymode(src, tmp)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def _entries(self):
+        for sub in self.objects.iterdir():
+            if sub.is_dir():
+                for entry in sub.iterdir():
+                    if not entry.name.endswith('.tmp'):
+                        yield entry
+
+    def evict(self) -> int:
+        entries = []
+        total = 0
+        for entry in self._entries():
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            self._bump('evictions', removed)
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        stats = self._load_stats()
+        sizes = [entry.stat().st_size for entry in self._entries()]
+        stats['entries'] = len(sizes)
+        stats['bytes'] = sum(sizes)
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+def open_cache(default_root: Path, subdir: str) -> Optional[BuildCache]:
+    root = Path(os.getenv('CBLERR_CACHE_DIR') or default_root) / subdir
+    max_bytes = DEFAULT_CACHE_SIZE
+    raw = os.getenv('CBLERR_CACHE_SIZE')
+    if raw:
+        try:
+            max_bytes = parse_size(raw)
+        except ValueError:
+            pass
+    try:
+        return BuildCache(root, max_bytes)
+    except OSError:
+        return None
+
+
+class FunctionCache:
+    # Сгенерированный Си текст функций по структурному отпечатку. Записи, использованные
+    # в текущей сборке, сохраняются первыми, остальные - пока не наберется max_entries
+    VERSION = 1
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 20000):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.entries: Dict[str, dict] = {}
+        self.used: Dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == self.VERSION:
+                    self.entries = data.get('functions', {})
+            except (OSError, ValueError, AttributeError):
+                self.entries = {}
+
+    def get(self, fingerprint: str) -> Optional[dict]:
+        entry = self.used.get(fingerprint) or self.entries.get(fingerprint)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used[fingerprint] = entry
+        return entry
+
+    def put(self, fingerprint: str, entry: dict):
+        self.used[fingerprint] = entry
+        self.added += 1
+
+    def start_build(self):
+        # Демон держит кэш между сборками: записи прошлой сборки становятся обычными
+        self.entries.update(self.used)
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+
+    def save(self):
+        # Без новых записей файл на диске уже содержит все, что использовалось
+        if not self.path or (not self.added and self.path.exists()):
+            return
+        merged = dict(self.used)
+        for fingerprint, entry in self.entries.items():
+            if len(merged) >= self.max_entries:
+                break
+            merged.setdefault(fingerprint, entry)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'functions': merged}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def open_function_cache(default_root: Path) -> FunctionCache:
+    root = Path(os.getenv('CBLERR_CACHE_DIR') or default_root)
+    return FunctionCache(root / 'codegen' / 'functions.json')
@@ -0,0 +1,450 @@
+import math
+from typing import Any
+from core.flux_ast import (
+    Program, FunctionDef, Literal, Variable, BinaryOp, Compare, LogicalOp,
+    WalrusExpr, Assign, Return, IfStmt, WhileLoop, ForLoop, MatchStmt,
+    Call, FieldAccess, ArrayAccess, ArrayLiteral, Dereference, CastExpr,
+    AddressOf, GlobalVariable
+)
+
+INT32_MIN = -(1 << 31)
+INT32_MAX = (1 << 31) - 1
+
+INT_TYPES = ('int', 'i8', 'i16', 'i32', 'i64', 'u8', 'u16', 'u32', 'u64')
+FLOAT_TYPES = ('float', 'f32', 'f64')
+
+
+def _is_int_lit(node: Any) -> bool:
+    return isinstance(node, Literal) and node.type in INT_TYPES and isinstance(node.value, int) and not isinstance(node.value, bool)
+
+def _is_float_lit(node: Any) -> bool:
+    return isinstance(node, Literal) and node.type in FLOAT_TYPES and isinstance(node.value, float)
+
+def _is_bool_lit(node: Any) -> bool:
+    return isinstance(node, Literal) and isinstance(node.value, bool)
+
+def _is_str_lit(node: Any) -> bool:
+    return isinstance(node, Literal) and isinstance(node.value, str)
+
+def _truthy(node: Any) -> bool | None:
+    if _is_bool_lit(node) or _is_int_lit(node):
+        return bool(node.value)
+    if isinstance(node, Variable) and node.name in ('true', 'false'):
+        return node.name == 'true'
+    return None
+
+def _is_pure(node: Any) -> bool:
+    if isinstance(node, (Literal, Variable)):
+        return True
+    if isinstance(node, FieldAccess):
+        return _is_pure(node.obj)
+    return False
+
+def _c_div(a: int, b: int) -> int:
+    q = abs(a) // abs(b)
+    return -q if (a < 0) != (b < 0) else q
+
+def _fold_int(op: str, a: int, b: int) -> int | None:
+    if op == '+':
+        r = a + b
+    elif op == '-':
+        r = a - b
+    elif op == '*':
+        r = a * b
+    elif op == '/':
+        if b == 0:
+            return None
+        r = _c_div(a, b)
+    elif op == '%':
+        if b == 0:
+            return None
+        r = a - b * _c_div(a, b)
+    elif op == '**':
+        if b < 0 or b > 64:
+            return None
+        r = a ** b
+    elif op == '&':
+        r = a & b
+    elif op == '|':
+        r = a | b
+    elif op == '^':
+        r = a ^ b
+    elif op == '<<':
+        if a < 0 or not 0 <= b < 31:
+            return None
+        r = a << b
+    elif op == '>>':
+        if a < 0 or not 0 <= b < 32:
+            return None
+        r = a >> b
+    else:
+        return None
+    # Значения за пределами int32 в Си имеют другой тип литерала - не трогаем
+    if not INT32_MIN <= r <= INT32_MAX:
+        return None
+    return r
+
+def _fold_float(op: str, a: float, b: float) -> float | None:
+    try:
+        if op == '+':
+            r = a + b
+        elif op == '-':
+            r = a - b
+        elif op == '*':
+            r = a * b
+        elif op == '/':
+            if b == 0.0:
+                return None
+            r = a / b
+        elif op == '**':
+            r = math.pow(a, b)
+        else:
+            return None
+    except (OverflowError, ValueError):
+        return None
+    if not math.isfinite(r):
+        return None
+    return r
+
+def _compare(op: str, a: Any, b: Any) -> bool | None:
+    if op == '==':
+        return a == b
+    if op == '!=':
+        return a != b
+    if op == '<':
+        return a < b
+    if op == '>':
+        return a > b
+    if op == '<=':
+        return a <= b
+    if op == '>=':
+        return a >= b
+    return None
+
+
+class ConstantFolder:
+    def __init__(self):
+        self.folded = 0
+        self.constants: dict[str, tuple[Literal, Any]] = {}
+        self.shadowed: set[str] = set()
+        self.global_types: dict[str, Any] = {}
+        self.var_types: dict[str, Any] = {}
+
+    def fold_program(self, program: Program) -> Program:
+        for g in program.global_vars:
+            if isinstance(g, GlobalVariable):
+                self.global_types[g.name] = g.var_type
+            if not isinstance(g, GlobalVariable) or g.value is None:
+                continue
+            g.value = self.fold_expr(g.value)
+            if g.is_const and (_is_int_lit(g.value) or _is_float_lit(g.value) or _is_bool_lit(g.value)):
+                self.constants[g.name] = (g.value, g.var_type)
+
+        for f in program.functions:
+            if f.is_extern or not f.body:
+                continue
+            self.shadowed = self._local_names(f)
+            self.var_types = self._local_types(f)
+            f.body = self.fold_block(f.body)
+        self.shadowed = set()
+        self.var_types = {}
+        return program
+
+    def _local_names(self, f: FunctionDef) -> set[str]:
+        names = {pname for pname, _ in f.params}
+
+        def walk(node: Any):
+            if isinstance(node, list):
+                for x in node:
+                    walk(x)
+                return
+            if isinstance(node, Assign) and isinstance(node.target, str):
+                names.add(node.target)
+            elif isinstance(node, ForLoop) and node.iter_var:
+                names.add(node.iter_var)
+            elif isinstance(node, WalrusExpr) and isinstance(node.target, Variable):
+                names.add(node.target.name)
+            if hasattr(node, '__dict__'):
+                for v in vars(node).values():
+                    if isinstance(v, (list, tuple)) or hasattr(v, '__dict__'):
+                        walk(v)
+
+        walk(f.body)
+        return names
+
+    def _local_types(self, f: FunctionDef) -> dict[str, Any]:
+        # Объявленные типы параметров и локальных переменных; имя, объявленное в разных
+        # областях с разными типами, считается неизвестным
+        types = {name: t for name, t in self.global_types.items() if name not in self.shadowed}
+        local: dict[str, Any] = {}
+        conflicts: set[str] = set()
+
+        def declare(name: str, t: Any):
+            if name in local and local[name] != t:
+                conflicts.add(name)
+            local[name] = t
+
+        for pname, ptype in f.params:
+            declare(pname, ptype)
+
+        def walk(node: Any):
+            if isinstance(node, list):
+                for x in node:
+                    walk(x)
+                return
+            if isinstance(node, Assign) and isinstance(node.target, str) and node.var_type:
+                declare(node.target, node.var_type)
+            if hasattr(node, '__dict__'):
+                for v in vars(node).values():
+                    if isinstance(v, (list, tuple)) or hasattr(v, '__dict__'):
+                        walk(v)
+
+        walk(f.body)
+        types.update((name, t) for name, t in local.items() if name not in conflicts)
+        return types
+
+    def _int_type(self, node: Any) -> str | None:
+        # Целочисленный тип выражения, если он точно известен
+        if _is_int_lit(node):
+            return node.type
+        if isinstance(node, CastExpr):
+            return node.target_type if node.target_type in INT_TYPES else None
+        if isinstance(node, Variable):
+            t = self.var_types.get(node.name)
+            return t if t in INT_TYPES else None
+        return None
+
+    def _zero_of(self, int_type: str) -> Any:
+        if int_type in ('int', 'i32'):
+            return Literal(0, int_type)
+        return CastExpr(Literal(0, 'int'), int_type)
+
+    def fold_block(self, stmts: list[Any]) -> list[Any]:
+        out: list[Any] = []
+        for stmt in stmts:
+            res = self.fold_statement(stmt)
+            if res is None:
+                continue
+            if isinstance(res, list):
+                out.extend(res)
+            else:
+                out.append(res)
+        return out
+
+    def _declares(self, stmts: list[Any]) -> bool:
+        return any(isinstance(s, Assign) and getattr(s, 'var_type', None) for s in stmts)
+
+    def fold_statement(self, stmt: Any) -> Any:
+        if isinstance(stmt, Assign):
+            stmt.value = self.fold_expr(stmt.value)
+            if not isinstance(stmt.target, str):
+                self._fold_target(stmt.target)
+            return stmt
+
+        if isinstance(stmt, Return):
+            if stmt.value is not None:
+                stmt.value = self.fold_expr(stmt.value)
+            return stmt
+
+        if isinstance(stmt, IfStmt):
+            stmt.condition = self.fold_expr(stmt.condition)
+            stmt.then_body = self.fold_block(stmt.then_body)
+            if stmt.else_body:
+                stmt.else_body = self.fold_block(stmt.else_body)
+            cond = _truthy(stmt.condition)
+            if cond is None:
+                return stmt
+            self.folded += 1
+            taken = stmt.then_body if cond else (stmt.else_body or [])
+            # Объявления внутри ветки должны остаться в собственной области видимости Си
+            if self._declares(taken):
+                return IfStmt(Literal(True, 'bool'), taken, None)
+            return taken
+
+        if isinstance(stmt, WhileLoop):
+            stmt.condition = self.fold_expr(stmt.condition)
+            stmt.body = self.fold_block(stmt.body)
+            if _truthy(stmt.condition) is False:
+                self.folded += 1
+                return None
+            return stmt
+
+        if isinstance(stmt, ForLoop):
+            if isinstance(stmt.init, Assign):
+                self.fold_statement(stmt.init)
+            elif stmt.init is not None:
+                stmt.init = self.fold_expr(stmt.init)
+            if stmt.condition is not None:
+                stmt.condition = self.fold_expr(stmt.condition)
+            if isinstance(stmt.post, Assign):
+                self.fold_statement(stmt.post)
+            elif stmt.post is not None:
+                stmt.post = self.fold_expr(stmt.post)
+            if stmt.iter_expr is not None:
+                stmt.iter_expr = self.fold_expr(stmt.iter_expr)
+            stmt.body = self.fold_block(stmt.body)
+            return stmt
+
+        if isinstance(stmt, MatchStmt):
+            stmt.expr = self.fold_expr(stmt.expr)
+            for case in stmt.cases:
+                if case.values is not None:
+                    case.values = [self.fold_expr(v) for v in case.values]
+                case.body = self.fold_block(case.body)
+            return stmt
+
+        return self.fold_expr(stmt)
+
+    def _fold_target(self, target: Any) -> None:
+        if isinstance(target, FieldAccess):
+            self._fold_target(target.obj)
+        elif isinstance(target, ArrayAccess):
+            self._fold_target(target.arr)
+            target.index = self.fold_expr(target.index)
+        elif isinstance(target, Dereference):
+            target.ptr = self.fold_expr(target.ptr)
+
+    def fold_expr(self, expr: Any) -> Any:
+        if isinstance(expr, Variable):
+            const = self.constants.get(expr.name)
+            if const is None or expr.name in self.shadowed:
+                return expr
+            lit, var_type = const
+            value = Literal(lit.value, lit.type)
+            if var_type in ('int', 'i32', 'int32', 'bool') and not _is_float_lit(lit):
+                self.folded += 1
+                return value
+            if var_type in INT_TYPES + FLOAT_TYPES:
+                # Тип глобальной переменной сохраняется явным приведением (u32, f32, ...)
+                self.folded += 1
+                return CastExpr(value, var_type)
+            return expr
+
+        if isinstance(expr, BinaryOp):
+            expr.left = self.fold_expr(expr.left)
+            expr.right = self.fold_expr(expr.right)
+            return self._fold_binary(expr)
+
+        if isinstance(expr, Compare):
+            expr.left = self.fold_expr(expr.left)
+            expr.right = self.fold_expr(expr.right)
+            left, right = expr.left, expr.right
+            both = ((_is_int_lit(left) and _is_int_lit(right))
+                    or (_is_float_lit(left) and _is_float_lit(right))
+                    or (_is_str_lit(left) and _is_str_lit(right) and expr.op in ('==', '!=')))
+            if both:
+                r = _compare(expr.op, left.value, right.value)
+                if r is not None:
+                    self.folded += 1
+                    return Literal(r, 'bool')
+            return expr
+
+        if isinstance(expr, LogicalOp):
+            expr.left = self.fold_expr(expr.left)
+            lv = _truthy(expr.left)
+            if expr.op == 'not':
+                if lv is not None:
+                    self.folded += 1
+                    return Literal(not lv, 'bool')
+                return expr
+            expr.right = self.fold_expr(expr.right)
+            rv = _truthy(expr.right)
+            # Правый операнд не вычисляется в Си, если левый уже определяет результат
+            if expr.op == 'and' and lv is False:
+                self.folded += 1
+                return Literal(False, 'bool')
+            if expr.op == 'or' and lv is True:
+                self.folded += 1
+                return Literal(True, 'bool')
+            if lv is not None and rv is not None:
+                self.folded += 1
+                return Literal((lv and rv) if expr.op == 'and' else (lv or rv), 'bool')
+            return expr
+
+        if isinstance(expr, WalrusExpr):
+            expr.value = self.fold_expr(expr.value)
+            return expr
+
+        if isinstance(expr, Call):
+            expr.args = [self.fold_expr(a) for a in (expr.args or [])]
+            return expr
+
+        if isinstance(expr, FieldAccess):
+            expr.obj = self.fold_expr(expr.obj)
+            return expr
+
+        if isinstance(expr, ArrayAccess):
+            expr.arr = self.fold_expr(expr.arr)
+            expr.index = self.fold_expr(expr.index)
+            return expr
+
+        if isinstance(expr, ArrayLiteral):
+            expr.elements = [self.fold_expr(e) for e in expr.elements]
+            return expr
+
+        if isinstance(expr, Dereference):
+            expr.ptr = self.fold_expr(expr.ptr)
+            return expr
+
+        if isinstance(expr, CastExpr):
+            expr.expr = self.fold_expr(expr.expr)
+            return expr
+
+        if isinstance(expr, AddressOf):
+            if not isinstance(expr.expr, Variable):
+                self._fold_target(expr.expr)
+            return expr
+
+        return expr
+
+    def _fold_binary(self, expr: BinaryOp) -> Any:
+        left, right, op = expr.left, expr.right, expr.op
+
+        if _is_int_lit(left) and _is_int_lit(right):
+            r = _fold_int(op, left.value, right.value)
+            if r is not None:
+                self.folded += 1
+                return Literal(r, left.type)
+            return expr
+
+        if _is_float_lit(left) and _is_float_lit(right):
+            r = _fold_float(op, left.value, right.value)
+            if r is not None:
+                self.folded += 1
+                return Literal(r, left.type)
+            return expr
+
+        if op == '+' and _is_str_lit(left) and _is_str_lit(right):
+            self.folded += 1
+            return Literal(left.value + right.value, 'str')
+
+        # Алгебраические тождества только с целыми литералами, чтобы не менять тип выражения.
+        # x*0 и x&0 заменяются нулем только для целого x: для float это не тождество (NaN, inf),
+        # а целый 0 вместо double в вариадическом вызове - неопределенное поведение
+        if _is_int_lit(right):
+            if right.value == 0 and op in ('+', '-', '|', '^', '<<', '>>'):
+                self.folded += 1
+                return left
+            if right.value == 1 and op in ('*', '/'):
+                self.folded += 1
+                return left
+            if right.value == 0 and op in ('*', '&') and _is_pure(left) and self._int_type(left):
+                self.folded += 1
+                return self._zero_of(self._int_type(left))
+        if _is_int_lit(left):
+            if left.value == 0 and op in ('+', '|', '^'):
+                self.folded += 1
+                return right
+            if left.value == 1 and op == '*':
+                self.folded += 1
+                return right
+            if left.value == 0 and op in ('*', '&') and _is_pure(right) and self._int_type(right):
+                self.folded += 1
+                return self._zero_of(self._int_type(right))
+        return expr
+
+
+def fold_constants(program: Program) -> tuple[Program, int]:
+    folder = ConstantFolder()
+    folder.fold_program(program)
+    return program, folder.folded
@@ -1,14 +1,15 @@
 import sys
 import os
-import inspect
-import traceback
 import time
 from enum import IntEnum
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
-from io import StringIO
+
+# inspect и datetime нужны только при падении, поэтому импортируются там же:
+# компилятор загружает этот модуль при каждом запуске
+if TYPE_CHECKING:
+    from datetime import datetime
 
 ANSI_RESET = "\033[0m"
 ANSI_RED = "\033[31m"
@@ -191,7 +192,7 @@ class StackFrame:
 @dataclass
 class CrashContext:
 
-    timestamp: datetime
+    timestamp: 'datetime'
     exception_type: str
     exception_message: str
     stack_frames: List[StackFrame]
@@ -239,7 +240,7 @@ class GameDebugger: #типо игра хахахахахахах
     def _rotate_log_if_needed(self) -> None:
 
         if self.log_file.exists() and self.log_file.stat().st_size > self.max_log_size:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
             backup_name = self.log_file.stem + f"_{timestamp}.log"
             backup_path = self.log_file.parent / backup_name
             self.log_file.rename(backup_path)
@@ -260,7 +261,7 @@ class GameDebugger: #типо игра хахахахахахах
         include_time: bool = True
     ) -> Tuple[str, str]:
 
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         elapsed = time.time() - self.start_time
 
         level_names = {
@@ -332,6 +333,9 @@ class GameDebugger: #типо игра хахахахахахах
 
     def capture_crash_context(self, exc: Exception) -> CrashContext:
 
+        import inspect
+        from datetime import datetime
+
         tb = exc.__traceback__
         stack_frames: List[StackFrame] = []
 
@@ -55,10 +55,16 @@ class IfStmt:
     then_body: list[Any]
     else_body: list[Any] | None = None
 
+@dataclass
+class Decorator:
+    name: str
+    args: list[str] | None = None
+
 @dataclass
 class WhileLoop:
     condition: Any
     body: list[Any]
+    decorators: list[Decorator] | None = None
 
 @dataclass
 class BreakStmt:
@@ -111,11 +117,6 @@ class CastExpr:
     expr: Any
     target_type: Any
 
-@dataclass
-class Decorator:
-    name: str
-    args: list[str] | None = None
-
 @dataclass
 class ComptimeBlock:
     code: str
@@ -138,6 +139,7 @@ class ForLoop:
     condition: Any | None
     post: Any | None
     body: list[Any]
+    decorators: list[Decorator] | None = None
 
 @dataclass
 class EnumDef:
@@ -163,6 +165,7 @@ class GlobalVariable:
     var_type: str
     value: Any | None = None
     is_const: bool = False
+    decorators: list[Decorator] | None = None
 
 @dataclass
 class FunctionDef:
@@ -12,8 +12,9 @@ from core.flux_ast import (
 from core.debugger import get_debugger
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: List[Token], filename: str | None = None):
         self.tokens = tokens
+        self.filename = filename
         self.pos = 0
         self.debugger = get_debugger()
 
@@ -42,6 +43,17 @@ class Parser:
                 return token
         return self.advance()
 
+    def _mark(self, node, token: Token | None, source: bool = False):
+        # Позиция узла в исходнике: для #line в Си и для сообщений об ошибках
+        if node is None or token is None or not hasattr(node, '__dict__'):
+            return node
+        if getattr(node, 'line', None) is None:
+            node.line = token.line
+            node.column = token.column
+        if source:
+            node.source_file = self.filename
+        return node
+
     def skip_newlines(self) -> None:
         while self.current_token() and self.current_token().type == TokenType.NEWLINE:
             self.advance()
@@ -196,7 +208,7 @@ class Parser:
         from core.flux_ast import FromImportStmt
         return FromImportStmt(module, items, None)
 
-    def parse_global_var(self):
+    def parse_global_var(self, decorators: list[Decorator] | None = None):
         is_const = False
         if self.current_token() and self.current_token().type == TokenType.CONST:
             is_const = True
@@ -210,7 +222,7 @@ class Parser:
             value = self.parse_expression()
         self.skip_newlines()
         from core.flux_ast import GlobalVariable
-        return GlobalVariable(name, var_type, value, is_const)
+        return GlobalVariable(name, var_type, value, is_const, decorators=decorators)
 
     def parse(self) -> Program:
         functions: list[FunctionDef] = []
@@ -236,38 +248,114 @@ class Parser:
                 _ = self.parse_comptime()
                 continue
 
-            if self.current_token().type == TokenType.CONST:
-                gv = self.parse_global_var()
-                global_vars.append(gv)
-                continue
-
             decorators = None
-            if self.current_token() and self.current_token().type == TokenType.AT:
+            start_token = self.current_token()
+            decorator_line = start_token.line
+            if self.current_token().type == TokenType.AT:
                 decorators = self.parse_decorators()
 
+            if self.current_token() and self.current_token().type == TokenType.CONST:
+                self._validate_decorators(decorators, self.GLOBAL_DECORATORS, "глобальной переменной", decorator_line)
+                gv = self.parse_global_var(decorators)
+                global_vars.append(self._mark(gv, start_token, source=True))
+                continue
+
             if self.current_token() and self.current_token().type == TokenType.STRUCT:
-                structs.append(self.parse_struct_def(decorators))
+                self._validate_decorators(decorators, self.STRUCT_DECORATORS, "структуры", decorator_line)
+                structs.append(self._mark(self.parse_struct_def(decorators), start_token, source=True))
                 continue
 
             if self.current_token() and self.current_token().type == TokenType.ENUM:
+                self._validate_decorators(decorators, self.ENUM_DECORATORS, "перечисления", decorator_line)
                 enums = self.parse_enum_def()
                 structs.append(enums) if enums else None
                 continue
 
             if self.current_token() and self.current_token().type in (TokenType.DEF, TokenType.EXTERN):
-                functions.append(self.parse_function(decorators))
+                self._validate_decorators(decorators, self.FUNCTION_DECORATORS, "функции", decorator_line)
+                functions.append(self._mark(self.parse_function(decorators), start_token, source=True))
                 continue
 
+            if decorators:
+                self._validate_decorators(decorators, self.GLOBAL_DECORATORS, "глобальной переменной", decorator_line)
             stmt = self.parse_statement()
             if stmt:
                 from core.flux_ast import GlobalVariable
                 if isinstance(stmt, Assign):
-                    global_vars.append(GlobalVariable(stmt.target, getattr(stmt, 'var_type', None), stmt.value, False))
+                    gv = GlobalVariable(stmt.target, getattr(stmt, 'var_type', None), stmt.value, False,
+                                        decorators=decorators)
+                    global_vars.append(self._mark(gv, start_token, source=True))
+                elif decorators:
+                    self._validate_decorators(decorators, {}, "этой конструкции", decorator_line)
+            elif decorators:
+                self._validate_decorators(decorators, {}, "этой конструкции", decorator_line)
             else:
                 self.advance()
 
         return Program(functions=functions, structs=structs, imports=imports, global_vars=global_vars)
 
+    # Имя декоратора -> число аргументов (None - любое)
+    FUNCTION_DECORATORS = {
+        'inline': 0, 'noinline': 0, 'hot': 0, 'cold': 0, 'pure': 0, 'const': 0,
+        'flatten': 0, 'fastmath': 0, 'export': 0, 'restrict': None,
+    }
+    STRUCT_DECORATORS = {'packed': 0, 'align': 1}
+    LOOP_DECORATORS = {'unroll': 1, 'vectorize': 0, 'ivdep': 0, 'simd': 0}
+    GLOBAL_DECORATORS = {'align': 1}
+    ENUM_DECORATORS: dict = {}
+    CONFLICTING_DECORATORS = (('inline', 'noinline'), ('hot', 'cold'))
+
+    def _validate_decorators(self, decorators: list[Decorator] | None, allowed: dict, target: str, line) -> None:
+        if not decorators:
+            return
+        names = [d.name for d in decorators]
+        for dec in decorators:
+            if not allowed:
+                raise SyntaxError(f"Декоратор @{dec.name} не допускается для {target} на линии {line}")
+            if dec.name not in allowed:
+                known = ", ".join(f"@{n}" for n in allowed)
+                raise SyntaxError(f"Неизвестный декоратор @{dec.name} для {target} на линии {line} (допустимы: {known})")
+            arity = allowed[dec.name]
+            n_args = len(dec.args or [])
+            if arity is not None and n_args != arity:
+                raise SyntaxError(f"Декоратор @{dec.name} ожидает аргументов: {arity}, получено {n_args} на линии {line}")
+            if names.count(dec.name) > 1:
+                raise SyntaxError(f"Декоратор @{dec.name} указан повторно на линии {line}")
+            if dec.name == 'align':
+                value = dec.args[0]
+                if not value.isdigit() or int(value) <= 0 or int(value) & (int(value) - 1):
+                    raise SyntaxError(f"@align ожидает степень двойки, получено {value} на линии {line}")
+            if dec.name == 'unroll' and not dec.args[0].isdigit():
+                raise SyntaxError(f"@unroll ожидает неотрицательное целое, получено {dec.args[0]} на линии {line}")
+        for a, b in self.CONFLICTING_DECORATORS:
+            if a in names and b in names:
+                raise SyntaxError(f"Декораторы @{a} и @{b} несовместимы на линии {line}")
+
+    def parse_decorators(self) -> list[Decorator]:
+        decorators: list[Decorator] = []
+        while self.current_token() and self.current_token().type == TokenType.AT:
+            self.advance()
+            token = self.current_token()
+            if not token or token.type in (TokenType.NEWLINE, TokenType.EOF):
+                raise SyntaxError(f"Ожидается имя декоратора после '@' на линии {token.line if token else '?'}")
+            name = token.value if getattr(token, 'value', None) is not None else token.type.name.lower()
+            self.advance()
+            args = None
+            if self.current_token() and self.current_token().type == TokenType.LPAREN:
+                self.advance()
+                args = []
+                while self.current_token() and self.current_token().type != TokenType.RPAREN:
+                    arg = self.current_token()
+                    if arg.type in (TokenType.NEWLINE, TokenType.EOF):
+                        raise SyntaxError(f"Ожидается ')' в декораторе @{name} на линии {arg.line}")
+                    if arg.type != TokenType.COMMA:
+                        args.append(str(arg.value if arg.value is not None else arg.type.name.lower()))
+                    self.advance()
+                self.expect(TokenType.RPAREN, f"Ожидается ')' в декораторе @{name}")
+            decorators.append(Decorator(str(name), args))
+            self.skip_newlines()
+        return decorators
+
     def parse_function(self, decorators: list[Decorator] | None = None) -> FunctionDef:
         is_extern = False
         if self.current_token() and self.current_token().type == TokenType.EXTERN:
@@ -392,6 +480,10 @@ class Parser:
         return ComptimeBlock(''.join(code_parts))
 
     def parse_statement(self):
+        token = self.current_token()
+        return self._mark(self._parse_statement(), token)
+
+    def _parse_statement(self):
         token = self.current_token()
         if not token:
             return None
@@ -403,6 +495,18 @@ class Parser:
             self.expect(TokenType.RPAREN, "Ожидается ')'")
             return InlineAsm(s)
 
+        if token.type == TokenType.AT:
+            decorators = self.parse_decorators()
+            self._validate_decorators(decorators, self.LOOP_DECORATORS, "цикла", token.line)
+            loop_token = self.current_token()
+            if not loop_token or loop_token.type not in (TokenType.FOR, TokenType.WHILE):
+                raise SyntaxError(f"Декораторы внутри функции допустимы только перед for/while на линии {token.line}")
+            if loop_token.type == TokenType.WHILE and any(d.name == 'simd' for d in decorators):
+                raise SyntaxError(f"@simd применим только к циклу for на линии {token.line}")
+            loop = self.parse_statement()
+            loop.decorators = decorators
+            return loop
+
         if token.type == TokenType.RETURN:
             return self.parse_return()
         if token.type == TokenType.ENDOFCODE:
@@ -615,13 +719,10 @@ class Parser:
             var_name = self.current_token().value
             self.advance()
         self.expect(TokenType.IN, "Ожидается 'in' в операторе for")
-        if self.current_token() and self.current_token().type == TokenType.NUMBER and self.peek_token() and self.peek_token().type == TokenType.RANGE:
-            start_tok = self.advance()
+        iter_expr = self.parse_expression()
+        if self.current_token() and self.current_token().type == TokenType.RANGE:
             self.advance()
-            end_tok = self.expect(TokenType.NUMBER, "Ожидается конечное число в диапазоне")
-            iter_expr = Call('range', [Literal(int(start_tok.value), 'int'), Literal(int(end_tok.value), 'int')])
-        else:
-            iter_expr = self.parse_expression()
+            iter_expr = Call('range', [iter_expr, self.parse_expression()])
         self.expect(TokenType.COLON, " ':' after for header")
         self.skip_newlines()
         self.expect(TokenType.INDENT, "Ожидаеться отступ для тела for")
@@ -676,6 +777,10 @@ class Parser:
         return MatchStmt(expr, cases)
 
     def parse_expression(self):
+        token = self.current_token()
+        return self._mark(self._parse_expression(), token)
+
+    def _parse_expression(self):
         expr = self.parse_logical_or()
         
         if self.current_token() and self.current_token().type == TokenType.WALRUS:
@@ -879,5 +984,5 @@ class Parser:
         self.expect(TokenType.RPAREN, "Ожидается ')' после аргументов вызова")
         return Call(func_name, args, type_args)
 
-def parse(tokens: List[Token]) -> Program:
-    return Parser(tokens).parse()
+def parse(tokens: List[Token], filename: str | None = None) -> Program:
+    return Parser(tokens, filename).parse()
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict, Set, List
+from typing import Callable, Dict, Set, List, Optional
 from core.lexer import tokenize
 from core.flux_parser import parse
 from core.flux_ast import Program, ImportStmt, FromImportStmt, FunctionDef, StructDef, GlobalVariable
@@ -22,8 +22,18 @@ def _resolve_module_path(module_name: str, base_dir: Path) -> Path:
     raise ImportError(f"Импортируемый файл не найден: {module_name} (из {base_dir})")
 
 
+def _load_module(mod_path: Path) -> Program:
+    src = Path(mod_path).read_text(encoding='utf-8')
+    tokens = tokenize(src, str(mod_path))
+    return parse(tokens, str(mod_path))
+
+
 def inline_imports(program: Program, source_path: str | Path, cache: Dict[Path, Program] | None = None,
-                   included: Set[Path] | None = None, stack: List[Path] | None = None) -> Program:
+                   included: Set[Path] | None = None, stack: List[Path] | None = None,
+                   loader: Optional[Callable[[Path], Program]] = None) -> Program:
+    # loader - чтение и разбор модуля; демон сборки подставляет свой, с AST из памяти
+    if loader is None:
+        loader = _load_module
     if cache is None:
         cache = {}
     if included is None:
@@ -54,11 +64,9 @@ def inline_imports(program: Program, source_path: str | Path, cache: Dict[Path,
                 raise ImportError(f"Обнаружен циклический импорт: {path_chain}")
 
             if mod_path not in cache:
-                src = Path(mod_path).read_text(encoding='utf-8')
-                tokens = tokenize(src, str(mod_path))
-                imported_prog = parse(tokens)
+                imported_prog = loader(mod_path)
                 cache[mod_path] = imported_prog
-                inline_imports(imported_prog, mod_path, cache, included, stack + [mod_path])
+                inline_imports(imported_prog, mod_path, cache, included, stack + [mod_path], loader)
             else:
                 imported_prog = cache[mod_path]
 
@@ -93,11 +101,9 @@ def inline_imports(program: Program, source_path: str | Path, cache: Dict[Path,
                 raise ImportError(f"Обнаружен циклический импорт: {path_chain}")
 
             if mod_path not in cache:
-                src = Path(mod_path).read_text(encoding='utf-8')
-                tokens = tokenize(src, str(mod_path))
-                imported_prog = parse(tokens)
+                imported_prog = loader(mod_path)
                 cache[mod_path] = imported_prog
-                inline_imports(imported_prog, mod_path, cache, included, stack + [mod_path])
+                inline_imports(imported_prog, mod_path, cache, included, stack + [mod_path], loader)
             else:
                 imported_prog = cache[mod_path]
 
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Callable, List, Optional, Tuple
+
+
+def _frame_label(code) -> str:
+    # Точка с запятой - разделитель кадров в формате collapsed stacks
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+
+class SamplingProfiler:
+    # Периодически снимает стек целевого потока. Накладные расходы почти не зависят от
+    # числа вызовов функций, в отличие от cProfile, а стеки получаются точными
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._switch_interval = None
+
+    def _run(self):
+        this_frame = sys._getframe()
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None and frame is not this_frame:
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[";".join(stack)] += 1
+                self.samples += 1
+            time.sleep(self.interval)
+
+    def start(self):
+        # Поток-сэмплер получает GIL не чаще интервала переключения, поэтому он уменьшается
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._thread = threading.Thread(target=self._run, name="cblerr-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._switch_interval is not None:
+            sys.setswitchinterval(self._switch_interval)
+
+    def write_collapsed(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+    def top(self, n: int) -> Tuple[List[Tuple[str, int]], Counter]:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return own.most_common(n), total
+
+    def format_summary(self, n: int) -> str:
+        own, inclusive = self.top(n)
+        lines = [f"Сэмплов: {self.samples} (интервал {self.interval * 1000:.1f} мс)",
+                 f"{'собств.%':>9} {'всего%':>8}  функция"]
+        for label, count in own:
+            lines.append(f"{100.0 * count / max(1, self.samples):>9.1f} {100.0 * inclusive[label] / max(1, self.samples):>8.1f}  {label}")
+        return "\n".join(lines)
+
+
+def run_cprofile(func: Callable[[], bool], stats_path: str, top: int = 25) -> bool:
+    import cProfile
+    import io
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func)
+    finally:
+        profiler.dump_stats(stats_path)
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(top)
+        stats.sort_stats('tottime').print_stats(top)
+        print(f"\nПрофиль компилятора (cProfile) сохранен в {stats_path}")
+        print(out.getvalue())
+    return result
+
+
+def run_sampling(func: Callable[[], bool], collapsed_path: str, top: int = 25, interval: float = 0.001) -> bool:
+    sampler = SamplingProfiler(interval=interval)
+    sampler.start()
+    try:
+        result = func()
+    finally:
+        sampler.stop()
+        sampler.write_collapsed(collapsed_path)
+        print(f"\nПрофиль компилятора (сэмплирование) сохранен в {collapsed_path} (формат collapsed stacks для flamegraph.pl/speedscope)")
+        print(sampler.format_summary(top))
+    return result
@@ -0,0 +1,107 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Фазы в порядке конвейера: имя, подпись в таблице, счетчик для пропускной способности
+PHASES = [
+    ('read', 'Чтение', 'bytes'),
+    ('tokenize', 'Токенизация', 'tokens'),
+    ('parse', 'Парсинг', 'tokens'),
+    ('imports', 'Импорты', 'functions'),
+    ('type_check', 'Проверка типов', 'functions'),
+    ('monomorph', 'Мономорфизация', 'functions'),
+    ('fold', 'Свертка констант', 'ast_nodes'),
+    ('codegen', 'Генерация Си', 'c_bytes'),
+    ('c_compile', 'Компиляция Си', 'c_bytes'),
+    ('link', 'Линковка', None),
+    ('pgo_train', 'PGO: обучение', None),
+]
+PHASE_NAMES = [name for name, _, _ in PHASES]
+
+
+def count_ast_nodes(node) -> int:
+    count = 0
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, (list, tuple)):
+            stack.extend(n)
+        elif hasattr(n, '__dict__'):
+            count += 1
+            stack.extend(v for v in vars(n).values() if isinstance(v, (list, tuple)) or hasattr(v, '__dict__'))
+    return count
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.counts: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.total: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+
+    def count(self, **counts: int):
+        self.counts.update(counts)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for name, label, unit in PHASES:
+            entry = self.phases.get(name)
+            if entry is None:
+                continue
+            row = {'phase': name, 'label': label, 'seconds': entry['seconds'], 'calls': entry['calls']}
+            if unit and self.counts.get(unit) and entry['seconds'] > 0:
+                row['throughput'] = self.counts[unit] / entry['seconds']
+                row['throughput_unit'] = f"{unit}/s"
+            rows.append(row)
+        return rows
+
+    def to_json(self) -> Dict[str, Any]:
+        total = self.total if self.total is not None else time.perf_counter() - self.started
+        return {
+            'version': 1,
+            'total_seconds': total,
+            'phases': self._rows(),
+            'counts': dict(self.counts),
+            'skipped': [name for name in PHASE_NAMES if name not in self.phases],
+        }
+
+    def format_table(self) -> str:
+        data = self.to_json()
+        total = data['total_seconds']
+        lines = [f"{'Фаза':<20} {'мс':>10} {'%':>6}  Пропускная способность"]
+        lines.append("-" * 64)
+        for row in data['phases']:
+            share = 100.0 * row['seconds'] / total if total else 0.0
+            rate = ""
+            if 'throughput' in row:
+                rate = f"{row['throughput']:,.0f} {row['throughput_unit']}".replace(',', ' ')
+            lines.append(f"{row['label']:<20} {row['seconds'] * 1000:>10.1f} {share:>6.1f}  {rate}")
+        accounted = sum(row['seconds'] for row in data['phases'])
+        lines.append(f"{'Прочее':<20} {(total - accounted) * 1000:>10.1f} {100.0 * (total - accounted) / total if total else 0.0:>6.1f}")
+        lines.append("-" * 64)
+        lines.append(f"{'Итого':<20} {total * 1000:>10.1f}")
+        counts = ", ".join(f"{k}={v}" for k, v in data['counts'].items())
+        if counts:
+            lines.append(f"Счетчики: {counts}")
+        return "\n".join(lines)
+
+    def dump_json(self, path: Optional[str] = None) -> str:
+        text = json.dumps(self.to_json(), ensure_ascii=False, indent=1)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text + "\n")
+        return text
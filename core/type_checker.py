@@ -267,10 +267,14 @@ class TypeChecker:
                             if isinstance(iter_expr_t, str):
                                 if iter_expr_t.startswith('array<') and iter_expr_t.endswith('>'):
                                     iter_type = iter_expr_t[6:-1]
-                                elif iter_expr_t.startswith('*'):
-                                    iter_type = iter_expr_t[1:]
+                                elif iter_expr_t.startswith('slice<') and iter_expr_t.endswith('>'):
+                                    iter_type = iter_expr_t[6:-1]
+                                elif iter_expr_t == 'str':
+                                    iter_type = 'u8'
                         except SemanticError:
-                            pass
+                            iter_expr_t = None
+                        if isinstance(iter_expr_t, str) and iter_expr_t.startswith('*'):
+                            self._error(f"Невозможно итерировать указатель {iter_expr_t}: длина неизвестна, используйте slice(ptr, n)")
                     inner_sym[stmt.iter_var] = iter_type
                     inner_origins[stmt.iter_var] = 'local'
                 for s in stmt.body:
@@ -324,6 +328,13 @@ class TypeChecker:
                 if expr.field == 'length':
                     expr.resolved_type = 'i32'
                     return 'i32'
+            if isinstance(obj_t, str) and obj_t.startswith('slice<') and obj_t.endswith('>'):
+                if expr.field == 'data':
+                    expr.resolved_type = f"*{obj_t[6:-1]}"
+                    return expr.resolved_type
+                if expr.field == 'length':
+                    expr.resolved_type = 'i64'
+                    return 'i64'
             struct_name = None
             if isinstance(obj_t, str) and obj_t.startswith('*'):
                 struct_name = obj_t[1:]
@@ -359,9 +370,23 @@ class TypeChecker:
                 if not expr.args or len(expr.args) != 1:
                     self._error("len() expects a single argument")
                 at = self._check_expression(expr.args[0], symbols, origins)
+                if isinstance(at, str) and at.startswith('*'):
+                    self._error(f"len() не применим к указателю {at}: используйте slice(ptr, n)")
                 expr.resolved_type = 'int'
                 return 'int'
 
+            if isinstance(expr.func_name, str) and expr.func_name == 'slice':
+                if not expr.args or len(expr.args) != 2:
+                    self._error("slice() ожидает два аргумента: указатель и длину")
+                pt = self._check_expression(expr.args[0], symbols, origins)
+                nt = self._check_expression(expr.args[1], symbols, origins)
+                if not (isinstance(pt, str) and pt.startswith('*')):
+                    self._error(f"Первый аргумент slice() должен быть указателем, получено {pt}")
+                if nt not in ('int', 'i8', 'i16', 'i32', 'i64', 'int32', 'int64', 'u8', 'u16', 'u32', 'u64'):
+                    self._error(f"Длина slice() должна быть целым числом, получено {nt}")
+                expr.resolved_type = f"slice<{pt[1:]}>"
+                return expr.resolved_type
+
             if isinstance(expr.func_name, str):
                 if expr.func_name not in self.functions:
                     self._error(f"Обращение к неизвестной функции '{expr.func_name}'")
@@ -505,7 +530,7 @@ class TypeChecker:
                     inner = arr_t[1:]
                     expr.resolved_type = inner
                     return inner
-                if arr_t.startswith('array<') and arr_t.endswith('>'):
+                if (arr_t.startswith('array<') or arr_t.startswith('slice<')) and arr_t.endswith('>'):
                     inner = arr_t[6:-1]
                     expr.resolved_type = inner
                     return inner
@@ -539,7 +564,7 @@ class TypeChecker:
             if expr.op == '+' and lt == 'str' and rt == 'str':
                 expr.resolved_type = 'str'
                 return 'str'
-            if expr.op in ('+', '-', '*', '/', '%') and lt.startswith('i') and rt.startswith('i'):
+            if expr.op in ('+', '-', '*', '/', '%', '**') and lt.startswith('i') and rt.startswith('i'):
                 expr.resolved_type = lt
                 return lt
             if expr.op in ('<<', '>>', '&', '|', '^') and lt.startswith('i') and rt.startswith('i'):